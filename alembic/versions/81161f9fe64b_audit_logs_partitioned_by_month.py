@@ -0,0 +1,99 @@
+"""audit_logs partitioned by month
+
+Revision ID: 81161f9fe64b
+Revises: 629cb830c040
+Create Date: 2026-10-19 09:12:40.518204
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '81161f9fe64b'
+down_revision: Union[str, Sequence[str], None] = '629cb830c040'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# months created ahead of "now"; scripts/audit_partitions.py keeps extending the window
+PARTITIONS_AHEAD = 3
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_month_partitions(first: date, last: date) -> None:
+    month = date(first.year, first.month, 1)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE audit_logs_{month:%Y_%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+        )
+        month = upper
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('audit_logs', 'audit_logs_legacy')
+    # free the primary key index name for the new table
+    op.execute('ALTER TABLE audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey')
+
+    op.create_table('audit_logs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('tenant_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=True),
+    sa.Column('entity_id', sa.UUID(), nullable=True),
+    sa.Column('meta_data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], name='audit_logs_tenant_id_fkey'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='audit_logs_user_id_fkey'),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    op.create_index('ix_audit_logs_tenant_id_created_at', 'audit_logs', ['tenant_id', 'created_at'])
+    op.create_index('ix_audit_logs_created_at_brin', 'audit_logs', ['created_at'], postgresql_using='brin')
+
+    now = datetime.now(timezone.utc).date()
+    oldest = op.get_bind().execute(sa.text('SELECT min(created_at) FROM audit_logs_legacy')).scalar()
+    _create_month_partitions(oldest.date() if oldest else now, _add_months(now, PARTITIONS_AHEAD))
+    op.execute('CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT')
+
+    op.execute(
+        "INSERT INTO audit_logs (id, tenant_id, user_id, action, entity, entity_id, meta_data, created_at) "
+        "SELECT id, tenant_id, user_id, action, entity, entity_id, meta_data, "
+        "COALESCE(created_at AT TIME ZONE 'UTC', now()) FROM audit_logs_legacy"
+    )
+    op.drop_table('audit_logs_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('audit_logs', 'audit_logs_partitioned')
+    op.execute('ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey')
+    op.create_table('audit_logs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('tenant_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=True),
+    sa.Column('entity_id', sa.UUID(), nullable=True),
+    sa.Column('meta_data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], name='audit_logs_tenant_id_fkey'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='audit_logs_user_id_fkey'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        "INSERT INTO audit_logs (id, tenant_id, user_id, action, entity, entity_id, meta_data, created_at) "
+        "SELECT id, tenant_id, user_id, action, entity, entity_id, meta_data, "
+        "created_at AT TIME ZONE 'UTC' FROM audit_logs_partitioned"
+    )
+    op.drop_table('audit_logs_partitioned')
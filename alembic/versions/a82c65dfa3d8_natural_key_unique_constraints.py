@@ -0,0 +1,47 @@
+"""natural key unique constraints
+
+Revision ID: a82c65dfa3d8
+Revises: 81161f9fe64b
+Create Date: 2026-10-19 11:02:17.204631
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a82c65dfa3d8'
+down_revision: Union[str, Sequence[str], None] = '81161f9fe64b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# targets for INSERT ... ON CONFLICT and the index behind every membership lookup
+CONSTRAINTS = [
+    ('uq_user_tenants_user_id_tenant_id', 'user_tenants', ['user_id', 'tenant_id']),
+    ('uq_roles_tenant_id_name', 'roles', ['tenant_id', 'name']),
+    ('uq_role_permissions_role_id_permission_id', 'role_permissions', ['role_id', 'permission_id']),
+    ('uq_user_roles_usertenant_id_role_id', 'user_roles', ['usertenant_id', 'role_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # link tables may hold duplicates from earlier seeding; keep one row per key
+    op.execute(
+        'DELETE FROM role_permissions a USING role_permissions b '
+        'WHERE a.role_id = b.role_id AND a.permission_id = b.permission_id AND a.id > b.id'
+    )
+    op.execute(
+        'DELETE FROM user_roles a USING user_roles b '
+        'WHERE a.usertenant_id = b.usertenant_id AND a.role_id = b.role_id AND a.id > b.id'
+    )
+    for name, table, columns in CONSTRAINTS:
+        op.create_unique_constraint(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(CONSTRAINTS):
+        op.drop_constraint(name, table, type_='unique')
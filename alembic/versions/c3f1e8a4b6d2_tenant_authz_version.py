@@ -0,0 +1,29 @@
+"""tenants.authz_version column
+
+Revision ID: c3f1e8a4b6d2
+Revises: a82c65dfa3d8
+Create Date: 2026-10-19 17:42:08.511903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1e8a4b6d2'
+down_revision: Union[str, Sequence[str], None] = 'a82c65dfa3d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # server default so existing rows and COPY-loaded datasets start at version 0
+    op.add_column('tenants', sa.Column('authz_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tenants', 'authz_version')
@@ -0,0 +1,46 @@
+"""offboarding_jobs, indexes for per-tenant purges
+
+Revision ID: e5b8c2d7f3a9
+Revises: d4a7b9e2c1f5
+Create Date: 2026-10-19 23:05:12.640195
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8c2d7f3a9'
+down_revision: Union[str, Sequence[str], None] = 'd4a7b9e2c1f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('offboarding_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('tenant_id', sa.UUID(), nullable=False),
+    sa.Column('subdomain', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('progress', sa.JSON(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_offboarding_jobs_tenant_id'), 'offboarding_jobs', ['tenant_id'], unique=False)
+    # offboarding deletes a tenant's rows through these in keyset batches
+    op.create_index('ix_user_tenants_tenant_id_id', 'user_tenants', ['tenant_id', 'id'], unique=False)
+    op.create_index(op.f('ix_refresh_tokens_user_tenant_id'), 'refresh_tokens', ['user_tenant_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_refresh_tokens_user_tenant_id'), table_name='refresh_tokens')
+    op.drop_index('ix_user_tenants_tenant_id_id', table_name='user_tenants')
+    op.drop_index(op.f('ix_offboarding_jobs_tenant_id'), table_name='offboarding_jobs')
+    op.drop_table('offboarding_jobs')
@@ -0,0 +1,42 @@
+"""tenant_invitations
+
+Revision ID: f1c6a9d3e8b4
+Revises: e5b8c2d7f3a9
+Create Date: 2026-10-20 10:42:18.305561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6a9d3e8b4'
+down_revision: Union[str, Sequence[str], None] = 'e5b8c2d7f3a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tenant_invitations',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('tenant_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('role_ids', sa.JSON(), nullable=False),
+    sa.Column('token_hash', sa.String(), nullable=False),
+    sa.Column('sets_password', sa.Boolean(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tenant_id', 'user_id', name='uq_tenant_invitations_tenant_id_user_id'),
+    sa.UniqueConstraint('token_hash')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('tenant_invitations')
@@ -12,6 +12,80 @@ class Settings(BaseSettings):
     DEFAULT_DEV_TENANT: str = "public"
     PROD_ENV: str = "prod"
 
+    # logging
+    LOG_CONFIGURE: bool = True  # false: leave logging to the host (e.g. a uvicorn --log-config)
+    LOG_FORMAT: str = "json"  # json | text
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: dict[str, str] = {}  # per logger, e.g. {"sqlalchemy.engine": "INFO", "app.services.auth": "DEBUG"}
+    LOG_SAMPLE_RATES: dict[str, float] = {"tenant.resolved": 0.01}  # event or logger name -> share kept below WARNING
+    LOG_QUEUE_SIZE: int = 10000
+    DB_ECHO: bool = False  # SQLAlchemy's echo writes straight to stdout; prefer LOG_LEVELS={"sqlalchemy.engine": "INFO"}
+
+    # audit pipeline
+    AUDIT_QUEUE_MAXSIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_MS: int = 200
+    AUDIT_OVERFLOW_POLICY: str = "drop_newest"  # block | drop_newest | drop_oldest
+    AUDIT_BLOCK_TIMEOUT_MS: int = 50
+    AUDIT_PARTITIONS_AHEAD: int = 3
+    AUDIT_RETENTION_MONTHS: int = 12
+
+    # request phase timing
+    SERVER_TIMING: str = "off"  # off | header | on
+    SERVER_TIMING_HEADER: str = "X-Server-Timing"
+
+    # SQL statement stats
+    QUERY_STATS: bool = True
+    QUERY_COUNT_WARN: int = 20
+    QUERY_REPEAT_THRESHOLD: int = 5  # same statement this often in one request -> likely N+1
+    SLOW_QUERY_MS: int = 200
+    SLOW_QUERY_EXPLAIN: bool = True
+
+    # /metrics
+    METRICS_ENABLED: bool = False  # off unless asked for: /metrics answers on every host
+    METRICS_TOKEN: str = ""  # when set, scrapes must send Authorization: Bearer <token>
+    METRICS_TENANT_TIERS: dict[str, str] = {}  # subdomain -> tier label, e.g. {"acme": "enterprise"}
+    METRICS_DEFAULT_TIER: str = "standard"
+
+    # startup warmup; /ready answers 503 until it is done
+    WARMUP: bool = True
+    WARMUP_CONNECTIONS: int = 5  # pool connections opened up front (capped at the pool size)
+    WARMUP_TIMEOUT: float = 30.0  # seconds; past this the worker is marked ready cold
+
+    # API keys
+    API_KEY_SECRET: str = ""  # HMAC key for stored key hashes; empty = SECRET_KEY (rotating it then invalidates all keys)
+    API_KEY_CACHE_TTL: int = 60  # seconds; also how long a revocation takes to reach other workers
+    API_KEY_CACHE_SIZE: int = 10000
+
+    BCRYPT_WORKERS: int = 0  # threads for password hashing; 0 = one per CPU
+
+    # POST /api/users/bulk
+    BULK_USERS_MAX_ROWS: int = 50000
+    BULK_USERS_MAX_BYTES: int = 16 * 1024 * 1024  # upload size, enforced while it is read
+    BULK_HASH_WORKERS: int = 0  # threads hashing an upload's passwords, apart from the login pool; 0 = one per CPU
+    INVITE_EXPIRE_HOURS: int = 72  # lifetime of invite tokens for rows without a password
+
+    # tenant offboarding (scripts/offboard_tenant.py)
+    OFFBOARD_BATCH_SIZE: int = 1000  # rows deleted per transaction
+    OFFBOARD_PAUSE_MS: int = 50  # sleep between batches, so replicas and other writers keep up
+
+    # conditional GET
+    RESPONSE_CACHE_TTL: int = 300  # seconds
+    RESPONSE_CACHE_SIZE: int = 50000
+
+    # /api/tenant/branding
+    BRANDING_CACHE_TTL: int = 3600  # seconds; entries are keyed by updated_at, this only bounds staleness of raw SQL edits
+    BRANDING_CACHE_SIZE: int = 10000
+    BRANDING_MAX_AGE: int = 300  # Cache-Control max-age of the unversioned URL
+
+    # tracing
+    TRACING: bool = False
+    TRACE_SAMPLE_RATE: float = 0.01  # share of requests without a sampled traceparent that are traced
+    TRACE_RESPECT_PARENT: bool = True  # an incoming traceparent's sampled flag wins over the rate
+    TRACE_EXPORTER: str = "memory"  # memory | jsonl
+    TRACE_FILE: str = "traces.jsonl"
+    TRACE_MEMORY_LIMIT: int = 1000
+
     class Config:
         env_file = str(Path(__file__).resolve().parent.parent / ".env")
         extra = "ignore"
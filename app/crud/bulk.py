@@ -0,0 +1,119 @@
+import json
+from datetime import datetime, timezone
+from typing import Iterable, Sequence
+from sqlalchemy import JSON, DateTime, Table, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_BATCH_SIZE = 5000
+
+_with_time_zone: dict[str, dict[str, bool]] = {}
+
+
+def chunked(rows: Iterable, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def select_in(db: AsyncSession, columns, key_col, keys: Sequence, batch_size: int = DEFAULT_BATCH_SIZE, *criteria) -> list:
+    # `key_col IN (...)` in batches, so the bind parameter count stays bounded
+    rows = []
+    for batch in chunked(keys, batch_size):
+        result = await db.execute(select(*columns).where(key_col.in_(batch), *criteria))
+        rows.extend(result.all())
+    return rows
+
+
+async def copy_records(db: AsyncSession, table: Table, columns: Sequence[str], records: list[tuple]) -> int:
+    # COPY is only available through asyncpg; everything else gets one executemany INSERT
+    if not records:
+        return 0
+
+    conn = await db.connection()
+    if conn.dialect.driver == "asyncpg":
+        json_cols = [i for i, name in enumerate(columns) if isinstance(table.c[name].type, JSON)]
+        if json_cols:
+            records = [_encode_json(record, json_cols) for record in records]
+
+        raw = await conn.get_raw_connection()
+        driver_conn = raw.driver_connection
+        time_cols = [i for i, name in enumerate(columns) if isinstance(table.c[name].type, DateTime)]
+        if time_cols:
+            zoned = await _timestamp_columns(driver_conn, table.name)
+            records = [_fit_timestamps(record, time_cols, [zoned.get(columns[i], True) for i in time_cols])
+                       for record in records]
+        # runs as a savepoint when the session already has a transaction open
+        async with driver_conn.transaction():
+            await driver_conn.copy_records_to_table(table.name, records=records, columns=list(columns))
+    else:
+        await conn.execute(insert(table), [dict(zip(columns, record)) for record in records])
+
+    return len(records)
+
+
+async def _timestamp_columns(driver_conn, table_name: str) -> dict[str, bool]:
+    # COPY skips SQLAlchemy's casts, and databases built by the first migration have plain
+    # `timestamp` columns where the models say timezone=True: values are fitted to the real type
+    if table_name not in _with_time_zone:
+        rows = await driver_conn.fetch(
+            "SELECT column_name, data_type FROM information_schema.columns"
+            " WHERE table_schema = current_schema() AND table_name = $1 AND data_type LIKE 'timestamp%'",
+            table_name,
+        )
+        _with_time_zone[table_name] = {row["column_name"]: row["data_type"] == "timestamp with time zone" for row in rows}
+    return _with_time_zone[table_name]
+
+
+def _fit_timestamps(record: tuple, time_cols: list[int], zoned: list[bool]) -> tuple:
+    # naive values are UTC, as in generate_dataset
+    values = list(record)
+    for i, with_zone in zip(time_cols, zoned):
+        value = values[i]
+        if isinstance(value, datetime):
+            if with_zone and value.tzinfo is None:
+                values[i] = value.replace(tzinfo=timezone.utc)
+            elif not with_zone and value.tzinfo is not None:
+                values[i] = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return tuple(values)
+
+
+def _encode_json(record: tuple, json_cols: list[int]) -> tuple:
+    values = list(record)
+    for i in json_cols:
+        if values[i] is not None:
+            values[i] = json.dumps(values[i])
+    return tuple(values)
+
+
+async def insert_ignore(
+    db: AsyncSession,
+    model,
+    rows: list[dict],
+    conflict_cols: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    # set-based INSERT ... ON CONFLICT DO NOTHING; returns how many rows were actually inserted
+    if not rows:
+        return 0
+
+    table = model.__table__
+    dialect = (await db.connection()).dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(table)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(table)
+    else:
+        raise NotImplementedError(f"insert_ignore is not supported on {dialect}")
+    stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_cols)).returning(table.c.id)
+
+    inserted = 0
+    for batch in chunked(rows, batch_size):
+        result = await db.execute(stmt, batch)
+        inserted += len(result.all())
+    return inserted
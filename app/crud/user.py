@@ -1,30 +1,104 @@
-from passlib.context import CryptContext
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 import hashlib
+import os
+import secrets
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_
 from sqlalchemy.future import select
 from app.models.users import User
 from app.models.user_roles import UserRole
 from app.models.roles import Role
 from app.models.user_tenants import UserTenant
+from app.models.role_permissions import RolePermission
+from app.models.permissions import Permission
+from app.models.tenants import Tenant
+from app.services.timing import timed
+from app.services import metrics, tracing
+from app.config import settings
 
-pwd_context = CryptContext(schemes=['bcrypt_sha256'], deprecated='auto')
+@functools.cache
+def password_context():
+    # built on first use: passlib and its handler setup stay off the import path (cold start)
+    from passlib.context import CryptContext
+    return CryptContext(schemes=['bcrypt_sha256'], deprecated='auto')
 
 # --- Password helpers ---
+@timed("bcrypt")
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_context().hash(password)
 
+@timed("bcrypt")
 def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+    return password_context().verify(password, password_hash)
+
+def hash_passwords(passwords: list[str], workers: Optional[int] = None) -> list[str]:
+    # bcrypt releases the GIL, so threads hash on all cores without process start-up cost
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(passwords) < 2:
+        return [hash_password(p) for p in passwords]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash") as pool:
+        return list(pool.map(hash_password, passwords))
+
+# bcrypt costs ~300ms of CPU; run on the event loop it stalls every other request on the
+# worker. Request paths use the async variants, which queue the work on a dedicated pool.
+_bcrypt_pool: Optional[ThreadPoolExecutor] = None
+
+def _bcrypt_executor() -> ThreadPoolExecutor:
+    global _bcrypt_pool
+    if _bcrypt_pool is None:
+        workers = settings.BCRYPT_WORKERS or os.cpu_count() or 1
+        _bcrypt_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+    return _bcrypt_pool
+
+async def _run_bcrypt(operation: str, func, *args):
+    # queue depth and timings are updated here, on the loop, never from the pool threads
+    metrics.bcrypt_queue_depth.inc()
+    started = time.perf_counter()
+    try:
+        with tracing.span(f"bcrypt.{operation}"):
+            return await asyncio.get_running_loop().run_in_executor(_bcrypt_executor(), func, *args)
+    finally:
+        metrics.bcrypt_queue_depth.dec()
+        metrics.bcrypt_seconds.observe(time.perf_counter() - started, operation)
+
+@timed("bcrypt")
+async def hash_password_async(password: str) -> str:
+    return await _run_bcrypt("hash", password_context().hash, password)
+
+async def warm_up_bcrypt():
+    # loads passlib's bcrypt backend and starts a pool thread before the first login needs them
+    await _run_bcrypt("warmup", password_context().dummy_verify)
+
+_invite_hash: Optional[str] = None
+
+async def invite_hash() -> str:
+    # Password hash for invited accounts, shared by all of them: of a random secret nobody
+    # keeps, so it never matches. Computed once per process instead of a bcrypt per invite.
+    global _invite_hash
+    if _invite_hash is None:
+        _invite_hash = await hash_password_async(secrets.token_urlsafe(32))
+    return _invite_hash
+
+@timed("bcrypt")
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    return await _run_bcrypt("verify", password_context().verify, password, password_hash)
 
 # --- Queries ---
+@timed("user")
 async def get_user_by_email(db: AsyncSession, email: str):
     result = await db.execute(select(User).where(User.email == email))
     return result.scalars().first()
 
+@timed("user")
 async def get_user_by_id(db: AsyncSession, user_id):
     result = await db.execute(select(User).where(User.id == user_id))
     return result.scalars().first()
 
+@timed("rbac")
 async def get_user_roles(db: AsyncSession, user_id, tenant_id):
     result = await db.execute(
         select(Role.name)
@@ -35,12 +109,61 @@ async def get_user_roles(db: AsyncSession, user_id, tenant_id):
     roles = [row[0] for row in result.all()]
     return roles
 
+@timed("user")
+async def get_user_session_data(db: AsyncSession, email: str, tenant_id):
+    """
+    User, membership, roles and permissions in the tenant from one statement, for session
+    bootstrap: (user, user_tenant_id, roles, permissions), or None for an unknown email.
+    user_tenant_id is None when the user is not a member of the tenant.
+
+    One row per (role, permission) pair; outer joins keep the user row when there is no
+    membership, role or permission.
+    """
+    result = await db.execute(
+        select(User, UserTenant.id, Role.name, Permission.name)
+        .outerjoin(UserTenant, and_(UserTenant.user_id == User.id, UserTenant.tenant_id == tenant_id))
+        .outerjoin(UserRole, UserRole.usertenant_id == UserTenant.id)
+        .outerjoin(Role, Role.id == UserRole.role_id)
+        .outerjoin(RolePermission, RolePermission.role_id == Role.id)
+        .outerjoin(Permission, Permission.id == RolePermission.permission_id)
+        .where(User.email == email)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    roles, permissions = {}, {}  # dicts: de-duplicated, first-seen order
+    for _, _, role_name, permission_name in rows:
+        if role_name is not None:
+            roles[role_name] = None
+        if permission_name is not None:
+            permissions[permission_name] = None
+    return rows[0][0], rows[0][1], list(roles), sorted(permissions)
+
+@timed("rbac")
+async def get_membership_by_subdomain(db: AsyncSession, user_id, subdomain: str):
+    """
+    (tenant, user_tenant_id, roles) for a user in the tenant with this subdomain, or None when
+    there is no such tenant, it is disabled (e.g. being offboarded) or the user is not a member.
+    One statement, served by the unique indexes on tenants.subdomain and user_tenants (user_id, tenant_id).
+    """
+    result = await db.execute(
+        select(Tenant, UserTenant.id, Role.name)
+        .join(UserTenant, and_(UserTenant.tenant_id == Tenant.id, UserTenant.user_id == user_id))
+        .outerjoin(UserRole, UserRole.usertenant_id == UserTenant.id)
+        .outerjoin(Role, Role.id == UserRole.role_id)
+        .where(Tenant.subdomain == subdomain, Tenant.status.is_(True))
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    return rows[0][0], rows[0][1], [role_name for _, _, role_name in rows if role_name is not None]
+
 # --- Authentication ---
 async def authenticate_user(db: AsyncSession, email: str, password: str):
     user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None
     return user
 
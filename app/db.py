@@ -1,9 +1,13 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.services import query_stats, metrics, tracing
 
 
-engine = create_async_engine(settings.DB_URL, echo=True, future=True)
+engine = create_async_engine(settings.DB_URL, echo=settings.DB_ECHO, future=True, poolclass=metrics.TimedQueuePool)
+query_stats.install(engine)
+tracing.install(engine)
+metrics.instrument_pool(engine)
 
 AsyncLocalSession = sessionmaker(
     bind= engine,
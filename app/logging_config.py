@@ -0,0 +1,145 @@
+import json
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from app.config import settings
+from app.services import tracing
+
+# Logging for the request path: records are queued by a non-blocking handler and
+# formatted and written by a QueueListener thread, so the event loop never waits on
+# stdout. Messages stay lazy ("%s" args): the string is built in the listener thread,
+# and not at all for records below the logger's level or dropped by sampling.
+#
+# Pass only immutable values (str, int, UUID) as log args, since they are rendered
+# later on another thread.
+
+# attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "trace_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        elif record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        trace_id = getattr(record, "trace_id", None)
+        return f"{line} trace_id={trace_id}" if trace_id else line
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of high-volume records below WARNING.
+
+    Rates are keyed by the record's `event` extra when it has one, else by logger name:
+    LOG_SAMPLE_RATES={"tenant.resolved": 0.01} keeps 1 in 100 "Tenant resolved" lines.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rates.get(getattr(record, "event", None) or record.name)
+        if rate is None or rate >= 1.0:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The base class formats the message here, on the caller's thread. Only capture what
+        # cannot be read later: the trace id lives in a ContextVar, and the traceback must
+        # be rendered before its frames change.
+        span = tracing.current_span()
+        record.trace_id = span.trace.trace_id if span is not None else None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _State:
+    listener: Optional[QueueListener] = None
+    handler: Optional[NonBlockingQueueHandler] = None
+
+
+def configure_logging(force: bool = False) -> Optional[NonBlockingQueueHandler]:
+    """Install the queue handler on the root logger and start the writer thread (idempotent)."""
+    if not settings.LOG_CONFIGURE:
+        return None
+    if _State.listener is not None and not force:
+        return _State.handler
+    shutdown_logging()
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _State.listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _State.listener.start()
+    _State.handler = handler
+    return handler
+
+
+def shutdown_logging():
+    # QueueListener.stop() drains what is queued before returning
+    if _State.listener is not None:
+        _State.listener.stop()
+        _State.listener = None
+    if _State.handler is not None:
+        logging.getLogger().removeHandler(_State.handler)
+        _State.handler = None
+
+
+def dropped_records() -> int:
+    return _State.handler.dropped if _State.handler is not None else 0
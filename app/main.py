@@ -1,10 +1,43 @@
-from fastapi import FastAPI
+import asyncio
+import hmac
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import auth, tenant, permission_check
+from app.routers import auth, tenant, permission_check, audit_logs, api_keys, users, rbac
 from app.middleware.tenant_middleware import TenantMiddleware  
+from app.middleware.server_timing import ServerTimingMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.tracing import TracingMiddleware
+from app.services.audit import audit_writer
+from app.services import metrics, warmup
+from app.config import settings
+from app.responses import FastJSONResponse, FastJSONRoute
+from app.logging_config import configure_logging, dropped_records, shutdown_logging
 
-app = FastAPI(title="Full SaaS Project")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+    await audit_writer.start()
+    # in the background, so liveness answers while the worker warms up; /ready waits for it
+    if settings.WARMUP:
+        warmup_task = asyncio.create_task(warmup.run(), name="warmup")
+    else:
+        warmup_task = None
+        warmup.state.ready = True
+    yield
+    warmup.state.ready = False  # draining: take the worker out of rotation first
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    # drain buffered audit events before the worker exits
+    await audit_writer.stop()
+    shutdown_logging()
+
+
+app = FastAPI(title="Full SaaS Project", lifespan=lifespan)
+app.router.route_class = FastJSONRoute  # before any route is declared, see FastJSONRoute
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,13 +48,50 @@ app.add_middleware(
 )
 
 app.add_middleware(TenantMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
+# added last = outermost, so tenant resolution is inside the timed span
+app.add_middleware(ServerTimingMiddleware)
 
 
 app.include_router(auth.router)
 app.include_router(tenant.router)
 app.include_router(permission_check.router) 
+app.include_router(audit_logs.router)
+app.include_router(api_keys.router)
+app.include_router(users.router)
+app.include_router(rbac.router)
+
+
+metrics.registry.callback("audit_queue_depth", "Audit events waiting to be written.", audit_writer.queue.qsize)
+metrics.registry.callback("audit_events_written_total", "Audit events written.", lambda: audit_writer.written, kind="counter")
+metrics.registry.callback("audit_events_dropped_total", "Audit events dropped by the overflow policy.", lambda: audit_writer.dropped, kind="counter")
+metrics.registry.callback("audit_events_failed_total", "Audit events lost to failed batch writes.", lambda: audit_writer.failed, kind="counter")
+metrics.registry.callback("app_ready", "1 once warmup has finished and the worker takes traffic.", lambda: int(warmup.state.ready))
+metrics.registry.callback("log_records_dropped_total", "Log records dropped because the log queue was full.", dropped_records, kind="counter")
 
 
 @app.get("/")
 async def root(): 
-    return {"status": "ok", "message": "API is running"}
\ No newline at end of file
+    return {"status": "ok", "message": "API is running"}
+
+
+@app.get("/ready", include_in_schema=False)
+async def readiness():
+    # for load balancer readiness probes; "/" stays the liveness check
+    if not warmup.state.ready:
+        return FastJSONResponse({"status": "warming_up", "warmup": warmup.state.as_dict()}, status_code=503)
+    return {"status": "ready", "warmup": warmup.state.as_dict()}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get("authorization", "").encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+    ):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
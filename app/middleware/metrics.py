@@ -0,0 +1,42 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.services import metrics
+
+
+class MetricsMiddleware:
+    """
+    Request count, latency and in-flight gauge for /metrics.
+
+    Latency is labelled with the route template (never the raw path) and the tenant's tier,
+    so label cardinality stays bounded by the number of routes x tiers.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.http_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.http_in_progress.dec()
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            tenant = scope.get("state", {}).get("tenant")
+            method = scope["method"]
+            metrics.http_requests.inc(method, route, str(status_code))
+            metrics.http_request_seconds.observe(
+                time.perf_counter() - started, method, route, metrics.tenant_tier(tenant)
+            )
@@ -0,0 +1,43 @@
+import logging
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config import settings
+from app.db import engine
+from app.services import query_stats
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """
+    Counts statements and DB time per request, tagged with route and tenant.
+
+    Logs requests over QUERY_COUNT_WARN statements or with a statement repeated
+    QUERY_REPEAT_THRESHOLD times (likely N+1), and EXPLAINs statements slower than
+    SLOW_QUERY_MS once the response has been sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.QUERY_STATS:
+            await self.app(scope, receive, send)
+            return
+
+        with query_stats.capture_queries() as stats:
+            await self.app(scope, receive, send)
+
+        route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+        tenant = getattr(scope.get("state", {}).get("tenant"), "subdomain", None)
+        query_stats.request_statements.observe(stats.count)
+        query_stats.route_query_stats.record(scope["method"], route, stats)
+
+        repeated = stats.repeated()
+        if stats.count > settings.QUERY_COUNT_WARN or repeated:
+            logger.warning(
+                "%s %s tenant=%s ran %d statements in %.1f ms%s",
+                scope["method"], route, tenant, stats.count, stats.total * 1000,
+                "".join(f"\n  repeated {n}x: {query_stats.shorten(stmt)}" for stmt, n in repeated),
+            )
+        if stats.slow:
+            await query_stats.explain_slow_queries(engine, stats, route, tenant)
@@ -0,0 +1,61 @@
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.services.timing import end_request, route_stats, start_request
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header with the per-phase breakdown of the request.
+
+    SERVER_TIMING=off     never time (default)
+    SERVER_TIMING=header  time requests that send the opt-in header (X-Server-Timing: 1)
+    SERVER_TIMING=on      time every request
+
+    Pure ASGI rather than BaseHTTPMiddleware, so the untimed path adds no extra task or
+    response wrapping. Must be the outermost middleware to include tenant resolution.
+    """
+
+    def __init__(self, app: ASGIApp, mode: str = None, opt_in_header: str = None):
+        self.app = app
+        self.mode = mode
+        self.opt_in_header = opt_in_header
+
+    def _wants_timing(self, scope: Scope) -> bool:
+        # settings are read per request so the mode can be flipped without rebuilding the app
+        mode = self.mode or settings.SERVER_TIMING
+        if mode == "on":
+            return True
+        if mode == "header":
+            opt_in = (self.opt_in_header or settings.SERVER_TIMING_HEADER).lower().encode()
+            for name, value in scope["headers"]:
+                if name == opt_in:
+                    return value not in (b"0", b"false", b"")
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._wants_timing(scope):
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = start_request()
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - timings.started
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.server_timing(total))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request(token)
+            route = scope.get("route")
+            route_stats.record(
+                scope["method"],
+                getattr(route, "path", None) or "<unmatched>",
+                timings,
+                time.perf_counter() - timings.started,
+            )
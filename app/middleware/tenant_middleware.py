@@ -1,50 +1,54 @@
 import logging
 from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi import Request, HTTPException
-from sqlalchemy.future import select
+from fastapi.responses import JSONResponse
 from app.db import AsyncLocalSession
-from app.models.tenants import Tenant
-from app.config import settings
+from app.services.tenant import parse_host, get_tenant_by_host
+from app.services.timing import phase
+from app.services.tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
+# served on any host (scrapers and probes address the pod, not a tenant)
+TENANT_EXEMPT_PATHS = {"/metrics", "/ready"}
+
 class TenantMiddleware(BaseHTTPMiddleware):
+    @traced("TenantMiddleware.dispatch")
     async def dispatch(self, request: Request, call_next):
+        if request.url.path in TENANT_EXEMPT_PATHS:
+            request.state.tenant = None
+            return await call_next(request)
+
         host = request.headers.get("host")
         if not host:
             logger.warning("Missing Host header")
-            raise HTTPException(status_code=400, detail="Missing Host header")
-
-        hostname = host.split(":")[0]  # strip port
-        subdomain = None
+            return JSONResponse(status_code=400, content={"detail": "Missing Host header"})
 
         try:
-            if settings.PROD_ENV == "prod" and hostname in ["localhost", "127.0.0.1"]:
-                subdomain = settings.DEFAULT_DEV_TENANT or "public"
-                logger.debug(f"DEV fallback tenant={subdomain}, hostname={hostname}")
-            else:
-                parts = hostname.split(".")
-                if len(parts) < 3:
-                    logger.warning(f"Invalid host format: {hostname}")
-                    raise HTTPException(status_code=400, detail="Invalid host format")
-                subdomain = parts[0]
-
-            async with AsyncLocalSession() as db:
-                result = await db.execute(
-                    select(Tenant).where(
-                        (Tenant.subdomain == subdomain) | (Tenant.custom_domain == hostname)
-                    )
-                )
-                tenant = result.scalars().first()
+            hostname, subdomain = parse_host(host)
+            logger.debug("Parsed host: tenant=%s, hostname=%s", subdomain, hostname)
+
+            with phase("tenant"), span("tenant.lookup", subdomain=subdomain):
+                async with AsyncLocalSession() as db:
+                    tenant = await get_tenant_by_host(db, subdomain, hostname)
 
             if not tenant:
-                logger.error(f"No tenant found for subdomain={subdomain}, host={hostname}")
+                logger.info("No tenant found for subdomain=%s, host=%s", subdomain, hostname)
                 raise HTTPException(status_code=404, detail="Tenant not found")
+            if not tenant.status:
+                # disabled, e.g. while being offboarded: read per request, so every worker agrees at once
+                raise HTTPException(status_code=403, detail="Tenant is disabled")
 
             request.state.tenant = tenant
-            logger.info(f"Tenant resolved: {tenant.name} ({tenant.subdomain})")
+            # one line per request: sampled via LOG_SAMPLE_RATES["tenant.resolved"]
+            logger.info("Tenant resolved: %s (%s)", tenant.name, tenant.subdomain, extra={"event": "tenant.resolved"})
 
-        except Exception as e:
+        except HTTPException as e:
+            # Raised here, outside FastAPI's exception handlers, it would surface as a 500 plus a
+            # server-side traceback per request; answer the client error directly instead.
+            request.state.tenant = None
+            return JSONResponse(status_code=e.status_code, content={"detail": e.detail})
+        except Exception:
             request.state.tenant = None
             logger.exception("Tenant resolution failed")
             raise
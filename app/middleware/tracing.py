@@ -0,0 +1,57 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.services import tracing
+
+
+class TracingMiddleware:
+    """
+    Opens the root span of a sampled request and exports the trace when it completes.
+
+    The incoming `traceparent` header is continued; sampled responses carry the trace id
+    in `X-Trace-Id` so it can be looked up with scripts/trace_viewer.py.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.TRACING:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        root, token = tracing.start_trace(
+            f"{scope['method']} {scope['path']}", traceparent,
+            {"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_trace_id(message: Message):
+            if message["type"] == "http.response.start":
+                root.set("http.status_code", message["status"])
+                MutableHeaders(scope=message).append("X-Trace-Id", root.trace.trace_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except Exception as exc:
+            root.error = type(exc).__name__
+            raise
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                # the template, so traces of one endpoint group together in the viewer
+                root.name = f"{scope['method']} {route}"
+                root.set("http.route", route)
+            tenant = scope.get("state", {}).get("tenant")
+            if tenant is not None:
+                root.set("tenant", tenant.subdomain)
+            tracing.end_trace(root, token)
@@ -8,4 +8,7 @@ from .role_permissions import RolePermission
 from .refresh_tokens import RefreshToken
 from .audit_logs import AuditLog
 from .password_reset import PasswordReset
+from .api_keys import ApiKey, ApiKeyPermission
+from .offboarding_jobs import OffboardingJob
+from .tenant_invitations import TenantInvitation
 from .base import Base  # Ensure Base is imported for Alembic
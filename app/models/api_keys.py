@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Boolean, DateTime, String, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+from .base import Base
+
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    name = Column(String, nullable=False)
+    # public part of the key, "ak_<prefix>_<secret>"; the lookup key
+    prefix = Column(String, nullable=False, unique=True)
+    # HMAC-SHA256 of the secret part (app/services/api_keys.py), never the secret itself
+    key_hash = Column(String, nullable=False)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    revoked = Column(Boolean, nullable=False, default=False)
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    tenant = relationship("Tenant", backref="api_keys")
+
+
+class ApiKeyPermission(Base):
+    # an API key's scopes are Permission rows, so keys pass the same requires_permission checks as users
+    __tablename__ = "api_key_permissions"
+
+    __table_args__ = (UniqueConstraint("api_key_id", "permission_id", name="uq_api_key_permissions_api_key_id_permission_id"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    api_key_id = Column(UUID(as_uuid=True), ForeignKey("api_keys.id", ondelete="CASCADE"), nullable=False)
+    permission_id = Column(UUID(as_uuid=True), ForeignKey("permissions.id"), nullable=False)
+
+    api_key = relationship("ApiKey", backref="permissions")
+    permission = relationship("Permission")
@@ -1,10 +1,19 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Index, DDL, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from .base import Base
 
 class AuditLog(Base):
+    __tablename__ = "audit_logs"
+
+    # monthly range partitions on created_at, see app/services/audit_partitions.py
+    __table_args__ = (
+        Index("ix_audit_logs_tenant_id_created_at", "tenant_id", "created_at"),
+        Index("ix_audit_logs_created_at_brin", "created_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
     id = Column(UUID(as_uuid=True), primary_key=True)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
@@ -12,7 +21,16 @@ class AuditLog(Base):
     entity = Column(String, nullable=True)          
     entity_id = Column(UUID(as_uuid=True), nullable=True) 
     meta_data = Column(JSON, nullable=True)          
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
+    # part of the primary key because postgres requires the partition key in every unique index
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=lambda: datetime.now(timezone.utc))
 
     tenant = relationship("Tenant", backref="audit_logs")
     user = relationship("User", backref="audit_logs")
+
+
+# create_all() (tests, benchmarks) gets a catch-all partition so inserts work without maintenance
+event.listen(
+    AuditLog.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT").execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, DateTime, JSON, String
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime, timezone
+from .base import Base
+
+class OffboardingJob(Base):
+    __tablename__ = "offboarding_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    # no foreign key: the tenant row is the last thing the job deletes
+    tenant_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    subdomain = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="running")  # running | done | failed
+    # per table: {"deleted": n, "done": bool, "last": keyset position}; committed with each batch
+    progress = Column(JSON, nullable=False, default=dict)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -4,6 +4,8 @@ from datetime import datetime, timezone
 from .base import Base
 
 class PasswordReset(Base):
+    __tablename__ = "password_resets"
+
     id = Column(UUID(as_uuid=True), primary_key=True)
     user_id = Column(UUID(as_uuid=True), nullable=False)
     token = Column(String, nullable=False, unique=True)
@@ -4,6 +4,8 @@ from datetime import datetime, timezone
 from .base import Base
 
 class Permission(Base):
+    __tablename__ = "permissions"
+
     id = Column(UUID(as_uuid=True), primary_key=True)
     name = Column(String, nullable=False, unique=True)  
     description = Column(String, nullable=True)
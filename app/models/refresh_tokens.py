@@ -5,8 +5,10 @@ from datetime import datetime, timezone
 from .base import Base
 
 class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
     id = Column(UUID(as_uuid=True), primary_key=True)
-    user_tenant_id = Column(UUID(as_uuid=True), ForeignKey("user_tenants.id"), nullable=False)
+    user_tenant_id = Column(UUID(as_uuid=True), ForeignKey("user_tenants.id"), nullable=False, index=True)
     jti = Column(String, nullable=False, unique=True)  
     revoked = Column(Boolean, default=False)          
     expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, ForeignKey
+from sqlalchemy import Column, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
 
 class RolePermission(Base):
+    __tablename__ = "role_permissions"
+
+    __table_args__ = (UniqueConstraint("role_id", "permission_id", name="uq_role_permissions_role_id_permission_id"),)
+
     id = Column(UUID(as_uuid=True), primary_key=True)
     role_id = Column(UUID(as_uuid=True), ForeignKey("roles.id"), nullable=False)
     permission_id = Column(UUID(as_uuid=True), ForeignKey("permissions.id"), nullable=False)
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from .base import Base
 
 class Role(Base):
+    __tablename__ = "roles"
+
+    __table_args__ = (UniqueConstraint("tenant_id", "name", name="uq_roles_tenant_id_name"),)
+
     id = Column(UUID(as_uuid=True), primary_key=True)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"))
     name = Column(String, nullable=False)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Boolean, DateTime, ForeignKey, JSON, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime, timezone
+from .base import Base
+
+class TenantInvitation(Base):
+    # a pending membership from POST /api/users/bulk: nothing is granted until the user accepts it
+    __tablename__ = "tenant_invitations"
+
+    __table_args__ = (UniqueConstraint("tenant_id", "user_id", name="uq_tenant_invitations_tenant_id_user_id"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    role_ids = Column(JSON, nullable=False, default=list)  # granted on acceptance, if the roles still exist
+    # HMAC-SHA256 of the token (app/services/api_keys.py), never the token itself
+    token_hash = Column(String, nullable=False, unique=True)
+    # the invitation created the account without a password: accepting it sets the first one
+    sets_password = Column(Boolean, nullable=False, default=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
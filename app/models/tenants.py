@@ -1,15 +1,22 @@
-from sqlalchemy import Column, String, Boolean, DateTime, JSON
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, JSON
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import deferred
 from datetime import datetime, timezone
 from .base import Base
 
 class Tenant(Base):
+    __tablename__ = "tenants"
+
     id = Column(UUID(as_uuid=True), primary_key=True)
     name = Column(String, nullable=False)
     subdomain = Column(String, unique=True, nullable=False)
     code = Column(String, unique=True, nullable=False)
     status = Column(Boolean, default=True)
     custom_domain = Column(String, nullable=True)
-    branding = Column(JSON, nullable=True)
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
\ No newline at end of file
+    # only read by /api/tenant/branding; deferred so tenant lookups on the hot path skip it
+    branding = deferred(Column(JSON, nullable=True))
+    # bumped with every membership/role/permission change in the tenant; part of response ETags
+    authz_version = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    # callables, evaluated per write: the branding cache is keyed by updated_at
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
\ No newline at end of file
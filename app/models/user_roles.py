@@ -1,9 +1,13 @@
-from sqlalchemy import Column, ForeignKey
+from sqlalchemy import Column, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
 
 class UserRole(Base):
+    __tablename__ = "user_roles"
+
+    __table_args__ = (UniqueConstraint("usertenant_id", "role_id", name="uq_user_roles_usertenant_id_role_id"),)
+
     id = Column(UUID(as_uuid=True), primary_key=True)
     usertenant_id = Column(UUID(as_uuid=True), ForeignKey("user_tenants.id"), nullable=False)
     role_id = Column(UUID(as_uuid=True), ForeignKey("roles.id"), nullable=False)
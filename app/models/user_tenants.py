@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Boolean, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from .base import Base
 
 class UserTenant(Base):
+    __tablename__ = "user_tenants"
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "tenant_id", name="uq_user_tenants_user_id_tenant_id"),
+        # members of a tenant, in keyset order (offboarding purges, onboarding checks)
+        Index("ix_user_tenants_tenant_id_id", "tenant_id", "id"),
+    )
+
     id = Column(UUID(as_uuid=True), primary_key=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
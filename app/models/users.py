@@ -4,6 +4,8 @@ from datetime import datetime, timezone
 from .base import Base  
 
 class User(Base): 
+    __tablename__ = "users"
+
     id = Column(UUID(as_uuid=True), primary_key=True)
     email = Column(String, unique=True, nullable=False)
     password_hash = Column(String, nullable=False)
@@ -0,0 +1,88 @@
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from typing import Annotated, List
+from uuid import UUID
+from app.db import get_db
+from app.models.api_keys import ApiKey, ApiKeyPermission
+from app.models.permissions import Permission
+from app.responses import FastJSONRoute
+from app.schemas.api_keys import ApiKeyCreate, ApiKeyCreated, ApiKeyRead
+from app.services.api_keys import create_api_key, revoke_api_key
+from app.services.audit import audit_writer
+from app.services.rbac import role_checker
+
+
+router = APIRouter(prefix="/api/api-keys", tags=["api-keys"], route_class=FastJSONRoute)
+
+
+def _as_read(api_key: ApiKey, scopes: list[str]) -> dict:
+    return {
+        "id": api_key.id,
+        "name": api_key.name,
+        "prefix": api_key.prefix,
+        "scopes": scopes,
+        "revoked": api_key.revoked,
+        "expires_at": api_key.expires_at,
+        "created_at": api_key.created_at,
+    }
+
+
+@router.post("", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED)
+async def create_key(
+    request: Request,
+    payload: ApiKeyCreate,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    admin=Depends(role_checker("admin_tenant")),
+):
+    tenant = request.state.tenant
+    api_key, raw_key, scopes = await create_api_key(
+        db, tenant.id, payload.name, payload.scopes, UUID(admin["user_id"]), payload.expires_in_days,
+    )
+    await audit_writer.log(
+        "api_key.created", tenant.id, admin["user_id"], entity="api_key", entity_id=api_key.id,
+        metadata={"prefix": api_key.prefix, "scopes": scopes},
+    )
+    return {**_as_read(api_key, scopes), "key": raw_key}
+
+
+@router.get("", response_model=List[ApiKeyRead])
+async def list_keys(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _=Depends(role_checker("admin_tenant")),
+):
+    tenant = request.state.tenant
+    result = await db.execute(
+        select(ApiKey, Permission.name)
+        .outerjoin(ApiKeyPermission, ApiKeyPermission.api_key_id == ApiKey.id)
+        .outerjoin(Permission, Permission.id == ApiKeyPermission.permission_id)
+        .where(ApiKey.tenant_id == tenant.id)
+        .order_by(ApiKey.created_at.desc())
+    )
+    keys, scopes = {}, defaultdict(list)
+    for api_key, scope in result.all():
+        keys[api_key.id] = api_key
+        if scope is not None:
+            scopes[api_key.id].append(scope)
+    return [_as_read(api_key, sorted(scopes[key_id])) for key_id, api_key in keys.items()]
+
+
+@router.delete("/{key_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_key(
+    key_id: UUID,
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    admin=Depends(role_checker("admin_tenant")),
+):
+    tenant = request.state.tenant
+    result = await db.execute(select(ApiKey).where(ApiKey.id == key_id, ApiKey.tenant_id == tenant.id))
+    api_key = result.scalars().first()
+    if api_key is None:
+        raise HTTPException(status_code=404, detail="API key not found")
+    await revoke_api_key(db, api_key)
+    await audit_writer.log(
+        "api_key.revoked", tenant.id, admin["user_id"], entity="api_key", entity_id=api_key.id,
+        metadata={"prefix": api_key.prefix},
+    )
@@ -0,0 +1,144 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import tuple_
+from sqlalchemy.future import select
+from typing import Annotated, Optional
+from datetime import datetime
+from uuid import UUID
+import base64
+import binascii
+from app.db import get_db
+from app.models.audit_logs import AuditLog
+from app.responses import FastJSONResponse, FastJSONRoute, dumps
+from app.schemas.audit_logs import AuditLogPage
+from app.services.rbac import role_checker
+
+
+router = APIRouter(prefix="/api/audit-logs", tags=["audit-logs"], route_class=FastJSONRoute)
+
+EXPORT_BATCH_SIZE = 1000
+
+AUDIT_COLUMNS = (
+    AuditLog.id,
+    AuditLog.tenant_id,
+    AuditLog.user_id,
+    AuditLog.action,
+    AuditLog.entity,
+    AuditLog.entity_id,
+    AuditLog.meta_data,
+    AuditLog.created_at,
+)
+
+
+def encode_cursor(created_at: datetime, log_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{log_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, log_id = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(log_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _filtered_query(
+    tenant_id: UUID,
+    action: Optional[str],
+    entity: Optional[str],
+    user_id: Optional[UUID],
+    since: Optional[datetime],
+    until: Optional[datetime],
+):
+    # newest first; (created_at, id) is the keyset and matches the (tenant_id, created_at) index
+    stmt = (
+        select(*AUDIT_COLUMNS)
+        .where(AuditLog.tenant_id == tenant_id)
+        .order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+    )
+    if action:
+        stmt = stmt.where(AuditLog.action == action)
+    if entity:
+        stmt = stmt.where(AuditLog.entity == entity)
+    if user_id:
+        stmt = stmt.where(AuditLog.user_id == user_id)
+    if since:
+        stmt = stmt.where(AuditLog.created_at >= since)
+    if until:
+        stmt = stmt.where(AuditLog.created_at < until)
+    return stmt
+
+
+def _as_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "tenant_id": row.tenant_id,
+        "user_id": row.user_id,
+        "action": row.action,
+        "entity": row.entity,
+        "entity_id": row.entity_id,
+        "metadata": row.meta_data,
+        "created_at": row.created_at,
+    }
+
+
+@router.get("", response_model=AuditLogPage)
+async def list_audit_logs(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _=Depends(role_checker("admin_tenant")),
+    action: Optional[str] = None,
+    entity: Optional[str] = None,
+    user_id: Optional[UUID] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    tenant = request.state.tenant
+    stmt = _filtered_query(tenant.id, action, entity, user_id, since, until)
+    if cursor:
+        created_at, log_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(created_at, log_id))
+
+    # one extra row tells us whether there is a next page
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    # rows come straight from our own query: skip re-validating up to 500 items against
+    # AuditLogPage (kept as response_model for the OpenAPI schema)
+    return FastJSONResponse({"items": [_as_dict(row) for row in rows], "next_cursor": next_cursor})
+
+
+@router.get("/export")
+async def export_audit_logs(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _=Depends(role_checker("admin_tenant")),
+    action: Optional[str] = None,
+    entity: Optional[str] = None,
+    user_id: Optional[UUID] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    tenant = request.state.tenant
+    stmt = _filtered_query(tenant.id, action, entity, user_id, since, until)
+
+    async def ndjson():
+        # server-side cursor: memory stays at one batch no matter how many rows match
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield b"".join(dumps(_as_dict(row)) + b"\n" for row in rows)
+
+    filename = f"audit-logs-{tenant.subdomain}.ndjson"
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
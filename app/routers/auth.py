@@ -5,10 +5,11 @@ from sqlalchemy.future import select
 from typing import Annotated
 from datetime import timedelta, datetime, timezone
 import uuid
-from app.schemas.auth import RefreshTokenSchema, TokenResponseSchema, ForgotPasswordSchema, ResetPasswordSchema
+from app.schemas.auth import RefreshTokenSchema, TokenResponseSchema, ForgotPasswordSchema, ResetPasswordSchema, AcceptInviteSchema, SessionRequestSchema, SessionResponseSchema, SessionTenantSchema, TenantSwitchSchema
 from app.services.auth import create_access_token, create_refresh_token, decode_access_token, generate_reset_token, verify_reset_token, reset_user_password, get_current_user
 from app.services.tenant import get_current_tenant
-from app.crud.user import authenticate_user, get_user_roles
+from app.services.audit import audit_writer
+from app.crud.user import authenticate_user, get_membership_by_subdomain, get_user_roles, get_user_session_data, verify_password_async
 from app.models.refresh_tokens import RefreshToken
 from app.models.user_tenants import UserTenant
 from app.models.roles import Role
@@ -19,9 +20,13 @@ from app.models.users import User
 from app.schemas.users import MeResponse
 from app.db import get_db
 from app.config import settings
+from app.responses import FastJSONRoute
+from app.services import metrics
+from app.services.cache import conditional_response, make_etag, response_cache
+from app.services.provisioning import accept_invitation
 
 
-router = APIRouter(prefix="/api/auth", tags=["auth"])
+router = APIRouter(prefix="/api/auth", tags=["auth"], route_class=FastJSONRoute)
 
 
 
@@ -39,6 +44,8 @@ async def login_for_access_token(
     # 2. authenticate
     user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
+        metrics.logins.inc("token", "invalid_credentials")
+        await audit_writer.log("auth.login_failed", tenant.id, metadata={"email": form_data.username, "via": "token"})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -53,6 +60,8 @@ async def login_for_access_token(
     )
     user_tenant = result.scalars().first()
     if not user_tenant:
+        metrics.logins.inc("token", "denied")
+        await audit_writer.log("auth.login_denied", tenant.id, user.id, metadata={"via": "token"})
         raise HTTPException(status_code=403, detail="User not in this tenant")
 
     # 4. role-ok lekérése
@@ -71,6 +80,8 @@ async def login_for_access_token(
             "roles": roles
         }
     )
+    metrics.logins.inc("token", "success")
+    await audit_writer.log("auth.login", tenant.id, user.id, metadata={"via": "token"})
 
     return {
         "access_token": access_token,
@@ -95,6 +106,8 @@ async def login(
     # 1. authenticate
     user = await authenticate_user(db, email, password)
     if not user:
+        metrics.logins.inc("login", "invalid_credentials")
+        await audit_writer.log("auth.login_failed", tenant.id, metadata={"email": email, "via": "login"})
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     
     # 2. user-tenant connection check
@@ -106,6 +119,8 @@ async def login(
     )
     user_tenant = result.scalars().first()
     if not user_tenant:
+        metrics.logins.inc("login", "denied")
+        await audit_writer.log("auth.login_denied", tenant.id, user.id, metadata={"via": "login"})
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User does not belong to this tenant"
@@ -152,6 +167,8 @@ async def login(
     db.add(db_token)
     await db.commit()
     await db.refresh(db_token)
+    metrics.logins.inc("login", "success")
+    await audit_writer.log("auth.login", tenant.id, user.id, metadata={"via": "login"})
 
     return {
         "access_token": access_token,
@@ -161,12 +178,145 @@ async def login(
         "tenant": tenant.subdomain
     }
 
+@router.post("/session", response_model=SessionResponseSchema)
+async def create_session(
+    request: Request,
+    payload: SessionRequestSchema,
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    # Login, /me and the permission list in one round trip, from one query: the SPA's
+    # login -> /me -> permission checks sequence repeated the membership and role lookups.
+    tenant = request.state.tenant
+    if not tenant:
+        raise HTTPException(status_code=400, detail="Tenant not resolved")
+
+    found = await get_user_session_data(db, payload.email, tenant.id)
+    if found is None or not await verify_password_async(payload.password, found[0].password_hash):
+        metrics.logins.inc("session", "invalid_credentials")
+        await audit_writer.log("auth.login_failed", tenant.id, metadata={"email": payload.email, "via": "session"})
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+
+    user, user_tenant_id, roles, permissions = found
+    if user_tenant_id is None:
+        metrics.logins.inc("session", "denied")
+        await audit_writer.log("auth.login_denied", tenant.id, user.id, metadata={"via": "session"})
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User does not belong to this tenant")
+
+    access_token = create_access_token(data={"sub": str(user.id), "tid": str(tenant.id), "roles": roles})
+    refresh_token = create_refresh_token(data={"sub": str(user.id), "tid": str(tenant.id)})
+    now = datetime.now(timezone.utc)
+    db.add(RefreshToken(
+        id=uuid.uuid4(),
+        user_tenant_id=user_tenant_id,
+        jti=decode_access_token(refresh_token)["jti"],
+        revoked=False,
+        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        created_at=now,
+        user_agent=request.headers.get("User-Agent"),
+        ip=request.client.host,
+    ))
+    await db.commit()
+    metrics.logins.inc("session", "success")
+    await audit_writer.log("auth.login", tenant.id, user.id, metadata={"via": "session"})
+
+    me = MeResponse(user_name=user.full_name, user_email=user.email, tenant_name=tenant.name, roles=roles)
+    # the membership was just checked: the SPA's next /me poll can be answered from the cache
+    response_cache.set(_me_etag(user, tenant), me.model_dump_json().encode())
+    return SessionResponseSchema(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        me=me,
+        tenant=SessionTenantSchema(id=tenant.id, name=tenant.name, subdomain=tenant.subdomain),
+        permissions=permissions,
+    )
+
+
+@router.post("/switch-tenant")
+async def switch_tenant(
+    request: Request,
+    payload: TenantSwitchSchema,
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    # Token exchange for users in several tenants: a valid token from one tenant buys tokens
+    # for another the user belongs to, without a password (and without bcrypt). A refresh token
+    # is rotated as in /refresh; an access token only buys an access token that expires with it.
+    decoded = decode_access_token(payload.token)
+    if not decoded or "sub" not in decoded:
+        metrics.logins.inc("switch", "invalid_token")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    user_id = uuid.UUID(decoded["sub"])
+
+    db_token = None
+    if "jti" in decoded:
+        # a refresh token: stateful, so it must not have been revoked (e.g. by logout or a rotation)
+        stmt = await db.execute(select(RefreshToken).where(RefreshToken.jti == decoded["jti"], RefreshToken.revoked == False))
+        db_token = stmt.scalars().first()
+        if db_token is None:
+            metrics.logins.inc("switch", "invalid_token")
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked or expired")
+
+    subdomain = payload.tenant or (request.state.tenant.subdomain if request.state.tenant else None)
+    if not subdomain:
+        raise HTTPException(status_code=400, detail="Tenant not resolved")
+    membership = await get_membership_by_subdomain(db, user_id, subdomain)
+    if membership is None:
+        # unknown tenant and non-member look the same, so tenants cannot be probed this way
+        metrics.logins.inc("switch", "denied")
+        if request.state.tenant:
+            await audit_writer.log("auth.switch_denied", request.state.tenant.id, user_id, metadata={"target": subdomain})
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User does not belong to this tenant")
+
+    tenant, user_tenant_id, roles = membership
+    if decoded.get("tid") == str(tenant.id):
+        # not a switch; renewing tokens is /refresh's job
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token already belongs to this tenant")
+
+    response = {"token_type": "bearer", "roles": roles, "tenant": tenant.subdomain}
+    now = datetime.now(timezone.utc)
+    if db_token is None:
+        response["access_token"] = create_access_token(
+            data={"sub": str(user_id), "tid": str(tenant.id), "roles": roles},
+            # a zero delta would mean the default lifetime
+            expire_delta=max(datetime.fromtimestamp(decoded["exp"], timezone.utc) - now, timedelta(seconds=1)),
+        )
+    else:
+        response["access_token"] = create_access_token(data={"sub": str(user_id), "tid": str(tenant.id), "roles": roles})
+        response["refresh_token"] = create_refresh_token(data={"sub": str(user_id), "tid": str(tenant.id)})
+        db_token.revoked = True
+        db.add(RefreshToken(
+            id=uuid.uuid4(),
+            user_tenant_id=user_tenant_id,
+            jti=decode_access_token(response["refresh_token"])["jti"],
+            revoked=False,
+            expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            created_at=now,
+            user_agent=request.headers.get("User-Agent"),
+            ip=request.client.host,
+        ))
+        await db.commit()
+    metrics.logins.inc("switch", "success")
+    await audit_writer.log("auth.tenant_switch", tenant.id, user_id, metadata={"from_tenant": decoded.get("tid")})
+
+    return response
+
+
+def _me_etag(user: User, tenant) -> str:
+    return make_etag("me", user.id, user.email, user.full_name, tenant.id, tenant.name, tenant.authz_version)
+
+
 @router.get("/me", response_model=MeResponse)
 async def read_users_me(
+    request: Request,
     db: Annotated[AsyncSession, Depends(get_db)],
     tenant=Depends(get_current_tenant),
     user=Depends(get_current_user)  
 ):
+    # membership and roles only change together with tenant.authz_version, so a cached body
+    # for this ETag is still current and the queries below can be skipped
+    etag = _me_etag(user, tenant)
+    body = response_cache.get(etag)
+    if body is not None:
+        return conditional_response(request, etag, body)
 
     stmt = await db.execute(
         select(UserTenant).where(
@@ -187,12 +337,14 @@ async def read_users_me(
     user_role = stmt.scalars().all()
 
 
-    return MeResponse(
+    body = MeResponse(
         user_name=user.full_name,
         user_email=user.email,
         tenant_name=tenant.name,
         roles=user_role
-    )
+    ).model_dump_json().encode()
+    response_cache.set(etag, body)
+    return conditional_response(request, etag, body)
 
 
 @router.post("/refresh", response_model=TokenResponseSchema)
@@ -214,7 +366,13 @@ async def refresh_token(
     ))
     db_token = stmt.scalars().first()
 
-    if not db_token or db_token.expires_at < datetime.utcnow():
+    # timestamptz columns come back aware, SQLite ones naive
+    expires_at = db_token.expires_at if db_token else None
+    if expires_at is not None and expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+
+    if not db_token or expires_at < datetime.now(timezone.utc):
+        await audit_writer.log("auth.refresh_failed", tenant.id, decoded["sub"], metadata={"jti": jti})
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked or expired")
 
     # generate new tokens
@@ -246,6 +404,7 @@ async def refresh_token(
     db.add(new_db_token)
     await db.commit()
     await db.refresh(new_db_token)
+    await audit_writer.log("auth.refresh", tenant.id, decoded["sub"], metadata={"jti": refresh_jti})
 
     return TokenResponseSchema(access_token=access_token, refresh_token=refresh_token)
 
@@ -266,6 +425,8 @@ async def logout(
     if db_token:
         db_token.revoked = True
         await db.commit()
+        if decoded.get("tid"):
+            await audit_writer.log("auth.logout", decoded["tid"], decoded.get("sub"), metadata={"jti": decoded["jti"]})
 
     return
 
@@ -290,3 +451,19 @@ async def reset_password(payload: ResetPasswordSchema, db: AsyncSession = Depend
 
     await reset_user_password(db, user, reset_record, payload.new_password)
     return {"message": "Password successfully reset"}
+
+
+@router.post("/accept-invite")
+async def accept_invite(
+    request: Request,
+    payload: AcceptInviteSchema,
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    # on the inviting tenant's host; afterwards the user logs in there as usual
+    tenant = request.state.tenant
+    if not tenant:
+        raise HTTPException(status_code=400, detail="Tenant not resolved")
+
+    user = await accept_invitation(db, tenant, payload.token, payload.password)
+    await audit_writer.log("auth.invite_accepted", tenant.id, user.id, entity="user", entity_id=user.id)
+    return {"message": "Invitation accepted", "tenant": tenant.subdomain}
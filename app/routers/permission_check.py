@@ -1,8 +1,14 @@
 from fastapi import APIRouter, Depends
-from app.services.rbac import role_checker
+from app.responses import FastJSONRoute
+from app.services.rbac import requires_permission, role_checker
 
-router = APIRouter(prefix="/api/permission-check", tags=["permission-check"])
+router = APIRouter(prefix="/api/permission-check", tags=["permission-check"], route_class=FastJSONRoute)
 
 @router.post("/admin-only")
 async def admin_action(user_tenant = Depends(role_checker("admin_tenant"))):
     return {"msg": f"Hello Admin of tenant {user_tenant['tenant']}!"}
+
+@router.get("/read")
+async def read_action(_=Depends(requires_permission("read"))):
+    # reachable with a bearer token or an X-API-Key carrying the "read" scope
+    return {"msg": "You may read"}
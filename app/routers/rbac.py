@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated
+from app.db import get_db
+from app.responses import FastJSONRoute
+from app.schemas.role_permissions import RolePermissionsBulk
+from app.schemas.roles import BulkAssignmentResult
+from app.schemas.user_roles import UserRolesBulk
+from app.services.audit import audit_writer
+from app.services.rbac import role_checker
+from app.services.role_assignments import Operation, apply_role_permissions, apply_user_roles
+
+
+router = APIRouter(prefix="/api/rbac", tags=["rbac"], route_class=FastJSONRoute)
+
+
+@router.post("/user-roles/{operation}", response_model=BulkAssignmentResult)
+async def bulk_user_roles(
+    operation: Operation,
+    payload: UserRolesBulk,
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    admin=Depends(role_checker("admin_tenant")),
+):
+    tenant = request.state.tenant
+    result = await apply_user_roles(db, tenant.id, operation, payload.user_ids, payload.roles)
+    await audit_writer.log(
+        f"rbac.user_roles.{operation}", tenant.id, admin["user_id"], entity="user_role",
+        metadata={"users": len(payload.user_ids), "roles": payload.roles, **result},
+    )
+    return result
+
+
+@router.post("/role-permissions/{operation}", response_model=BulkAssignmentResult)
+async def bulk_role_permissions(
+    operation: Operation,
+    payload: RolePermissionsBulk,
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    admin=Depends(role_checker("admin_tenant")),
+):
+    tenant = request.state.tenant
+    result = await apply_role_permissions(db, tenant.id, operation, payload.roles, payload.permissions)
+    await audit_writer.log(
+        f"rbac.role_permissions.{operation}", tenant.id, admin["user_id"], entity="role_permission",
+        metadata={"roles": payload.roles, "permissions": payload.permissions, **result},
+    )
+    return result
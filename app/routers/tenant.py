@@ -1,9 +1,49 @@
-from fastapi import APIRouter, Request
-from app.services.rbac import requires_permission  
+import json
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import get_db
+from app.models.tenants import Tenant
+from app.responses import FastJSONRoute
+from app.services.branding import branding_response, get_branding
+from app.services.cache import conditional_response, make_etag, response_cache
+from app.services.rbac import Caller, authorize, get_caller
+from app.services.tenant import get_current_tenant
 
-router = APIRouter(prefix="/api/tenant", tags=["tenant"])
+router = APIRouter(prefix="/api/tenant", tags=["tenant"], route_class=FastJSONRoute)
 
 @router.get("/tenant-data")
-async def get_tenant_data(request: Request, _=requires_permission("read")):
-    tenant = request.state.tenant
-    return {"tenant_name": tenant.name, "subdomain": tenant.subdomain}
+async def get_tenant_data(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    tenant: Annotated[Tenant, Depends(get_current_tenant)],
+    caller: Annotated[Caller, Depends(get_caller)],
+):
+    data = {"tenant_name": tenant.name, "subdomain": tenant.subdomain}
+    if caller.user is None:
+        # an API key: its scopes are checked on every call (from the key cache), no ETag
+        await authorize(db, caller, tenant, "read")
+        return data
+    # A cached body exists only once this user passed the "read" check at this authz_version,
+    # so a hit can answer (or 304) without re-running the permission queries.
+    user = caller.user
+    etag = make_etag("tenant-data", user.id, tenant.id, tenant.name, tenant.subdomain, tenant.authz_version)
+    body = response_cache.get(etag)
+    if body is None:
+        await authorize(db, caller, tenant, "read")
+        body = json.dumps(data).encode()
+        response_cache.set(etag, body)
+    return conditional_response(request, etag, body)
+
+
+@router.get("/branding")
+async def get_tenant_branding(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    v: Optional[str] = None,
+):
+    # Public: the login page needs it. The tenant comes from TenantMiddleware; going through
+    # get_current_tenant would look it up a second time. `v` (from Content-Location) makes
+    # the URL immutable for as long as the branding does not change.
+    asset = await get_branding(db, request.state.tenant)
+    return branding_response(request, asset, v)
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import UploadFile
+from typing import Annotated
+from app.db import get_db
+from app.responses import FastJSONRoute
+from app.schemas.users import BulkUserResult, BulkUserRow
+from app.services.audit import audit_writer
+from app.services.provisioning import CHUNK_SIZE, check_length, provision_users
+from app.services.rbac import role_checker
+
+
+router = APIRouter(prefix="/api/users", tags=["users"], route_class=FastJSONRoute)
+
+BULK_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": BulkUserRow.model_json_schema()}},
+            "text/csv": {"schema": {"type": "string"}, "example": "email,full_name,password,roles\nann@example.com,Ann,s3cret,user\n"},
+            "multipart/form-data": {"schema": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}}},
+        },
+    },
+}
+
+
+async def read_upload(upload: UploadFile):
+    while chunk := await upload.read(CHUNK_SIZE):
+        yield chunk
+
+
+@router.post("/bulk", response_model=BulkUserResult, openapi_extra=BULK_BODY)
+async def bulk_create_users(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    admin=Depends(role_checker("admin_tenant")),
+):
+    tenant = request.state.tenant
+    check_length(request.headers.get("content-length"))
+    content_type = request.headers.get("content-type")
+    if content_type and content_type.startswith("multipart/form-data"):
+        # a file upload from a browser form: the part's own type says JSON or CSV. The form is
+        # parsed before we see the file, so its size has to be known up front
+        if "content-length" not in request.headers:
+            raise HTTPException(status_code=status.HTTP_411_LENGTH_REQUIRED, detail="Multipart uploads need a Content-Length")
+        form = await request.form()
+        upload = form.get("file")
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Send the users as a file in the `file` field")
+        content_type = upload.content_type
+        if (upload.filename or "").lower().endswith(".csv"):
+            content_type = "text/csv"
+        chunks = read_upload(upload)
+    else:
+        chunks = request.stream()
+
+    result = await provision_users(db, tenant, chunks, content_type)
+    await audit_writer.log(
+        "users.bulk_created", tenant.id, admin["user_id"], entity="user",
+        metadata={key: result[key] for key in ("rows", "invited", "failed")},
+    )
+    return result
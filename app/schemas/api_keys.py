@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from uuid import UUID
+import datetime
+
+
+class ApiKeyCreate(BaseModel):
+    name: str
+    scopes: List[str] = Field(min_length=1)  # permission names
+    expires_in_days: Optional[int] = Field(default=None, ge=1)
+
+
+class ApiKeyRead(BaseModel):
+    id: UUID
+    name: str
+    prefix: str
+    scopes: List[str]
+    revoked: bool
+    expires_at: Optional[datetime.datetime] = None
+    created_at: datetime.datetime
+
+
+class ApiKeyCreated(ApiKeyRead):
+    key: str  # the full key; returned once, only its hash is stored
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Any
+from typing import Optional, Any, List
 from uuid import UUID
 import datetime
 
@@ -23,3 +23,8 @@ class AuditLogRead(AuditLogBase):
 
     class Config:
         orm_mode = True 
+
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogRead]
+    next_cursor: Optional[str] = None
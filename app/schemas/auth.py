@@ -1,4 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
+from uuid import UUID
+from typing import List, Optional
+from app.schemas.users import MeResponse
 
 class RefreshTokenSchema(BaseModel):
     refresh_token: str
@@ -8,6 +11,11 @@ class TokenResponseSchema(BaseModel):
     refresh_token: str
 
 
+class TenantSwitchSchema(BaseModel):
+    token: str  # access or refresh token issued for any tenant
+    tenant: Optional[str] = None  # target subdomain; defaults to the tenant of the request's host
+
+
 class ForgotPasswordSchema(BaseModel):
     email: EmailStr
 
@@ -15,3 +23,25 @@ class ResetPasswordSchema(BaseModel):
     token: str
     new_password: str
 
+class AcceptInviteSchema(BaseModel):
+    token: str  # from the invites of POST /api/users/bulk
+    password: str = Field(min_length=1)  # the account's password, or its first one if the invitation created it
+
+
+
+class SessionRequestSchema(BaseModel):
+    email: str
+    password: str
+
+class SessionTenantSchema(BaseModel):
+    id: UUID
+    name: str
+    subdomain: str
+
+class SessionResponseSchema(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    me: MeResponse
+    tenant: SessionTenantSchema
+    permissions: List[str]
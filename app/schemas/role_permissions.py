@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
+from typing import List
 
 class RolePermissionBase(BaseModel):
     role_id: UUID
@@ -13,3 +14,8 @@ class RolePermissionRead(RolePermissionBase):
 
     class Config:
         orm_mode = True
+
+
+class RolePermissionsBulk(BaseModel):
+    roles: List[str] = Field(min_length=1, max_length=1000)
+    permissions: List[str]  # permission names; may be empty for replace (removes all permissions)
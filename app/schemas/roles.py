@@ -19,3 +19,8 @@ class RoleRead(RoleBase):
 
     class Config:
         orm_mode = True
+
+
+class BulkAssignmentResult(BaseModel):
+    added: int
+    removed: int
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, EmailStr, Field
 from uuid import UUID
-from typing import Optional, Any
+from typing import Optional, Any, List
 import datetime
 
 class TenantBase(BaseModel):
@@ -21,3 +21,11 @@ class TenantRead(TenantBase):
 
     class Config:
         orm_mode = True
+
+
+class TenantOnboard(BaseModel):
+    name: str = Field(min_length=1)
+    subdomain: str = Field(pattern=r"^[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?$")
+    code: Optional[str] = None  # defaults to the upper-cased subdomain
+    custom_domain: Optional[str] = None
+    admins: List[EmailStr] = []  # get the template's admin role; missing accounts are invited
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
+from typing import List
 
 class UserRoleBase(BaseModel):
     user_tenant_id: UUID
@@ -13,3 +14,8 @@ class UserRoleRead(UserRoleBase):
 
     class Config:
         orm_mode = True
+
+
+class UserRolesBulk(BaseModel):
+    user_ids: List[UUID] = Field(min_length=1, max_length=10000)
+    roles: List[str]  # role names in the tenant; may be empty for replace (removes all roles)
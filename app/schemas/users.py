@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from uuid import UUID
 from typing import Optional, List
 import datetime
@@ -20,7 +20,35 @@ class UserRead(UserBase):
 
 
 class MeResponse(BaseModel):
-    user_name: str
+    user_name: Optional[str] = None  # users.full_name is nullable (invited accounts have none yet)
     user_email: str
     tenant_name: str
     roles: List[str]
+
+
+class BulkUserRow(BaseModel):
+    email: EmailStr
+    full_name: Optional[str] = None
+    password: Optional[str] = Field(default=None, min_length=1)  # for a new account; none: set on acceptance
+    roles: List[str] = []
+
+
+class BulkUserError(BaseModel):
+    row: int  # 1-based; CSV header lines are not counted
+    email: Optional[str] = None
+    errors: List[str]
+
+
+class BulkUserInvite(BaseModel):
+    email: str
+    token: str  # redeem with POST /api/auth/accept-invite
+
+
+class BulkUserResult(BaseModel):
+    rows: int
+    invited: int  # one invitation per accepted row, new account or not
+    failed: int
+    errors: List[BulkUserError]
+    invites: List[BulkUserInvite]
+    timings: dict[str, float]  # phase -> ms
+    rows_per_second: float
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Optional
+from app.config import settings
+from app.crud.bulk import copy_records
+from app.models.audit_logs import AuditLog
+
+logger = logging.getLogger(__name__)
+
+AUDIT_COLUMNS = ("id", "tenant_id", "user_id", "action", "entity", "entity_id", "meta_data", "created_at")
+OVERFLOW_POLICIES = ("block", "drop_newest", "drop_oldest")
+
+_STOP = object()
+
+
+class AuditWriter:
+    """Buffers audit events in a bounded queue and bulk-writes them from a background task."""
+
+    def __init__(
+        self,
+        session_factory=None,
+        maxsize: int = settings.AUDIT_QUEUE_MAXSIZE,
+        batch_size: int = settings.AUDIT_BATCH_SIZE,
+        flush_interval: float = settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+        overflow_policy: str = settings.AUDIT_OVERFLOW_POLICY,
+        block_timeout: float = settings.AUDIT_BLOCK_TIMEOUT_MS / 1000,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown audit overflow policy: {overflow_policy}")
+
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._task: Optional[asyncio.Task] = None
+        self._accepting = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        if self.session_factory is None:
+            from app.db import AsyncLocalSession
+            self.session_factory = AsyncLocalSession
+        self._accepting = True
+        self._task = asyncio.create_task(self._run(), name="audit-writer")
+
+    async def stop(self):
+        # everything queued before the sentinel is flushed before the task exits
+        if not self.running:
+            return
+        self._accepting = False
+        await self.queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def log(
+        self,
+        action: str,
+        tenant_id,
+        user_id=None,
+        entity: Optional[str] = None,
+        entity_id=None,
+        metadata: Optional[Any] = None,
+    ) -> bool:
+        if not self._accepting:
+            self.dropped += 1
+            return False
+
+        record = (
+            uuid.uuid4(),
+            _as_uuid(tenant_id),
+            _as_uuid(user_id),
+            action,
+            entity,
+            _as_uuid(entity_id),
+            metadata,
+            datetime.now(timezone.utc),
+        )
+
+        try:
+            self.queue.put_nowait(record)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if self.overflow_policy == "block":
+            try:
+                await asyncio.wait_for(self.queue.put(record), self.block_timeout)
+                return True
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                return False
+
+        if self.overflow_policy == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.dropped += 1
+            self.queue.put_nowait(record)
+            return True
+
+        self.dropped += 1
+        return False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple]):
+        try:
+            async with self.session_factory() as db:
+                await copy_records(db, AuditLog.__table__, AUDIT_COLUMNS, batch)
+                await db.commit()
+            self.written += len(batch)
+        except Exception:
+            if len(batch) == 1:
+                self.failed += 1
+                logger.exception("Failed to write audit event %s (%s)", batch[0][3], batch[0][0])
+                return
+            # one bad row (e.g. a tenant deleted while its events were queued) aborts the whole
+            # COPY: halve and retry, so only the bad rows are lost, and a transient error gets
+            # another attempt
+            logger.warning("Failed to write %d audit events, retrying in halves", len(batch), exc_info=True)
+            middle = len(batch) // 2
+            await self._flush(batch[:middle])
+            await self._flush(batch[middle:])
+
+
+def _as_uuid(value):
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(str(value))
+
+
+audit_writer = AuditWriter()
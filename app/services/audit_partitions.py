@@ -0,0 +1,131 @@
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "audit_logs"
+_PARTITION_RE = re.compile(r"^audit_logs_(\d{4})_(\d{2})$")
+
+# Sync helpers so they run from Alembic (op.get_bind()) as well as from
+# async code via `await conn.run_sync(ensure_partitions, ...)`.
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_{month:%Y_%m}"
+
+
+def list_partitions(conn: Connection) -> list[tuple[str, date]]:
+    result = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent"
+    ), {"parent": PARENT_TABLE})
+
+    partitions = []
+    for (name,) in result:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def default_partition(conn: Connection) -> Optional[str]:
+    result = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT'"
+    ), {"parent": PARENT_TABLE})
+    return result.scalar()
+
+
+def _month_range(month: date) -> dict[str, datetime]:
+    return {
+        "lower": datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+        "upper": datetime.combine(add_months(month, 1), datetime.min.time(), timezone.utc),
+    }
+
+
+def ensure_partitions(
+    conn: Connection,
+    months_ahead: int = settings.AUDIT_PARTITIONS_AHEAD,
+    months_back: int = 0,
+    today: Optional[date] = None,
+) -> list[str]:
+    current = month_start(today or datetime.now(timezone.utc).date())
+    existing = {name for name, _ in list_partitions(conn)}
+    missing = [
+        month for month in (add_months(current, offset) for offset in range(-months_back, months_ahead + 1))
+        if partition_name(month) not in existing
+    ]
+
+    # Rows of a month without a partition land in the default one (maintenance fell behind, or
+    # months_back reaches into history), and then CREATE ... PARTITION OF fails on them. Such
+    # months are created with the default detached and their rows moved over, all in the
+    # caller's transaction; audit inserts wait on the parent's lock meanwhile.
+    default = default_partition(conn) if missing else None
+    stranded = [
+        month for month in missing
+        if default and conn.execute(text(
+            f"SELECT 1 FROM {default} WHERE created_at >= :lower AND created_at < :upper LIMIT 1"
+        ), _month_range(month)).first()
+    ]
+    if stranded:
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {default}"))
+
+    created = []
+    for month in missing:
+        name = partition_name(month)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+        ))
+        created.append(name)
+        logger.info("Created audit partition %s", name)
+        if month in stranded:
+            bounds = _month_range(month)
+            moved = conn.execute(text(
+                f"INSERT INTO {name} SELECT * FROM {default} WHERE created_at >= :lower AND created_at < :upper"
+            ), bounds).rowcount
+            conn.execute(text(f"DELETE FROM {default} WHERE created_at >= :lower AND created_at < :upper"), bounds)
+            logger.info("Moved %d rows from %s to %s", moved, default, name)
+
+    if stranded:
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {default} DEFAULT"))
+    return created
+
+
+def drop_expired_partitions(
+    conn: Connection,
+    retention_months: int = settings.AUDIT_RETENTION_MONTHS,
+    today: Optional[date] = None,
+    dry_run: bool = False,
+) -> list[str]:
+    # a partition expires once its whole month is older than the retention window
+    cutoff = add_months(month_start(today or datetime.now(timezone.utc).date()), -retention_months)
+
+    dropped = []
+    for name, month in list_partitions(conn):
+        if add_months(month, 1) > cutoff:
+            continue
+        if not dry_run:
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            conn.execute(text(f"DROP TABLE {name}"))
+            logger.info("Dropped audit partition %s", name)
+        dropped.append(name)
+    return dropped
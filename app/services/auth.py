@@ -1,40 +1,64 @@
+import functools
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Annotated
-from jose import jwt, JWTError
+from jose import jwk, jwt, JWTError, ExpiredSignatureError
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
-from app.crud.user import hash_password
+from app.crud.user import hash_password_async
 from app.models.password_reset import PasswordReset
 from app.models.users import User
 from app.models.tenants import Tenant
 from app.models.user_tenants import UserTenant
 from app.db import get_db
+from app.services.timing import phase, timed
+from app.services import metrics
+from app.services.tracing import traced
+import logging
 import uuid
 from sqlalchemy.future import select
 
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.JWT_ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 
 oaut2_scheme = OAuth2PasswordBearer(tokenUrl='/api/auth/token', scheme_name='JWT')
+# for endpoints that also accept other credentials (API keys): a missing bearer is not an error yet
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/api/auth/token', scheme_name='JWT', auto_error=False)
+
+@functools.cache
+def _jwt_key():
+    # jose builds a key object from the secret on every encode/decode unless given one;
+    # built on first use so importing the module does no key work
+    return jwk.construct(SECRET_KEY, ALGORITHM)
 
+@timed("jwt")
 def create_access_token(data: dict, expire_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expire_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({'exp': expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _jwt_key(), algorithm=ALGORITHM)
+    metrics.tokens_minted.inc("access")
     return encoded_jwt
 
+@timed("jwt")
 def decode_access_token(token: str):
     try: 
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, _jwt_key(), algorithms=[ALGORITHM])
+        metrics.token_verifications.inc("valid")
         return payload
-    
+
+    except ExpiredSignatureError:
+        metrics.token_verifications.inc("expired")
+        logger.debug("Token expired")
+        return None
     except JWTError as e:
-        print(f'Failed to decode token: {e}')
+        metrics.token_verifications.inc("invalid")
+        logger.info("Failed to decode token: %s", str(e), extra={"event": "auth.token_invalid"})
         return None
     
 async def get_current_user_object(
@@ -46,10 +70,9 @@ async def get_current_user_object(
         headers={"WWW-Authenticate": "Bearer"}
     )
 
-    print("Validating token...")
     payload = decode_access_token(token)
     if payload is None or "sub" not in payload:
-        print("Failed to decode token")
+        logger.debug("Rejected bearer token")
         raise credential_exception
     
     return {
@@ -58,6 +81,7 @@ async def get_current_user_object(
         "roles": payload.get("roles", [])
     }
 
+@traced("get_current_user")
 async def get_current_user( token: Annotated[str, Depends(oaut2_scheme)],
                             db: Annotated[AsyncSession, Depends(get_db)] 
         ): 
@@ -68,15 +92,15 @@ async def get_current_user( token: Annotated[str, Depends(oaut2_scheme)],
             headers={"WWW-Authenticate": "Bearer"} 
             ) 
         
-        print("Validating token...") 
-
+ 
         payload = decode_access_token(token) 
         if payload is None or "sub" not in payload: 
-            print("Failed to decode token") 
+            logger.debug("Rejected bearer token") 
             raise credential_exception 
         
         user_id = payload["sub"] # UUID string 
-        user = await db.get(User, uuid.UUID(user_id)) 
+        with phase("user"):
+            user = await db.get(User, uuid.UUID(user_id))
         if user is None: 
             raise credential_exception 
         
@@ -108,6 +132,7 @@ async def get_current_user_with_tenant(
     return user_tenant
 
 
+@timed("jwt")
 def create_refresh_token(data: dict, expire_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expire_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
@@ -115,7 +140,8 @@ def create_refresh_token(data: dict, expire_delta: Optional[timedelta] = None):
         "exp": expire,
         "jti": str(uuid.uuid4())  
     })
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _jwt_key(), algorithm=ALGORITHM)
+    metrics.tokens_minted.inc("refresh")
     return encoded_jwt
 
 
@@ -141,11 +167,11 @@ async def verify_reset_token(db: AsyncSession, token: str) -> User:
     stmt = await db.execute(select(PasswordReset).where(
         PasswordReset.token == token,
         PasswordReset.used == False,
-        PasswordReset.expires_at >= datetime.datetime.now(timezone.utc)
+        PasswordReset.expires_at >= datetime.now(timezone.utc)
     ))
     reset_record = stmt.scalars().first()
     if not reset_record:
-        return None
+        return None, None
 
     stmt_user = await db.execute(select(User).where(User.id == reset_record.user_id))
     user = stmt_user.scalars().first()
@@ -153,6 +179,6 @@ async def verify_reset_token(db: AsyncSession, token: str) -> User:
 
 
 async def reset_user_password(db: AsyncSession, user: User, reset_record: PasswordReset, new_password: str):
-    user.password_hash = hash_password(new_password)
+    user.password_hash = await hash_password_async(new_password)
     reset_record.used = True
     await db.commit()
\ No newline at end of file
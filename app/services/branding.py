@@ -0,0 +1,78 @@
+import gzip
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.config import settings
+from app.models.tenants import Tenant
+from app.responses import dumps
+from app.services.cache import TTLCache, etag_matches
+
+# Tenant branding, served before login on every page load. The body is serialized and
+# gzipped once per (tenant, updated_at) and kept here, so a hit costs no query beyond the
+# tenant lookup TenantMiddleware already did.
+#
+# The version is a hash of the body, not of updated_at: unrelated tenant writes (e.g. an
+# authz_version bump) rebuild the entry but keep the version, so versioned URLs that
+# clients hold as immutable stay valid until the branding itself changes.
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class BrandingAsset:
+    __slots__ = ("version", "body", "gzip_body")
+
+    def __init__(self, body: bytes):
+        self.version = hashlib.sha256(body).hexdigest()[:16]
+        self.body = body
+        # mtime=0: same bytes for the same body on every worker
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+
+    @property
+    def url(self) -> str:
+        return f"/api/tenant/branding?v={self.version}"
+
+
+branding_cache = TTLCache(settings.BRANDING_CACHE_TTL, settings.BRANDING_CACHE_SIZE)
+
+
+async def get_branding(db: AsyncSession, tenant: Tenant) -> BrandingAsset:
+    key = (tenant.id, tenant.updated_at)
+    asset = branding_cache.get(key)
+    if asset is None:
+        result = await db.execute(select(Tenant.branding).where(Tenant.id == tenant.id))
+        asset = BrandingAsset(dumps(result.scalar() or {}))
+        branding_cache.set(key, asset)
+    return asset
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            _, _, q = params.strip().lower().partition("q=")
+            try:
+                return float(q) > 0 if q else True
+            except ValueError:
+                return False
+    return False
+
+
+def branding_response(request: Request, asset: BrandingAsset, version: Optional[str]) -> Response:
+    use_gzip = accepts_gzip(request.headers.get("accept-encoding"))
+    # strong ETags: the two encodings are different bytes, so they get different tags
+    etag = f'"{asset.version}-gzip"' if use_gzip else f'"{asset.version}"'
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Content-Location": asset.url,
+        # an outdated ?v= still gets the current body, but must not be pinned for a year
+        "Cache-Control": IMMUTABLE if version == asset.version else f"public, max-age={settings.BRANDING_MAX_AGE}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(asset.gzip_body, media_type="application/json", headers=headers)
+    return Response(asset.body, media_type="application/json", headers=headers)
@@ -0,0 +1,79 @@
+import hashlib
+import time
+from typing import Any, Callable, Hashable, Optional
+from fastapi import Request, Response
+from app.config import settings
+
+# In-process caches. Everything here runs on the event loop thread, so no locks.
+# Entries are keyed by values that change whenever the cached data would (ETags embed
+# user fields and the tenant's authz_version), so invalidation is by key, and the TTL
+# only bounds memory and how long an orphaned entry lingers.
+
+
+class TTLCache:
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: dict[Hashable, tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        if key not in self._data and len(self._data) >= self.maxsize:
+            # dicts keep insertion order: drop the oldest entry
+            del self._data[next(iter(self._data))]
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+    def evict(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop the entries for which predicate(key, value) is true; a full scan, for rare events."""
+        stale = [key for key, (_, value) in self._data.items() if predicate(key, value)]
+        for key in stale:
+            del self._data[key]
+        return len(stale)
+
+
+# rendered bodies by ETag; a hit also means the request was authorized for that ETag before
+response_cache = TTLCache(settings.RESPONSE_CACHE_TTL, settings.RESPONSE_CACHE_SIZE)
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2): W/"x" matches "x"
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_response(request: Request, etag: str, body: bytes, media_type: str = "application/json") -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=media_type, headers=headers)
@@ -0,0 +1,244 @@
+import bisect
+import time
+from typing import Callable, Iterable, Optional
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.config import settings
+from app.services import query_stats
+
+# Prometheus text exposition (format 0.0.4) without prometheus_client.
+#
+# Values are plain ints/floats in dicts keyed by label-value tuples, and are only written
+# from the event loop thread (bcrypt work in the thread pool is counted back on the loop),
+# so the hot path takes no locks: inc() is one dict lookup and an add, observe() adds a
+# bisect. A scrape runs on the same loop, so it always sees a consistent set of values.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+BCRYPT_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def expose(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def expose(self) -> list[str]:
+        lines = self.header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class CallbackMetric(Metric):
+    """Gauge or counter whose value is read at scrape time, for state owned elsewhere (pool, queues)."""
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], Optional[float]], kind: str = "gauge"):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.read = read
+
+    def expose(self) -> list[str]:
+        value = self.read()
+        if value is None:
+            return []
+        return self.header() + [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(buckets)
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.bounds) + 1) + [0.0]
+        series[bisect.bisect_left(self.bounds, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def expose(self) -> list[str]:
+        lines = self.header()
+        for labels, series in sorted(self._series.items()):
+            _histogram_lines(lines, self, labels, self.bounds, series[:-1], series[-1])
+        return lines
+
+
+class StatsHistogram(Metric):
+    """Exposes one of the app.services.query_stats histograms, which keep their own cumulative counts."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, histogram: query_stats.Histogram):
+        super().__init__(name, documentation)
+        self.histogram = histogram
+
+    def expose(self) -> list[str]:
+        snap = self.histogram.snapshot()
+        cumulative = snap["cumulative"]
+        # back to per-bucket counts so both histogram kinds share one renderer
+        buckets = [n - (cumulative[i - 1] if i else 0) for i, n in enumerate(cumulative)]
+        lines = self.header()
+        _histogram_lines(lines, self, (), tuple(snap["bounds"]), buckets, snap["sum"])
+        return lines
+
+
+def _histogram_lines(lines: list, metric: Metric, labels: tuple, bounds: tuple, buckets: list, total: float):
+    running = 0
+    for bound, n in zip(bounds + (float("inf"),), buckets):
+        running += n
+        le = f'le="{_format_value(bound)}"' if bound != float("inf") else 'le="+Inf"'
+        lines.append(f"{metric.name}_bucket{_format_labels(metric.labelnames, labels, le)} {running}")
+    label_text = _format_labels(metric.labelnames, labels)
+    lines.append(f"{metric.name}_sum{label_text} {_format_value(total)}")
+    lines.append(f"{metric.name}_count{label_text} {running}")
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        # re-registering a name replaces it, so re-instrumenting a recreated engine is harmless
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, tuple(labelnames)))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, tuple(labelnames)))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, tuple(labelnames), buckets))
+
+    def callback(self, name: str, documentation: str, read: Callable[[], Optional[float]], kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, read, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# --- HTTP ---
+http_requests = registry.counter(
+    "http_requests_total", "Requests handled, by route template and status code.", ("method", "route", "status"))
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route template and tenant tier.", ("method", "route", "tier"))
+http_in_progress = registry.gauge("http_requests_in_progress", "Requests currently being handled.")
+
+# --- auth ---
+tokens_minted = registry.counter("auth_tokens_minted_total", "JWTs issued, by kind.", ("kind",))
+token_verifications = registry.counter(
+    "auth_token_verifications_total", "JWT decode attempts, by result (valid, expired, invalid).", ("result",))
+api_key_verifications = registry.counter(
+    "auth_api_key_verifications_total", "API key checks by result (valid, invalid, revoked, expired).", ("result",))
+logins = registry.counter(
+    "auth_logins_total", "Logins by endpoint and result (success, invalid_credentials, denied; invalid_token for switch).",
+    ("endpoint", "result"))
+
+# --- bcrypt ---
+bcrypt_queue_depth = registry.gauge(
+    "bcrypt_queue_depth", "Password hash/verify calls submitted to the bcrypt pool and not yet finished.")
+bcrypt_seconds = registry.histogram(
+    "bcrypt_duration_seconds", "Time per password hash/verify, including queueing for a pool thread.",
+    ("operation",), BCRYPT_BUCKETS)
+
+# --- database ---
+pool_wait_seconds = registry.histogram(
+    "db_pool_wait_seconds", "Time spent waiting to check a connection out of the pool.", (), POOL_WAIT_BUCKETS)
+registry.register(StatsHistogram(
+    "db_statement_duration_seconds", "SQL statement latency.", query_stats.statement_seconds))
+registry.register(StatsHistogram(
+    "db_statements_per_request", "SQL statements per HTTP request.", query_stats.request_statements))
+
+
+def tenant_tier(tenant) -> str:
+    # tiers keep the label set bounded; a label per tenant would not survive 50k tenants
+    if tenant is None:
+        return "none"
+    return settings.METRICS_TENANT_TIERS.get(tenant.subdomain, settings.METRICS_DEFAULT_TIER)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that reports how long each checkout waited for a free connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_seconds.observe(time.perf_counter() - started)
+
+
+def instrument_pool(engine):
+    pool = getattr(engine, "sync_engine", engine).pool
+    if not hasattr(pool, "checkedout"):
+        return  # StaticPool / NullPool have nothing to report
+    registry.callback("db_pool_size", "Configured pool size.", pool.size)
+    registry.callback("db_pool_checked_out", "Connections currently checked out.", pool.checkedout)
+    registry.callback("db_pool_overflow", "Connections open beyond pool_size (negative while the pool warms up).", pool.overflow)
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from sqlalchemy import DateTime, delete, func, literal, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.config import settings
+from app.models.api_keys import ApiKey, ApiKeyPermission
+from app.models.audit_logs import AuditLog
+from app.models.offboarding_jobs import OffboardingJob
+from app.models.password_reset import PasswordReset
+from app.models.refresh_tokens import RefreshToken
+from app.models.role_permissions import RolePermission
+from app.models.roles import Role
+from app.models.tenant_invitations import TenantInvitation
+from app.models.tenants import Tenant
+from app.models.user_roles import UserRole
+from app.models.user_tenants import UserTenant
+from app.services.api_keys import api_key_cache
+from app.services.branding import branding_cache
+from app.services.rbac import bump_authz_version
+
+logger = logging.getLogger(__name__)
+
+# Tenant offboarding in two phases. start_offboarding() disables the tenant: TenantMiddleware
+# rejects disabled tenants on every request, so all workers stop serving it at once, and the
+# authz_version bump orphans its cached /me and tenant-data bodies. run_offboarding() then
+# deletes the tenant's rows table by table, in keyset batches of OFFBOARD_BATCH_SIZE, one short
+# transaction each with OFFBOARD_PAUSE_MS between them, so no table is locked for long. Each
+# batch commits together with the job's progress, so a job that stops resumes where it was.
+#
+# Users are global accounts and are kept; their password resets go once no other tenant has them.
+
+
+class PurgeStep:
+    __slots__ = ("table", "model", "keys", "where")
+
+    def __init__(self, table: str, model, keys: tuple, where):
+        self.table = table
+        self.model = model
+        self.keys = keys  # keyset order; the last one identifies a row
+        self.where = where
+
+
+def purge_plan(tenant_id: uuid.UUID) -> list[PurgeStep]:
+    # children before parents, so every batch is valid on its own
+    members = select(UserTenant.id).where(UserTenant.tenant_id == tenant_id)
+    member_users = select(UserTenant.user_id).where(UserTenant.tenant_id == tenant_id)
+    other_users = select(UserTenant.user_id).where(UserTenant.tenant_id != tenant_id)
+    return [
+        PurgeStep("refresh_tokens", RefreshToken, (RefreshToken.id,), RefreshToken.user_tenant_id.in_(members)),
+        PurgeStep("user_roles", UserRole, (UserRole.id,), UserRole.usertenant_id.in_(members)),
+        PurgeStep("role_permissions", RolePermission, (RolePermission.id,),
+                  RolePermission.role_id.in_(select(Role.id).where(Role.tenant_id == tenant_id))),
+        PurgeStep("api_key_permissions", ApiKeyPermission, (ApiKeyPermission.id,),
+                  ApiKeyPermission.api_key_id.in_(select(ApiKey.id).where(ApiKey.tenant_id == tenant_id))),
+        PurgeStep("api_keys", ApiKey, (ApiKey.id,), ApiKey.tenant_id == tenant_id),
+        PurgeStep("tenant_invitations", TenantInvitation, (TenantInvitation.id,), TenantInvitation.tenant_id == tenant_id),
+        PurgeStep("roles", Role, (Role.id,), Role.tenant_id == tenant_id),
+        PurgeStep("password_resets", PasswordReset, (PasswordReset.id,),
+                  PasswordReset.user_id.in_(member_users) & PasswordReset.user_id.notin_(other_users)),
+        PurgeStep("user_tenants", UserTenant, (UserTenant.id,), UserTenant.tenant_id == tenant_id),
+        # (tenant_id, created_at) is indexed and created_at is the partition key
+        PurgeStep("audit_logs", AuditLog, (AuditLog.created_at, AuditLog.id), AuditLog.tenant_id == tenant_id),
+    ]
+
+
+def evict_tenant(tenant_id: uuid.UUID) -> int:
+    # This process only. Other workers never reach their entries again: the tenant is rejected
+    # before any handler runs, and the entries expire with their TTL.
+    return (
+        branding_cache.evict(lambda key, _: key[0] == tenant_id)
+        + api_key_cache.evict(lambda _, entry: getattr(entry, "tenant_id", None) == tenant_id)
+    )
+
+
+async def count_rows(db: AsyncSession, tenant_id: uuid.UUID) -> dict[str, int]:
+    counts = {}
+    for step in purge_plan(tenant_id):
+        result = await db.execute(select(func.count()).select_from(step.model).where(step.where))
+        counts[step.table] = result.scalar()
+    return counts
+
+
+async def start_offboarding(db: AsyncSession, tenant: Tenant) -> OffboardingJob:
+    """Disable the tenant and create its job, or return the job already under way."""
+    result = await db.execute(
+        select(OffboardingJob).where(OffboardingJob.tenant_id == tenant.id, OffboardingJob.status != "done")
+    )
+    job = result.scalars().first()
+    if job is None:
+        job = OffboardingJob(
+            id=uuid.uuid4(),
+            tenant_id=tenant.id,
+            subdomain=tenant.subdomain,
+            status="running",
+            progress={step.table: {"deleted": 0, "done": False, "last": None, "seconds": 0.0}
+                      for step in purge_plan(tenant.id)},
+        )
+        db.add(job)
+    job.status = "running"
+    tenant.status = False
+    await bump_authz_version(db, tenant.id)
+    await db.commit()
+    evict_tenant(tenant.id)
+    logger.info("Tenant %s disabled for offboarding (job %s)", tenant.subdomain, job.id)
+    return job
+
+
+def _encode(values: tuple) -> list:
+    return [value.isoformat() if isinstance(value, datetime) else str(value) for value in values]
+
+
+def _decode(keys: tuple, values: Optional[list]) -> Optional[tuple]:
+    if values is None:
+        return None
+    return tuple(
+        datetime.fromisoformat(value) if isinstance(key.type, DateTime) else uuid.UUID(value)
+        for key, value in zip(keys, values)
+    )
+
+
+def _after(keys: tuple, last: tuple):
+    if len(keys) == 1:
+        return keys[0] > last[0]
+    return tuple_(*keys) > tuple_(*(literal(value, key.type) for key, value in zip(keys, last)))
+
+
+async def _purge(db: AsyncSession, job: OffboardingJob, step: PurgeStep, batch_size: int, pause: float,
+                 on_batch: Optional[Callable]):
+    state = dict(job.progress[step.table])
+    last = _decode(step.keys, state["last"])
+    table = step.model.__table__
+    while not state["done"]:
+        started = time.perf_counter()
+        query = select(*step.keys).where(step.where).order_by(*step.keys).limit(batch_size)
+        if last is not None:
+            query = query.where(_after(step.keys, last))
+        rows = (await db.execute(query)).all()
+        if rows:
+            stmt = delete(table).where(step.keys[-1].in_([row[-1] for row in rows]), step.where)
+            if len(step.keys) > 1:
+                # lets Postgres prune audit_logs partitions outside the batch
+                stmt = stmt.where(step.keys[0].between(rows[0][0], rows[-1][0]))
+            state["deleted"] += (await db.execute(stmt)).rowcount
+            last = tuple(rows[-1])
+            state["last"] = _encode(last)
+        state["done"] = len(rows) < batch_size
+        state["seconds"] = round(state["seconds"] + time.perf_counter() - started, 3)
+        job.progress = {**job.progress, step.table: dict(state)}
+        await db.commit()
+        if on_batch is not None:
+            on_batch(job, step.table)
+        if not state["done"] and pause:
+            await asyncio.sleep(pause)
+
+
+async def run_offboarding(
+    db: AsyncSession,
+    job: OffboardingJob,
+    batch_size: Optional[int] = None,
+    pause_ms: Optional[int] = None,
+    on_batch: Optional[Callable] = None,
+) -> OffboardingJob:
+    """Purge the tenant's rows, then the tenant. Safe to rerun on a job that stopped halfway."""
+    batch_size = batch_size or settings.OFFBOARD_BATCH_SIZE
+    pause = (settings.OFFBOARD_PAUSE_MS if pause_ms is None else pause_ms) / 1000
+    job_id, plan = job.id, purge_plan(job.tenant_id)
+    try:
+        for step in plan:
+            await _purge(db, job, step, batch_size, pause, on_batch)
+        # rows written behind a finished cursor, e.g. audit events queued before the tenant was
+        # disabled: random ids can land before `last`, so those tables are swept once more
+        for step in plan:
+            if (await db.execute(select(literal(1)).where(step.where).limit(1))).first() is not None:
+                job.progress = {**job.progress, step.table: {**job.progress[step.table], "done": False, "last": None}}
+                await _purge(db, job, step, batch_size, pause, on_batch)
+
+        await db.execute(delete(Tenant.__table__).where(Tenant.id == job.tenant_id))
+        job.status = "done"
+        job.finished_at = datetime.now(timezone.utc)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        await db.execute(
+            update(OffboardingJob).where(OffboardingJob.id == job_id).values(status="failed", error=f"{type(e).__name__}: {e}")
+        )
+        await db.commit()
+        logger.exception("Offboarding job %s failed", job_id)
+        raise
+    logger.info("Tenant %s offboarded (job %s)", job.subdomain, job.id, extra={"progress": job.progress})
+    return job
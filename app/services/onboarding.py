@@ -0,0 +1,134 @@
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.crud.bulk import copy_records, insert_ignore, select_in
+from app.crud.user import invite_hash
+from app.models.password_reset import PasswordReset
+from app.models.permissions import Permission
+from app.models.role_permissions import RolePermission
+from app.models.roles import Role
+from app.models.tenants import Tenant
+from app.models.user_roles import UserRole
+from app.models.user_tenants import UserTenant
+from app.models.users import User
+from app.schemas.tenants import TenantOnboard
+
+# Tenant onboarding from a template: a template names the roles every new tenant starts with
+# and the permissions each one grants. A batch of tenants is written in one transaction with
+# one bulk write per table. All ids are generated here, so nothing is read back between the
+# writes: tenants, roles, grants and memberships are new rows and go in with COPY on Postgres.
+#
+# Tenants are routed by an indexed lookup per request (TenantMiddleware), with no routing table
+# in process to fill: a tenant answers on its subdomain as soon as the transaction commits.
+
+TEMPLATES: dict[str, dict[str, list[str]]] = {
+    "default": {
+        "admin_tenant": ["read", "write"],
+        "manager": ["read", "write"],
+        "operator": ["read"],
+    },
+    "minimal": {
+        "admin_tenant": ["read", "write"],
+    },
+}
+ADMIN_ROLE = "admin_tenant"  # given to each spec's `admins`; every template has it
+
+TENANT_COLUMNS = ("id", "name", "subdomain", "code", "status", "custom_domain", "authz_version", "created_at", "updated_at")
+ROLE_COLUMNS = ("id", "tenant_id", "name", "description", "is_system", "created_at", "updated_at")
+MEMBER_COLUMNS = ("id", "user_id", "tenant_id", "is_active", "default_tenant", "created_at", "updated_at")
+
+
+async def onboard_tenants(db: AsyncSession, specs: Sequence[TenantOnboard], template: str = "default") -> dict:
+    """Create the tenants of `specs` with the roles of `template`. Subdomains that already exist are skipped."""
+    if template not in TEMPLATES:
+        raise ValueError(f"Unknown template: {template}")
+    grants = TEMPLATES[template]
+    now = datetime.now(timezone.utc)
+
+    # reruns are no-ops for tenants that already exist; other conflicts are errors
+    codes = [spec.code or spec.subdomain.upper() for spec in specs]
+    subdomains = [spec.subdomain for spec in specs]
+    taken = {subdomain for (subdomain,) in await select_in(db, [Tenant.subdomain], Tenant.subdomain, subdomains)}
+    taken_codes = {code for (code,) in await select_in(db, [Tenant.code], Tenant.code, codes)}
+    new, skipped, errors = [], [], []
+    for spec, code in zip(specs, codes):
+        if spec.subdomain in taken:
+            skipped.append(spec.subdomain)
+        elif code in taken_codes:
+            errors.append({"subdomain": spec.subdomain, "error": f"code {code} is taken"})
+        else:
+            taken.add(spec.subdomain)
+            taken_codes.add(code)
+            new.append((spec, code))
+
+    permission_names = sorted({name for names in grants.values() for name in names})
+    await insert_ignore(db, Permission, [
+        {"id": uuid.uuid4(), "name": name, "description": f"{name} access"} for name in permission_names
+    ], ["name"])
+    permission_ids = dict(await select_in(db, [Permission.name, Permission.id], Permission.name, permission_names))
+
+    tenants, roles, role_permissions, admin_role_ids, created = [], [], [], {}, []
+    for spec, code in new:
+        tenant_id = uuid.uuid4()
+        created.append((tenant_id, spec))
+        tenants.append((tenant_id, spec.name, spec.subdomain, code, True, spec.custom_domain, 0, now, now))
+        for role_name, names in grants.items():
+            role_id = uuid.uuid4()
+            roles.append((role_id, tenant_id, role_name, f"{role_name} role", True, now, now))
+            role_permissions.extend((uuid.uuid4(), role_id, permission_ids[name]) for name in names)
+            if role_name == ADMIN_ROLE:
+                admin_role_ids[tenant_id] = role_id
+
+    counts = {
+        "tenants": await copy_records(db, Tenant.__table__, TENANT_COLUMNS, tenants),
+        "roles": await copy_records(db, Role.__table__, ROLE_COLUMNS, roles),
+        "role_permissions": await copy_records(db, RolePermission.__table__, ("id", "role_id", "permission_id"), role_permissions),
+    }
+    invites = await _add_admins(db, created, admin_role_ids, now, counts)
+    await db.commit()
+    return {"counts": counts, "skipped": skipped, "errors": errors, "invites": invites}
+
+
+async def _add_admins(db: AsyncSession, tenants: list, admin_role_ids: dict, now: datetime, counts: dict) -> list[dict]:
+    emails = list(dict.fromkeys(email for _, spec in tenants for email in spec.admins))
+    if not emails:
+        return []
+
+    # accounts that do not exist yet are invited: a reset token each, redeemed with
+    # /api/auth/reset-password
+    user_ids = dict(await select_in(db, [User.email, User.id], User.email, emails))
+    new_ids = {email: uuid.uuid4() for email in emails if email not in user_ids}
+    if new_ids:
+        placeholder = await invite_hash()
+        counts["users"] = await insert_ignore(db, User, [
+            {"id": user_id, "email": email, "password_hash": placeholder, "is_active": True,
+             "is_superuser": False, "created_at": now, "updated_at": now}
+            for email, user_id in new_ids.items()
+        ], ["email"])
+        user_ids = dict(await select_in(db, [User.email, User.id], User.email, emails))
+
+    members, user_roles, first_tenant = [], [], set()
+    for tenant_id, spec in tenants:
+        for email in dict.fromkeys(spec.admins):
+            user_id, member_id = user_ids[email], uuid.uuid4()
+            # a new account's first tenant is its default one
+            default = user_id == new_ids.get(email) and email not in first_tenant
+            first_tenant.add(email)
+            members.append((member_id, user_id, tenant_id, True, default, now, now))
+            user_roles.append((uuid.uuid4(), member_id, admin_role_ids[tenant_id]))
+    counts["user_tenants"] = await copy_records(db, UserTenant.__table__, MEMBER_COLUMNS, members)
+    counts["user_roles"] = await copy_records(db, UserRole.__table__, ("id", "usertenant_id", "role_id"), user_roles)
+
+    invites = [
+        {"email": email, "token": secrets.token_urlsafe(32)}
+        for email, user_id in new_ids.items() if user_ids[email] == user_id
+    ]
+    expires_at = now + timedelta(hours=settings.INVITE_EXPIRE_HOURS)
+    counts["password_resets"] = await copy_records(
+        db, PasswordReset.__table__, ("id", "user_id", "token", "expires_at", "used", "created_at"),
+        [(uuid.uuid4(), user_ids[invite["email"]], invite["token"], expires_at, False, now) for invite in invites],
+    )
+    return invites
@@ -0,0 +1,298 @@
+import asyncio
+import codecs
+import csv
+import io
+import json
+import secrets
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterable, AsyncIterator, Optional
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.config import settings
+from app.crud.bulk import DEFAULT_BATCH_SIZE, chunked, insert_ignore, select_in
+from app.crud.user import hash_password_async, hash_passwords, invite_hash, verify_password_async
+from app.models.roles import Role
+from app.models.tenant_invitations import TenantInvitation
+from app.models.tenants import Tenant
+from app.models.user_roles import UserRole
+from app.models.user_tenants import UserTenant
+from app.models.users import User
+from app.schemas.users import BulkUserRow
+from app.services.api_keys import hash_secret
+from app.services.rbac import bump_authz_version
+
+# Bulk user provisioning for POST /api/users/bulk: one validating pass over the upload, the
+# passwords hashed on a thread pool of their own, then every table written with batched
+# INSERT ... ON CONFLICT DO NOTHING in one transaction. Rows that fail validation are
+# reported and skipped; the valid ones are still written.
+#
+# Each row is an invitation to the tenant, with a token the user redeems to join. New accounts
+# are created with the row's password; rows without one share invite_hash(), so inviting costs
+# no bcrypt per user, and the password is set when the invitation is accepted.
+
+CSV_TYPES = ("text/csv", "application/csv")
+CHUNK_SIZE = 64 * 1024
+
+
+def _media_type(content_type: Optional[str]) -> str:
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def _too_large():
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"At most {settings.BULK_USERS_MAX_BYTES} bytes per upload",
+    )
+
+
+def check_length(content_length: Optional[str]):
+    # refused before a byte is read when the client says how much is coming
+    if content_length and content_length.isdigit() and int(content_length) > settings.BULK_USERS_MAX_BYTES:
+        raise _too_large()
+
+
+async def limit_bytes(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > settings.BULK_USERS_MAX_BYTES:
+            raise _too_large()
+        yield chunk
+
+
+def _last_record_end(text: str) -> int:
+    # offset after the last newline outside quotes: one with an even number of quotes before
+    # it (escaped quotes are doubled, so they do not change the count's parity)
+    end = position = quotes = 0
+    for line in text.split("\n")[:-1]:
+        position += len(line) + 1
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            end = position
+    return end
+
+
+async def _csv_records(chunks: AsyncIterable[bytes]) -> AsyncIterator[list[str]]:
+    # records as their bytes arrive; a quoted field may span chunks
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    final = False
+    chunks = chunks.__aiter__()
+    while not final:
+        try:
+            chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            chunk, final = b"", True
+        try:
+            pending += decoder.decode(chunk, final=final)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV must be UTF-8")
+        cut = len(pending) if final else _last_record_end(pending)
+        if cut:
+            for record in csv.reader(io.StringIO(pending[:cut], newline="")):
+                if record:
+                    yield record
+            pending = pending[cut:]
+
+
+async def iter_rows(chunks: AsyncIterable[bytes], content_type: Optional[str]) -> AsyncIterator[tuple[int, object]]:
+    """(1-based row number, raw row) from a JSON array, {"users": [...]} or a CSV with a header line.
+
+    CSV rows are yielded as the upload is read; JSON is parsed once complete (within BULK_USERS_MAX_BYTES).
+    """
+    media_type = _media_type(content_type)
+    if media_type in CSV_TYPES:
+        header = None
+        number = 0
+        async for record in _csv_records(chunks):
+            if header is None:
+                header = record
+                if "email" not in header:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV needs a header line with an email column")
+                continue
+            number += 1
+            # empty cells mean "not given"; roles are ";"-separated
+            row = {key: value for key, value in zip(header, record) if key and value != ""}
+            if "roles" in row:
+                row["roles"] = [role.strip() for role in row["roles"].split(";") if role.strip()]
+            yield number, row
+        if header is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV needs a header line with an email column")
+    elif media_type == "application/json":
+        body = b"".join([chunk async for chunk in chunks])
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON")
+        if isinstance(payload, dict):
+            payload = payload.get("users")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Expected a list of users or {"users": [...]}')
+        for item in enumerate(payload, 1):
+            yield item
+    else:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Send application/json or text/csv")
+
+
+async def validate_rows(rows: AsyncIterable, role_ids: dict) -> tuple[list[tuple[int, BulkUserRow]], list[dict]]:
+    valid, errors, seen = [], [], set()
+    async for number, raw in rows:
+        if number > settings.BULK_USERS_MAX_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {settings.BULK_USERS_MAX_ROWS} users per upload",
+            )
+        try:
+            row = BulkUserRow.model_validate(raw)
+        except ValidationError as e:
+            email = raw.get("email") if isinstance(raw, dict) else None
+            messages = [f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors()]
+            errors.append({"row": number, "email": email, "errors": messages})
+            continue
+
+        problems = []
+        if row.email in seen:
+            problems.append("email: duplicate in this upload")
+        unknown = [role for role in row.roles if role not in role_ids]
+        if unknown:
+            problems.append(f"roles: unknown in this tenant: {', '.join(unknown)}")
+        if problems:
+            errors.append({"row": number, "email": row.email, "errors": problems})
+            continue
+        seen.add(row.email)
+        valid.append((number, row))
+    return valid, errors
+
+
+async def provision_users(db: AsyncSession, tenant: Tenant, chunks: AsyncIterable[bytes], content_type: Optional[str]) -> dict:
+    timings = {}
+    started = mark = time.perf_counter()
+
+    def lap(name: str):
+        nonlocal mark
+        now = time.perf_counter()
+        timings[name] = round((now - mark) * 1000, 1)
+        mark = now
+
+    result = await db.execute(select(Role.name, Role.id).where(Role.tenant_id == tenant.id))
+    role_ids = dict(result.all())
+    # the upload is read, parsed and validated in one pass; an oversized or overlong one stops early
+    valid, errors = await validate_rows(iter_rows(limit_bytes(chunks), content_type), role_ids)
+    total = len(valid) + len(errors)
+    lap("validate")
+
+    # Every accepted row becomes an invitation the user accepts (POST /api/auth/accept-invite),
+    # whether its email has an account or not: no tenant can attach another tenant's users, and
+    # the response is the same either way, so it does not tell which emails have accounts.
+    # Members of this tenant are errors; the admin can list those anyway.
+    emails = [row.email for _, row in valid]
+    user_ids = dict(await select_in(db, [User.email, User.id], User.email, emails))
+    members = {
+        user_id for (user_id,) in await select_in(
+            db, [UserTenant.user_id], UserTenant.user_id, list(user_ids.values()),
+            DEFAULT_BATCH_SIZE, UserTenant.tenant_id == tenant.id,
+        )
+    }
+    accepted = []
+    for number, row in valid:
+        if user_ids.get(row.email) in members:
+            errors.append({"row": number, "email": row.email, "errors": ["email: already a member of this tenant"]})
+        else:
+            accepted.append(row)
+    errors.sort(key=lambda error: error["row"])
+    new_rows = [row for row in accepted if row.email not in user_ids]
+    lap("lookup")
+
+    # bcrypt is the bulk of the work; its own pool keeps the login pool (BCRYPT_WORKERS) free
+    passwords = [row.password for row in new_rows if row.password is not None]
+    hashes = iter(await asyncio.to_thread(hash_passwords, passwords, settings.BULK_HASH_WORKERS or None))
+    placeholder = await invite_hash() if len(passwords) < len(new_rows) else None
+    lap("hash")
+
+    now = datetime.now(timezone.utc)
+    new_ids = {row.email: uuid.uuid4() for row in new_rows}
+    await insert_ignore(db, User, [
+        {"id": new_ids[row.email], "email": row.email, "full_name": row.full_name,
+         "password_hash": next(hashes) if row.password is not None else placeholder,
+         "is_active": True, "is_superuser": False, "created_at": now, "updated_at": now}
+        for row in new_rows
+    ], ["email"], DEFAULT_BATCH_SIZE)
+    # re-read: a concurrent insert of the same email wins, and its owner's password is the one that counts
+    user_ids = dict(await select_in(db, [User.email, User.id], User.email, [row.email for row in accepted]))
+
+    # a new upload replaces the pending invitations of the same users
+    for batch in chunked([user_ids[row.email] for row in accepted], DEFAULT_BATCH_SIZE):
+        await db.execute(delete(TenantInvitation).where(
+            TenantInvitation.tenant_id == tenant.id, TenantInvitation.user_id.in_(batch),
+        ))
+    invites = [{"email": row.email, "token": secrets.token_urlsafe(32)} for row in accepted]
+    expires_at = now + timedelta(hours=settings.INVITE_EXPIRE_HOURS)
+    await insert_ignore(db, TenantInvitation, [
+        {"id": uuid.uuid4(), "tenant_id": tenant.id, "user_id": user_ids[row.email],
+         "role_ids": [str(role_ids[role]) for role in dict.fromkeys(row.roles)],
+         "token_hash": hash_secret(invite["token"]),
+         "sets_password": row.password is None and user_ids[row.email] == new_ids.get(row.email),
+         "expires_at": expires_at, "created_at": now}
+        for row, invite in zip(accepted, invites)
+    ], ["tenant_id", "user_id"], DEFAULT_BATCH_SIZE)
+    await db.commit()
+    lap("insert")
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": total,
+        "invited": len(invites),
+        "failed": len(errors),
+        "errors": errors,
+        "invites": invites,
+        "timings": timings,
+        "rows_per_second": round(total / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+async def accept_invitation(db: AsyncSession, tenant: Tenant, token: str, password: str) -> User:
+    """Turn an invitation into a membership with its roles. The user proves the account is theirs
+    with its password, or sets the first one when the invitation created the account."""
+    result = await db.execute(
+        select(TenantInvitation, User)
+        .join(User, User.id == TenantInvitation.user_id)
+        .where(TenantInvitation.token_hash == hash_secret(token), TenantInvitation.tenant_id == tenant.id)
+    )
+    found = result.first()
+    # timestamptz columns come back aware, SQLite ones naive
+    expires_at = found[0].expires_at if found else None
+    if expires_at is not None and expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if found is None or expires_at < datetime.now(timezone.utc):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired invitation")
+
+    invitation, user = found
+    if invitation.sets_password:
+        user.password_hash = await hash_password_async(password)
+    elif not await verify_password_async(password, user.password_hash):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+
+    now = datetime.now(timezone.utc)
+    has_tenant = (await db.execute(select(UserTenant.id).where(UserTenant.user_id == user.id).limit(1))).first()
+    await insert_ignore(db, UserTenant, [
+        {"id": uuid.uuid4(), "user_id": user.id, "tenant_id": tenant.id, "is_active": True,
+         "default_tenant": has_tenant is None, "created_at": now, "updated_at": now},
+    ], ["user_id", "tenant_id"])
+    user_tenant_id = (await db.execute(
+        select(UserTenant.id).where(UserTenant.user_id == user.id, UserTenant.tenant_id == tenant.id)
+    )).scalar()
+    # roles deleted since the upload are skipped
+    role_ids = [uuid.UUID(role_id) for role_id in invitation.role_ids]
+    roles = await select_in(db, [Role.id], Role.id, role_ids, DEFAULT_BATCH_SIZE, Role.tenant_id == tenant.id)
+    await insert_ignore(db, UserRole, [
+        {"id": uuid.uuid4(), "usertenant_id": user_tenant_id, "role_id": role_id} for (role_id,) in roles
+    ], ["usertenant_id", "role_id"])
+    await db.delete(invitation)
+    await bump_authz_version(db, tenant.id)
+    await db.commit()
+    return user
@@ -0,0 +1,204 @@
+import bisect
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statement-level hooks on the engine. Each request (or test, or script block) gets a
+# QueryStats in a ContextVar; cursor events add to it and to every enclosing one, so a
+# test's query budget still sees the statements of the requests it makes.
+
+STATEMENT_TEXT_LIMIT = 500
+EXPLAINABLE = ("select", "with", "update", "delete", "insert")
+
+
+class QueryStats:
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.total = 0.0
+        self.slowest = (0.0, None)
+        self.statements: Counter = Counter()
+        self.slow: list[tuple[float, str, object]] = []
+        self.dialect = None
+
+    def record(self, statement: str, elapsed: float, dialect: str):
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.total += elapsed
+            stats.statements[statement] += 1
+            stats.dialect = dialect
+            if elapsed > stats.slowest[0]:
+                stats.slowest = (elapsed, statement)
+            stats = stats.parent
+
+    def repeated(self, threshold: int = None) -> list[tuple[str, int]]:
+        # the same statement text over and over within one request is the usual N+1 signature
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        return [(stmt, n) for stmt, n in self.statements.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        lines = [f"{self.count} statements, {self.total * 1000:.2f} ms in the database"]
+        for stmt, n in self.statements.most_common():
+            lines.append(f"  {n:>4}x  {shorten(stmt)}")
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def capture_queries():
+    # with capture_queries() as stats: ...  -> stats.count, stats.total, stats.report()
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+# --- histograms ---
+
+class Histogram:
+    """Cumulative bucket counts, Prometheus style: counts[i] are observations <= bounds[i]."""
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.buckets[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, running = [], 0
+            for n in self.buckets:
+                running += n
+                cumulative.append(running)
+            return {"bounds": list(self.bounds), "cumulative": cumulative, "count": self.count, "sum": self.sum}
+
+
+statement_seconds = Histogram((0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+request_statements = Histogram((1, 2, 3, 5, 8, 13, 21, 34, 55, 89))
+
+
+class RouteQueryStats:
+    """Per (method, route) totals of statements and DB time, for the requests QueryStatsMiddleware saw."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: dict[tuple[str, str], dict] = {}
+
+    def record(self, method: str, route: str, stats: QueryStats):
+        with self._lock:
+            row = self._routes.get((method, route))
+            if row is None:
+                row = self._routes[(method, route)] = {
+                    "requests": 0, "statements": 0, "max_statements": 0,
+                    "db_seconds": 0.0, "max_db_seconds": 0.0, "slowest": (0.0, None),
+                }
+            row["requests"] += 1
+            row["statements"] += stats.count
+            row["max_statements"] = max(row["max_statements"], stats.count)
+            row["db_seconds"] += stats.total
+            row["max_db_seconds"] = max(row["max_db_seconds"], stats.total)
+            if stats.slowest[0] > row["slowest"][0]:
+                row["slowest"] = stats.slowest
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "method": method,
+                    "route": route,
+                    "requests": row["requests"],
+                    "statements_mean": row["statements"] / row["requests"],
+                    "statements_max": row["max_statements"],
+                    "db_ms_mean": row["db_seconds"] / row["requests"] * 1000,
+                    "db_ms_max": row["max_db_seconds"] * 1000,
+                    "slowest_ms": row["slowest"][0] * 1000,
+                    "slowest_statement": shorten(row["slowest"][1]) if row["slowest"][1] else None,
+                }
+                for (method, route), row in sorted(self._routes.items(), key=lambda item: item[0][1])
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_query_stats = RouteQueryStats()
+
+
+# --- engine hooks ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # the execution context lives exactly as long as the statement, so a failed one leaves nothing behind
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    statement_seconds.observe(elapsed)
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed, conn.dialect.name)
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS and not statement.startswith("EXPLAIN "):
+        if stats is not None and settings.SLOW_QUERY_EXPLAIN and not executemany:
+            # EXPLAIN runs after the request on its own connection, never inside this hook
+            stats.slow.append((elapsed, statement, parameters))
+        else:
+            logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, shorten(statement))
+
+
+def install(engine):
+    # engine may be an AsyncEngine; events live on the sync engine underneath
+    target = getattr(engine, "sync_engine", engine)
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+async def explain_slow_queries(engine, stats: QueryStats, route: str, tenant: Optional[str]):
+    for elapsed, statement, parameters in stats.slow:
+        plan = None
+        if statement.lstrip().lower().startswith(EXPLAINABLE):
+            prefix = "EXPLAIN QUERY PLAN " if stats.dialect == "sqlite" else "EXPLAIN "
+            try:
+                async with engine.connect() as conn:
+                    result = await conn.exec_driver_sql(prefix + statement, parameters)
+                    plan = "\n".join(" ".join(str(col) for col in row) for row in result.all())
+            except Exception:
+                logger.debug("EXPLAIN failed for slow query", exc_info=True)
+        logger.warning(
+            "Slow query (%.1f ms) route=%s tenant=%s: %s%s",
+            elapsed * 1000, route, tenant, shorten(statement), f"\n{plan}" if plan else "",
+        )
+    stats.slow.clear()
+
+
+def shorten(statement: str) -> str:
+    flat = " ".join(statement.split())
+    return flat if len(flat) <= STATEMENT_TEXT_LIMIT else flat[:STATEMENT_TEXT_LIMIT] + "..."
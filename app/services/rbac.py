@@ -1,7 +1,7 @@
 from fastapi import Depends, HTTPException, status, Request
-from typing import Annotated
+from typing import Annotated, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import and_
+from sqlalchemy import and_, update
 from sqlalchemy.future import select
 from app.db import get_db
 from app.models.user_tenants import UserTenant
@@ -9,12 +9,17 @@ from app.models.tenants import Tenant
 from app.models.user_roles import UserRole
 from app.models.permissions import Permission
 from app.models.role_permissions import RolePermission
-from app.services.auth import get_current_user_object, get_current_user
+from app.services.auth import get_current_user_object, get_current_user, optional_oauth2_scheme
+from app.services.api_keys import api_key_header, check_api_key_permission
 from app.crud.user import get_user_roles
 from app.services.tenant import get_current_tenant
+from app.services.audit import audit_writer
+from app.services.timing import phase, timed
+from app.services.tracing import span, traced
 from uuid import UUID
 
 
+@timed("rbac")
 async def user_has_permission(db: AsyncSession, user_tenant_id: UUID, permission_name: str) -> bool:
     stmt = await db.execute(
         select(Permission)
@@ -27,27 +32,76 @@ async def user_has_permission(db: AsyncSession, user_tenant_id: UUID, permission
     return permission is not None
 
 
+async def bump_authz_version(db: AsyncSession, tenant_id: UUID):
+    # Call in the same transaction as any membership, role or permission change in the tenant:
+    # ETags of /me and tenant-data responses embed the version, so cached answers go stale with it.
+    await db.execute(
+        update(Tenant).where(Tenant.id == tenant_id).values(authz_version=Tenant.authz_version + 1)
+    )
+
+
+async def check_permission(db: AsyncSession, user, tenant: Tenant, permission_name: str) -> bool:
+    with span("check_permission", permission=permission_name):
+        with phase("rbac"):
+            stmt = await db.execute(
+                select(UserTenant)
+                .where(and_(UserTenant.user_id == user.id, UserTenant.tenant_id == tenant.id))
+            )
+            user_tenant = stmt.scalars().first()
+        if not user_tenant or not await user_has_permission(db, user_tenant.id, permission_name):
+            await audit_writer.log("authz.permission_denied", tenant.id, user.id, metadata={"permission": permission_name})
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
+    return True
+
+
+class Caller:
+    # who is calling: a bearer token's user, or a machine client's raw X-API-Key
+    __slots__ = ("user", "api_key")
+
+    def __init__(self, user=None, api_key: Optional[str] = None):
+        self.user = user
+        self.api_key = api_key
+
+
+async def get_caller(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    api_key: Annotated[Optional[str], Depends(api_key_header)],
+    token: Annotated[Optional[str], Depends(optional_oauth2_scheme)],
+) -> Caller:
+    # an X-API-Key wins; the key itself is verified by authorize(), against the permission asked for
+    if api_key:
+        return Caller(api_key=api_key)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return Caller(user=await get_current_user(token, db))
+
+
+async def authorize(db: AsyncSession, caller: Caller, tenant: Tenant, permission_name: str) -> bool:
+    # API key scopes are permission names; users get theirs through their roles in the tenant
+    if caller.api_key:
+        return await check_api_key_permission(db, caller.api_key, tenant, permission_name)
+    return await check_permission(db, caller.user, tenant, permission_name)
+
+
 def requires_permission(permission_name: str):
+    @traced(f"requires_permission:{permission_name}")
     async def permission_checker(
         db: Annotated[AsyncSession, Depends(get_db)],
         tenant: Annotated[Tenant, Depends(get_current_tenant)],
-        user=Depends(get_current_user)  
+        caller: Annotated[Caller, Depends(get_caller)],
     ):
-        
-        stmt = await db.execute(
-            select(UserTenant)
-            .where(and_(UserTenant.user_id == user.id, UserTenant.tenant_id == tenant.id))
-        )
-        user_tenant = stmt.scalars().first()
-        if not user_tenant or not await user_has_permission(db, user_tenant.id, permission_name):
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
-        return True
+        return await authorize(db, caller, tenant, permission_name)
 
     return permission_checker
 
 
 
 def role_checker(*roles: str):
+    @traced("role_checker")
     async def role_checker(
         request: Request,
         db: AsyncSession = Depends(get_db),
@@ -57,9 +111,10 @@ def role_checker(*roles: str):
         if not tenant:
             raise HTTPException(status_code=400, detail="Tenant not resolved")
 
-        user_roles = await get_user_roles(db, current_user["user_id"], tenant.id)
+        user_roles = await get_user_roles(db, UUID(current_user["user_id"]), tenant.id)
 
         if not any(role in user_roles for role in roles):
+            await audit_writer.log("authz.role_denied", tenant.id, current_user["user_id"], metadata={"roles": list(roles)})
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions"
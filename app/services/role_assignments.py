@@ -0,0 +1,95 @@
+import uuid
+from typing import Literal, Sequence
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.bulk import DEFAULT_BATCH_SIZE, insert_ignore, select_in
+from app.models.permissions import Permission
+from app.models.role_permissions import RolePermission
+from app.models.roles import Role
+from app.models.user_roles import UserRole
+from app.models.user_tenants import UserTenant
+from app.services.rbac import bump_authz_version
+
+# Set-based role and permission assignment. Each operation resolves its names and ids with one
+# query per kind, then writes the whole cross product at once: assign is a multi-row
+# INSERT ... ON CONFLICT DO NOTHING, revoke one DELETE ... IN, replace a DELETE of what is not
+# wanted followed by the assign. authz_version is bumped once per operation that changed rows,
+# which invalidates the cached /me and tenant-data answers of the whole tenant.
+
+Operation = Literal["assign", "revoke", "replace"]
+
+
+def _require_all(kind: str, wanted: Sequence, found: dict):
+    missing = [str(key) for key in wanted if key not in found]
+    if missing:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown {kind}: {', '.join(missing)}")
+
+
+async def _member_ids(db: AsyncSession, tenant_id: UUID, user_ids: Sequence[UUID]) -> dict:
+    found = dict(await select_in(
+        db, [UserTenant.user_id, UserTenant.id], UserTenant.user_id, user_ids,
+        DEFAULT_BATCH_SIZE, UserTenant.tenant_id == tenant_id,
+    ))
+    _require_all("members", user_ids, found)
+    return found
+
+
+async def _role_ids(db: AsyncSession, tenant_id: UUID, names: Sequence[str]) -> dict:
+    found = dict(await select_in(db, [Role.name, Role.id], Role.name, names, DEFAULT_BATCH_SIZE, Role.tenant_id == tenant_id))
+    _require_all("roles", names, found)
+    return found
+
+
+async def _permission_ids(db: AsyncSession, names: Sequence[str]) -> dict:
+    found = dict(await select_in(db, [Permission.name, Permission.id], Permission.name, names))
+    _require_all("permissions", names, found)
+    return found
+
+
+async def _apply(db: AsyncSession, tenant_id: UUID, model, owner: str, target: str,
+                 owner_ids: list, target_ids: list, operation: Operation) -> dict:
+    if not target_ids and operation != "replace":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Nothing to {operation}")
+    owner_col, target_col = getattr(model, owner), getattr(model, target)
+    added = removed = 0
+    if operation == "revoke":
+        result = await db.execute(delete(model).where(owner_col.in_(owner_ids), target_col.in_(target_ids)))
+        removed = result.rowcount
+    else:
+        if operation == "replace":
+            stmt = delete(model).where(owner_col.in_(owner_ids))
+            if target_ids:
+                stmt = stmt.where(target_col.notin_(target_ids))
+            removed = (await db.execute(stmt)).rowcount
+        added = await insert_ignore(db, model, [
+            {"id": uuid.uuid4(), owner: owner_id, target: target_id}
+            for owner_id in owner_ids
+            for target_id in target_ids
+        ], [owner, target])
+
+    if added or removed:
+        await bump_authz_version(db, tenant_id)
+    await db.commit()
+    return {"added": added, "removed": removed}
+
+
+async def apply_user_roles(db: AsyncSession, tenant_id: UUID, operation: Operation,
+                           user_ids: Sequence[UUID], role_names: Sequence[str]) -> dict:
+    """assign/revoke `role_names` to/from every user, or make them the users' only roles (replace)."""
+    user_ids, role_names = list(dict.fromkeys(user_ids)), list(dict.fromkeys(role_names))
+    members = await _member_ids(db, tenant_id, user_ids)
+    roles = await _role_ids(db, tenant_id, role_names) if role_names else {}
+    return await _apply(db, tenant_id, UserRole, "usertenant_id", "role_id",
+                        list(members.values()), list(roles.values()), operation)
+
+
+async def apply_role_permissions(db: AsyncSession, tenant_id: UUID, operation: Operation,
+                                 role_names: Sequence[str], permission_names: Sequence[str]) -> dict:
+    """assign/revoke `permission_names` on every role, or make them the roles' only permissions (replace)."""
+    role_names, permission_names = list(dict.fromkeys(role_names)), list(dict.fromkeys(permission_names))
+    roles = await _role_ids(db, tenant_id, role_names)
+    permissions = await _permission_ids(db, permission_names) if permission_names else {}
+    return await _apply(db, tenant_id, RolePermission, "role_id", "permission_id",
+                        list(roles.values()), list(permissions.values()), operation)
@@ -1,39 +1,52 @@
 from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import Annotated
+from typing import Annotated, Optional
 from app.models.tenants import Tenant
 from app.db import get_db
 from app.config import settings
+from app.services.timing import phase
+from app.services.tracing import traced
 
 
-async def get_current_tenant(
-    request: Request,
-    db: Annotated[AsyncSession, Depends(get_db)]
-) -> Tenant:
-    host = request.headers.get("host")  
-    if not host:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Host header missing")
+def parse_host(host: str) -> tuple[str, str]:
+    # "acme.example.com:8000" -> ("acme.example.com", "acme")
+    hostname = host.split(":")[0]  # strip port
 
     # --- dev fallback ---
-    hostname = host.split(":")[0]  
     if settings.PROD_ENV == "prod" and hostname in ["localhost", "127.0.0.1"]:
-        subdomain = "public"  
-    else:
-        parts = hostname.split(".")
-        if len(parts) < 3:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid host format")
-        subdomain = parts[0]
+        return hostname, settings.DEFAULT_DEV_TENANT or "public"
     # -------------------
 
+    parts = hostname.split(".")
+    if len(parts) < 3:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid host format")
+    return hostname, parts[0]
+
+
+async def get_tenant_by_host(db: AsyncSession, subdomain: str, hostname: str) -> Optional[Tenant]:
     result = await db.execute(
         select(Tenant).where(
             (Tenant.subdomain == subdomain) | (Tenant.custom_domain == hostname)
         )
     )
-    tenant = result.scalars().first()
+    return result.scalars().first()
+
+
+@traced("get_current_tenant")
+async def get_current_tenant(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)]
+) -> Tenant:
+    host = request.headers.get("host")
+    if not host:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Host header missing")
+
+    hostname, subdomain = parse_host(host)
+    with phase("tenant"):
+        tenant = await get_tenant_by_host(db, subdomain, hostname)
 
     if not tenant:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tenant not found")
 
-    return tenant
\ No newline at end of file
+    return tenant
@@ -0,0 +1,180 @@
+import functools
+import inspect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+# Per-request phase timers. A request is only timed when the ServerTiming middleware
+# installs a RequestTimings in the context; otherwise phase()/timed() cost one
+# ContextVar lookup and nothing is recorded.
+
+
+class RequestTimings:
+    __slots__ = ("started", "phases")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, list] = {}  # name -> [seconds, calls]
+
+    def add(self, name: str, elapsed: float):
+        entry = self.phases.get(name)
+        if entry is None:
+            self.phases[name] = [elapsed, 1]
+        else:
+            entry[0] += elapsed
+            entry[1] += 1
+
+    def server_timing(self, total: float) -> str:
+        parts = []
+        accounted = 0.0
+        for name, (elapsed, calls) in self.phases.items():
+            accounted += elapsed
+            desc = f';desc="{calls} calls"' if calls > 1 else ""
+            parts.append(f"{name};dur={elapsed * 1000:.2f}{desc}")
+        # whatever the instrumented phases do not cover: handler code, serialization, framework
+        parts.append(f"other;dur={max(total - accounted, 0.0) * 1000:.2f}")
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request() -> tuple[RequestTimings, object]:
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+class _PhaseTimer:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings: RequestTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.add(self.name, time.perf_counter() - self.start)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def phase(name: str):
+    # with phase("tenant"): ...  (sync or async with)
+    timings = _current.get()
+    if timings is None:
+        return _NULL_TIMER
+    return _PhaseTimer(timings, name)
+
+
+def timed(name: str):
+    # decorator form of phase() for leaf functions: bcrypt, JWT, RBAC queries
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                timings = _current.get()
+                if timings is None:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    timings.add(name, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.add(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# --- per-route aggregates ---
+
+class RouteStats:
+    """Running totals per (method, route template) and phase, for timed requests only."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: dict[tuple[str, str], dict] = {}
+
+    def record(self, method: str, route: str, timings: RequestTimings, total: float):
+        with self._lock:
+            stats = self._routes.get((method, route))
+            if stats is None:
+                stats = self._routes[(method, route)] = {"requests": 0, "total": [0.0, 0.0], "phases": {}}
+            stats["requests"] += 1
+            _accumulate(stats["total"], total)
+            for name, (elapsed, _) in timings.phases.items():
+                _accumulate(stats["phases"].setdefault(name, [0.0, 0.0]), elapsed)
+
+    def snapshot(self) -> list[dict]:
+        # seconds -> milliseconds; mean is per request, over requests that were timed
+        with self._lock:
+            rows = []
+            for (method, route), stats in sorted(self._routes.items(), key=lambda item: item[0][1]):
+                n = stats["requests"]
+                rows.append({
+                    "method": method,
+                    "route": route,
+                    "requests": n,
+                    "total_ms": _summary(stats["total"], n),
+                    "phases_ms": {name: _summary(values, n) for name, values in stats["phases"].items()},
+                })
+            return rows
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+def _accumulate(values: list, elapsed: float):
+    values[0] += elapsed
+    values[1] = max(values[1], elapsed)
+
+
+def _summary(values: list, requests: int) -> dict:
+    return {"mean": values[0] / requests * 1000 if requests else 0.0, "max": values[1] * 1000}
+
+
+route_stats = RouteStats()
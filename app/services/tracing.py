@@ -0,0 +1,303 @@
+import functools
+import inspect
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from app.config import settings
+
+# Span-based tracing without an SDK. A sampled request gets a Trace holding all of its
+# spans; the active span lives in a ContextVar so span()/traced() nest under it. Unsampled
+# requests never create a Trace, and span()/traced() then cost one ContextVar lookup.
+# Finished traces go to an exporter: in memory (default) or one JSON line per trace.
+#
+# Propagation follows W3C Trace Context: an incoming `traceparent` continues the caller's
+# trace, and its sampled flag decides sampling when TRACE_RESPECT_PARENT is on.
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple[str, str, bool]]:
+    # "00-<trace id>-<parent span id>-<flags>" -> (trace id, parent id, sampled)
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if not match:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 0x01)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start", "end", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Optional[dict] = None):
+        self.trace = trace
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+        trace.spans.append(self)
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    def to_dict(self) -> dict:
+        end = self.end if self.end is not None else time.perf_counter()
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_us": round((self.start - self.trace.started) * 1e6, 1),
+            "duration_us": round((end - self.start) * 1e6, 1),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace.trace_id}-{self.span_id}-01"
+
+
+class Trace:
+    __slots__ = ("trace_id", "started", "wall_started", "spans")
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or _new_trace_id()
+        self.started = time.perf_counter()
+        self.wall_started = time.time()
+        self.spans: list[Span] = []
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.wall_started,
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_traceparent() -> Optional[str]:
+    # for outgoing calls: continues this request's trace in the callee
+    span = _current.get()
+    return span.traceparent if span is not None else None
+
+
+# --- sampling ---
+
+def should_sample(parent: Optional[tuple[str, str, bool]]) -> bool:
+    if parent is not None and settings.TRACE_RESPECT_PARENT:
+        return parent[2]
+    rate = settings.TRACE_SAMPLE_RATE
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+def start_trace(name: str, traceparent: Optional[str] = None, attributes: Optional[dict] = None):
+    """Root span for a request, or (None, None) when the request is not sampled."""
+    parent = parse_traceparent(traceparent)
+    if not should_sample(parent):
+        return None, None
+    trace = Trace(parent[0] if parent else None)
+    root = Span(trace, name, parent[1] if parent else None, attributes)
+    return root, _current.set(root)
+
+
+def end_trace(root: Span, token):
+    _current.reset(token)
+    root.finish()
+    exporter().export(root.trace)
+
+
+# --- spans ---
+
+class _SpanContext:
+    __slots__ = ("parent", "name", "attributes", "span", "token")
+
+    def __init__(self, parent: Span, name: str, attributes: Optional[dict]):
+        self.parent = parent
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        self.span = Span(self.parent.trace, self.name, self.parent.span_id, self.attributes)
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self.token)
+        if exc_type is not None:
+            self.span.error = exc_type.__name__
+        self.span.finish()
+        return False
+
+    async def __aenter__(self) -> Span:
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+
+class _NullSpanContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpanContext()
+
+
+def span(name: str, **attributes):
+    # with span("tenant.lookup", subdomain=...) as s: ...   (s is None when not sampled)
+    parent = _current.get()
+    if parent is None:
+        return _NULL_SPAN
+    return _SpanContext(parent, name, attributes or None)
+
+
+def traced(name: str):
+    # decorator form of span(); keeps the signature, so it is safe on FastAPI dependencies
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current.get() is None:
+                    return await func(*args, **kwargs)
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- SQL ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current.get()
+    if parent is not None and context is not None:
+        # leaf span: never made current, a statement has no children
+        context._trace_span = Span(
+            parent.trace, "sql", parent.span_id,
+            {"db.system": conn.dialect.name, "db.statement": statement[:300]},
+        )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    sql_span = getattr(context, "_trace_span", None)
+    if sql_span is not None:
+        sql_span.finish()
+
+
+def _handle_error(exception_context):
+    sql_span = getattr(exception_context.execution_context, "_trace_span", None)
+    if sql_span is not None:
+        sql_span.error = type(exception_context.original_exception).__name__
+        sql_span.finish()
+
+
+def install(engine):
+    target = getattr(engine, "sync_engine", engine)
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        event.listen(target, "handle_error", _handle_error)
+
+
+# --- exporters ---
+
+class InMemoryExporter:
+    """Keeps the last `limit` traces; for tests and for poking at a dev server."""
+
+    def __init__(self, limit: int = 1000):
+        self.traces: deque = deque(maxlen=limit)
+
+    def export(self, trace: Trace):
+        self.traces.append(trace.to_dict())
+
+    def get(self, trace_id: str) -> Optional[dict]:
+        for trace in reversed(self.traces):
+            if trace["trace_id"] == trace_id:
+                return trace
+        return None
+
+    def clear(self):
+        self.traces.clear()
+
+
+class JsonlExporter:
+    """Appends one JSON line per trace; read it back with scripts/trace_viewer.py."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def export(self, trace: Trace):
+        line = json.dumps(trace.to_dict(), default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+memory_exporter = InMemoryExporter(settings.TRACE_MEMORY_LIMIT)
+_jsonl_exporters: dict[str, JsonlExporter] = {}
+
+
+def exporter():
+    if settings.TRACE_EXPORTER == "jsonl":
+        path = settings.TRACE_FILE
+        if path not in _jsonl_exporters:
+            _jsonl_exporters[path] = JsonlExporter(path)
+        return _jsonl_exporters[path]
+    return memory_exporter
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.crud.user import get_user_by_email, get_user_roles, warm_up_bcrypt
+from app.models.users import User
+from app.services.rbac import user_has_permission
+from app.services.tenant import get_tenant_by_host
+
+logger = logging.getLogger(__name__)
+
+# Work the first requests on a fresh worker would otherwise pay for: opening pool
+# connections, compiling the hot statements (SQLAlchemy's compiled cache is per engine,
+# asyncpg's prepared statement cache per connection) and loading passlib's bcrypt backend.
+# Runs in the background from the lifespan; /ready answers 503 until it has finished.
+
+# never matches a row: warmup only needs the statements, not results
+_NO_ID = uuid.UUID(int=0)
+_NO_NAME = "warmup.invalid"
+
+
+class WarmupState:
+    def __init__(self):
+        self.ready = False
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.steps: dict[str, float] = {}  # step -> ms
+        self.error: Optional[str] = None
+
+    def reset(self):
+        self.__init__()
+
+    def as_dict(self) -> dict:
+        elapsed = None
+        if self.started is not None and self.finished is not None:
+            elapsed = round((self.finished - self.started) * 1000, 1)
+        return {"ready": self.ready, "ms": elapsed, "steps": self.steps, "error": self.error}
+
+
+state = WarmupState()
+
+
+async def _hot_statements(db: AsyncSession):
+    # the lookups behind tenant routing, token auth and permission checks, called through
+    # the same functions as the request path so the statements are identical
+    await get_tenant_by_host(db, _NO_NAME, _NO_NAME)
+    await get_user_by_email(db, _NO_NAME)
+    await db.get(User, _NO_ID)
+    await get_user_roles(db, _NO_ID, _NO_ID)
+    await user_has_permission(db, _NO_ID, _NO_NAME)
+
+
+async def warm_connections(engine, connections: int):
+    # Checked out together, so the pool really opens `connections` distinct ones; capped at
+    # the pool size, since overflow connections are closed again when returned.
+    size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    opened = [await engine.connect() for _ in range(max(min(connections, size), 1))]
+    try:
+        for conn in opened:
+            async with AsyncSession(bind=conn) as db:
+                await _hot_statements(db)
+    finally:
+        for conn in opened:
+            await conn.close()
+
+
+async def _step(name: str, coro):
+    started = time.perf_counter()
+    await coro
+    state.steps[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+async def run(engine=None):
+    """Warm the worker up, then mark it ready. Failures are logged, never raised."""
+    if engine is None:
+        from app.db import engine
+    state.reset()
+    state.started = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                _step("db", warm_connections(engine, settings.WARMUP_CONNECTIONS)),
+                _step("bcrypt", warm_up_bcrypt()),
+            ),
+            timeout=settings.WARMUP_TIMEOUT,
+        )
+    except Exception as e:
+        # a cold worker still serves correctly; do not keep it out of rotation for good
+        state.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        logger.warning("Warmup failed, marking ready anyway: %s", state.error)
+    state.finished = time.perf_counter()
+    state.ready = True
+    logger.info("Warmup finished in %.1f ms", (state.finished - state.started) * 1000, extra={"steps": dict(state.steps)})
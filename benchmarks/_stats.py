@@ -0,0 +1,27 @@
+import statistics
+
+
+def percentile(sorted_samples: list[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    k = (len(sorted_samples) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_samples) - 1)
+    return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (k - lo)
+
+
+def summarize(samples: list[float], unit_scale: float = 1e6) -> dict:
+    # samples are seconds; the summary is reported in microseconds by default
+    ordered = sorted(samples)
+    if not ordered:
+        return {"n": 0}
+    return {
+        "n": len(ordered),
+        "mean": statistics.fmean(ordered) * unit_scale,
+        "stdev": (statistics.stdev(ordered) if len(ordered) > 1 else 0.0) * unit_scale,
+        "min": ordered[0] * unit_scale,
+        "p50": percentile(ordered, 50) * unit_scale,
+        "p95": percentile(ordered, 95) * unit_scale,
+        "p99": percentile(ordered, 99) * unit_scale,
+        "max": ordered[-1] * unit_scale,
+    }
@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.services.audit_partitions import ensure_partitions
+from benchmarks._stats import summarize
+
+# "last 24h for tenant X", the query the audit API and admin screens run most
+LAST_DAY_QUERY = text(
+    "SELECT id, action, entity, created_at FROM audit_logs "
+    "WHERE tenant_id = :tenant_id AND created_at >= now() - interval '24 hours' "
+    "ORDER BY created_at DESC LIMIT 100"
+)
+LAST_DAY_COUNT = text(
+    "SELECT count(*) FROM audit_logs "
+    "WHERE tenant_id = :tenant_id AND created_at >= now() - interval '24 hours'"
+)
+
+
+async def populate(engine, rows: int, tenants: int, days: int, chunk: int):
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO tenants (id, name, subdomain, code, status) "
+            "SELECT gen_random_uuid(), 'Audit bench ' || g, 'bench-q-' || g, 'BENCH-Q-' || g, true "
+            "FROM generate_series(1, CAST(:n AS integer)) g ON CONFLICT (subdomain) DO NOTHING"
+        ), {"n": tenants})
+        await conn.run_sync(ensure_partitions, settings.AUDIT_PARTITIONS_AHEAD, days // 28 + 1)
+
+    # rows are generated server-side in created_at order, like an append-only audit stream
+    step = days * 86400 / rows
+    started = time.perf_counter()
+    for offset in range(0, rows, chunk):
+        size = min(chunk, rows - offset)
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "WITH t AS (SELECT array_agg(id ORDER BY subdomain) AS ids FROM tenants WHERE subdomain LIKE 'bench-q-%') "
+                "INSERT INTO audit_logs (id, tenant_id, action, entity, created_at) "
+                "SELECT gen_random_uuid(), t.ids[1 + ((g::bigint * 2654435761) % array_length(t.ids, 1))::int], "
+                "(ARRAY['auth.login', 'auth.refresh', 'auth.logout', 'authz.permission_denied'])[1 + g % 4], 'user', "
+                "now() - make_interval(days => CAST(:days AS integer)) + make_interval(secs => g * CAST(:step AS double precision)) "
+                "FROM t, generate_series(CAST(:lo AS bigint), CAST(:hi AS bigint)) g"
+            ), {"days": days, "step": step, "lo": offset + 1, "hi": offset + size})
+        print(f"populated {offset + size:,}/{rows:,} rows ({(offset + size) / (time.perf_counter() - started):,.0f} rows/s)")
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE audit_logs"))
+
+
+async def run_queries(engine, queries: int, seed: int) -> dict:
+    async with engine.connect() as conn:
+        tenant_ids = (await conn.execute(text("SELECT id FROM tenants WHERE subdomain LIKE 'bench-q-%'"))).scalars().all()
+        total = (await conn.execute(text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'audit_logs'"))).scalar()
+        if not tenant_ids:
+            raise SystemExit("No bench tenants found, run with --populate first")
+
+        rng = random.Random(seed)
+        picks = [rng.choice(tenant_ids) for _ in range(queries)]
+
+        # warm the plan cache and shared buffers once
+        await conn.execute(LAST_DAY_QUERY, {"tenant_id": picks[0]})
+
+        page, count = [], []
+        for tenant_id in picks:
+            start = time.perf_counter()
+            (await conn.execute(LAST_DAY_QUERY, {"tenant_id": tenant_id})).all()
+            page.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await conn.execute(LAST_DAY_COUNT, {"tenant_id": tenant_id})
+            count.append(time.perf_counter() - start)
+
+        plan = (await conn.execute(
+            text("EXPLAIN (ANALYZE, BUFFERS) " + LAST_DAY_QUERY.text), {"tenant_id": picks[0]}
+        )).scalars().all()
+
+    return {
+        "approx_rows": total,
+        "tenants": len(tenant_ids),
+        "last_24h_page_ms": summarize(page, unit_scale=1e3),
+        "last_24h_count_ms": summarize(count, unit_scale=1e3),
+        "plan": plan,
+    }
+
+
+async def main(args):
+    engine = create_async_engine(args.db_url, future=True)
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("The audit query benchmark needs PostgreSQL")
+
+    if args.populate:
+        await populate(engine, args.rows, args.tenants, args.days, args.chunk)
+    report = await run_queries(engine, args.queries, args.seed)
+    await engine.dispose()
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-tenant time-range query latency on audit_logs")
+    parser.add_argument("--db-url", default=settings.DB_URL)
+    parser.add_argument("--populate", action="store_true", help="generate rows before querying")
+    parser.add_argument("--rows", type=int, default=100_000_000)
+    parser.add_argument("--tenants", type=int, default=1_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--chunk", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.models import AuditLog, Base, Tenant
+from app.services.audit import AuditWriter
+from benchmarks._stats import summarize
+
+
+async def ensure_bench_tenant(SessionLocal) -> uuid.UUID:
+    async with SessionLocal() as db:
+        result = await db.execute(select(Tenant.id).where(Tenant.subdomain == "bench-audit"))
+        tenant_id = result.scalar()
+        if tenant_id is None:
+            tenant_id = uuid.uuid4()
+            db.add(Tenant(id=tenant_id, name="Audit bench", subdomain="bench-audit", code="BENCH-AUDIT", status=True))
+            await db.commit()
+        return tenant_id
+
+
+async def bench_inline(SessionLocal, tenant_id, n: int) -> list[float]:
+    # what every auth call would pay if it wrote its audit row in the request transaction
+    samples = []
+    async with SessionLocal() as db:
+        for i in range(n):
+            start = time.perf_counter()
+            db.add(AuditLog(
+                id=uuid.uuid4(), tenant_id=tenant_id, action="bench.inline",
+                meta_data={"i": i}, created_at=datetime.now(timezone.utc),
+            ))
+            await db.commit()
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def bench_writer(SessionLocal, tenant_id, n: int, args) -> dict:
+    writer = AuditWriter(
+        session_factory=SessionLocal,
+        maxsize=args.queue_size,
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval_ms / 1000,
+        overflow_policy=args.policy,
+    )
+    await writer.start()
+
+    samples = []
+    start = time.perf_counter()
+    for i in range(n):
+        t0 = time.perf_counter()
+        await writer.log("bench.queued", tenant_id, metadata={"i": i})
+        samples.append(time.perf_counter() - t0)
+        if i % args.yield_every == 0:
+            # give the flusher a chance to run, like a busy event loop would
+            await asyncio.sleep(0)
+    enqueued = time.perf_counter() - start
+    await writer.stop()
+    drained = time.perf_counter() - start
+
+    return {
+        "enqueue_latency_us": summarize(samples),
+        "enqueue_seconds": enqueued,
+        "drain_seconds": drained,
+        "written": writer.written,
+        "dropped": writer.dropped,
+        "failed": writer.failed,
+        "throughput_eps": writer.written / drained if drained else 0.0,
+    }
+
+
+async def main(args):
+    engine = create_async_engine(args.db_url, future=True)
+    SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    if args.create_schema:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    tenant_id = await ensure_bench_tenant(SessionLocal)
+
+    report = {
+        "driver": engine.dialect.driver,
+        "events": args.events,
+        "batch_size": args.batch_size,
+        "policy": args.policy,
+    }
+    report["inline_latency_us"] = summarize(await bench_inline(SessionLocal, tenant_id, args.inline))
+    report["writer"] = await bench_writer(SessionLocal, tenant_id, args.events, args)
+    await engine.dispose()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audit writer ingest and request overhead benchmark")
+    parser.add_argument("--db-url", default=settings.DB_URL)
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--inline", type=int, default=1_000, help="events written inline for the baseline")
+    parser.add_argument("--batch-size", type=int, default=settings.AUDIT_BATCH_SIZE)
+    parser.add_argument("--queue-size", type=int, default=settings.AUDIT_QUEUE_MAXSIZE)
+    parser.add_argument("--flush-interval-ms", type=int, default=settings.AUDIT_FLUSH_INTERVAL_MS)
+    parser.add_argument("--policy", default="block")
+    parser.add_argument("--yield-every", type=int, default=10)
+    parser.add_argument("--create-schema", action="store_true")
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
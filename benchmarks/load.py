@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks._stats import summarize
+
+# Closed-loop load generator: N workers each send the next request as soon as the
+# previous one returns. Runs in-process over httpx.ASGITransport (like tests/main_test.py)
+# or against a running server with --base-url.
+
+ENDPOINTS = ("token", "login", "session", "refresh", "me", "tenant-data", "admin-only")
+DEFAULT_MIX = "me=35,tenant-data=25,admin-only=10,refresh=20,token=5,login=5"
+DEFAULT_HOST_TEMPLATE = "{tenant}.local.com"
+
+
+class Session:
+    def __init__(self, tenant: str, email: str, password: str, role):
+        self.tenant = tenant
+        self.email = email
+        self.password = password
+        self.role = role
+        self.host = None
+        self.access_token = None
+        self.refresh_token = None
+        # refresh rotates the token, so two workers must not spend the same one
+        self.refresh_lock = asyncio.Lock()
+
+    @property
+    def auth(self) -> dict:
+        return {"Host": self.host, "Authorization": f"Bearer {self.access_token}"}
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint in --mix: {name} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def load_credentials(args) -> tuple[list[dict], str]:
+    if args.manifest:
+        with open(args.manifest) as f:
+            manifest = json.load(f)
+        password = manifest["password"]
+        creds = [dict(c, password=password) for c in manifest["admin_logins"]]
+        creds += [dict(c, password=password, role=None) for c in manifest["member_logins"]]
+        return creds, manifest.get("host_template", DEFAULT_HOST_TEMPLATE)
+
+    from scripts.seed_script import build_fixture
+    _, users, _, _ = build_fixture(args.demo_tenants)
+    creds = [{"tenant": u["tenant"], "email": u["email"], "password": u["password"], "role": u["role"]} for u in users]
+    return creds, DEFAULT_HOST_TEMPLATE
+
+
+def pick_sessions(creds: list[dict], args, rng: random.Random) -> list[Session]:
+    admins = [c for c in creds if c["role"] == "admin_tenant"]
+    others = [c for c in creds if c["role"] != "admin_tenant"]
+    admin_count = min(len(admins), max(1, round(args.users * args.admin_share)))
+    chosen = rng.sample(admins, admin_count) + rng.sample(others, min(len(others), args.users - admin_count))
+    return [Session(c["tenant"], c["email"], c["password"], c["role"]) for c in chosen]
+
+
+# --- requests ----------------------------------------------------------------
+
+async def do_token(client, s: Session):
+    return await client.post(
+        "/api/auth/token", data={"username": s.email, "password": s.password}, headers={"Host": s.host}
+    )
+
+
+async def do_login(client, s: Session):
+    return await client.post(
+        "/api/auth/login", params={"email": s.email, "password": s.password}, headers={"Host": s.host}
+    )
+
+
+async def do_session(client, s: Session):
+    return await client.post(
+        "/api/auth/session", json={"email": s.email, "password": s.password}, headers={"Host": s.host}
+    )
+
+
+async def do_refresh(client, s: Session):
+    async with s.refresh_lock:
+        response = await client.post(
+            "/api/auth/refresh", json={"refresh_token": s.refresh_token}, headers={"Host": s.host}
+        )
+        if response.status_code == 200:
+            s.refresh_token = response.json()["refresh_token"]
+        return response
+
+
+async def do_me(client, s: Session):
+    return await client.get("/api/auth/me", headers=s.auth)
+
+
+async def do_tenant_data(client, s: Session):
+    return await client.get("/api/tenant/tenant-data", headers=s.auth)
+
+
+async def do_admin_only(client, s: Session):
+    return await client.post("/api/permission-check/admin-only", headers=s.auth)
+
+
+REQUESTS = {
+    "token": do_token,
+    "login": do_login,
+    "session": do_session,
+    "refresh": do_refresh,
+    "me": do_me,
+    "tenant-data": do_tenant_data,
+    "admin-only": do_admin_only,
+}
+
+
+async def open_sessions(client, sessions: list[Session], host_template: str, concurrency: int):
+    # /login is bcrypt-bound, so log everyone in up front rather than inside the measured window
+    gate = asyncio.Semaphore(concurrency)
+
+    async def login(s: Session):
+        s.host = host_template.format(tenant=s.tenant)
+        async with gate:
+            response = await do_login(client, s)
+        if response.status_code != 200:
+            raise SystemExit(f"Setup login failed for {s.email}@{s.tenant}: {response.status_code} {response.text[:200]}")
+        body = response.json()
+        s.access_token = body["access_token"]
+        s.refresh_token = body["refresh_token"]
+        if s.role is None:
+            s.role = "admin_tenant" if "admin_tenant" in body["roles"] else "member"
+
+    await asyncio.gather(*(login(s) for s in sessions))
+
+
+async def worker(client, worker_id: int, sessions, admins, mix, args, clock, samples):
+    rng = random.Random(args.seed * 1000 + worker_id)
+    names = list(mix)
+    cum_weights = list(itertools.accumulate(mix.values()))
+    # hot users: session i is picked with weight 1 / (i + 1) ** skew
+    session_weights = list(itertools.accumulate(1.0 / (i + 1) ** args.skew for i in range(len(sessions))))
+
+    while True:
+        now = time.perf_counter()
+        if now >= clock["end"]:
+            return
+        name = rng.choices(names, cum_weights=cum_weights)[0]
+        if name == "admin-only":
+            session = rng.choice(admins)
+        else:
+            session = rng.choices(sessions, cum_weights=session_weights)[0]
+
+        start = time.perf_counter()
+        try:
+            response = await REQUESTS[name](client, session)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - start
+
+        # warmup requests fill the connection pool and caches but are not recorded
+        if start >= clock["measure_from"]:
+            samples[name].append((elapsed, status))
+
+
+def build_report(samples, measured: float, args, mix, sessions, target: str) -> dict:
+    endpoints = {}
+    all_latencies, total_errors = [], 0
+    for name in mix:
+        rows = samples.get(name, [])
+        latencies = [elapsed for elapsed, _ in rows]
+        statuses = Counter(str(status) for _, status in rows)
+        errors = sum(n for status, n in statuses.items() if not (status.isdigit() and int(status) < 400))
+        endpoints[name] = {
+            "requests": len(rows),
+            "errors": errors,
+            "rps": len(rows) / measured if measured else 0.0,
+            "status": dict(statuses),
+            "latency_ms": summarize(latencies, unit_scale=1e3),
+        }
+        all_latencies += latencies
+        total_errors += errors
+
+    return {
+        "meta": {
+            "git": git_revision(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "target": target,
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "warmup_seconds": args.warmup,
+            "duration_seconds": measured,
+            "mix": mix,
+            "users": len(sessions),
+            "tenants": len({s.tenant for s in sessions}),
+            "skew": args.skew,
+            "seed": args.seed,
+            "credentials": args.manifest or f"demo ({args.demo_tenants} tenants)",
+        },
+        "total": {
+            "requests": len(all_latencies),
+            "errors": total_errors,
+            "rps": len(all_latencies) / measured if measured else 0.0,
+            "latency_ms": summarize(all_latencies, unit_scale=1e3),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def git_revision() -> dict:
+    def git(*cmd):
+        try:
+            return subprocess.run(["git", *cmd], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {"sha": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    creds, host_template = load_credentials(args)
+    host_template = args.host_template or host_template
+    sessions = pick_sessions(creds, args, rng)
+
+    if args.base_url:
+        target = args.base_url
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        lifespan = None
+    else:
+        from app.db import engine
+        from app.main import app
+        # SQL echo would turn the run into a logging benchmark
+        engine.echo = args.echo_sql
+        target = "asgi"
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+            base_url="http://loadtest", timeout=args.timeout,
+        )
+        # ASGITransport does not send lifespan events, so start the app's background services ourselves
+        lifespan = app.router.lifespan_context(app)
+
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+            # the app's logging setup would otherwise log every client request httpx sends
+            logging.getLogger("httpx").setLevel(logging.WARNING)
+        try:
+            await open_sessions(client, sessions, host_template, args.concurrency)
+            admins = [s for s in sessions if s.role == "admin_tenant"]
+            if "admin-only" in mix and not admins:
+                raise SystemExit("admin-only is in --mix but no admin sessions were opened")
+            print(f"{len(sessions)} sessions across {len({s.tenant for s in sessions})} tenants, "
+                  f"{args.concurrency} workers, {args.warmup}s warmup + {args.duration}s", file=sys.stderr)
+
+            samples = defaultdict(list)
+            started = time.perf_counter()
+            clock = {"measure_from": started + args.warmup, "end": started + args.warmup + args.duration}
+            await asyncio.gather(*(
+                worker(client, i, sessions, admins, mix, args, clock, samples) for i in range(args.concurrency)
+            ))
+            measured = time.perf_counter() - clock["measure_from"]
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    return build_report(samples, measured, args, mix, sessions, target)
+
+
+# --- comparison --------------------------------------------------------------
+
+def compare(base_path: str, head_path: str, threshold: float) -> int:
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(head_path) as f:
+        head = json.load(f)
+
+    def sha(report):
+        return (report["meta"]["git"]["sha"] or "?")[:10]
+
+    print(f"{'endpoint':<12} {'metric':<6} {sha(base):>12} {sha(head):>12} {'change':>9}")
+    regressions = 0
+    for name in sorted(set(base["endpoints"]) | set(head["endpoints"])):
+        b, h = base["endpoints"].get(name), head["endpoints"].get(name)
+        if not b or not h:
+            print(f"{name:<12} only in {'head' if h else 'base'}")
+            continue
+        for metric in ("p50", "p95", "p99", "rps"):
+            old = b["rps"] if metric == "rps" else b["latency_ms"].get(metric, 0.0)
+            new = h["rps"] if metric == "rps" else h["latency_ms"].get(metric, 0.0)
+            change = (new - old) / old * 100 if old else 0.0
+            # latency going up or throughput going down is the bad direction
+            worse = change < -threshold if metric == "rps" else change > threshold
+            regressions += worse
+            print(f"{name:<12} {metric:<6} {old:>12.2f} {new:>12.2f} {change:>+8.1f}%{'  !' if worse else ''}")
+        if h["errors"] > b["errors"]:
+            print(f"{name:<12} errors {b['errors']:>12} {h['errors']:>12}  !")
+            regressions += 1
+    return 1 if regressions else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end load test of the auth, tenant and RBAC endpoints")
+    parser.add_argument("--base-url", help="target a running server (default: in-process ASGI app)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unrecorded seconds before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight list")
+    parser.add_argument("--users", type=int, default=20, help="logged-in sessions to spread requests over")
+    parser.add_argument("--admin-share", type=float, default=0.25, help="fraction of sessions that are tenant admins")
+    parser.add_argument("--skew", type=float, default=0.0, help="zipf exponent for picking sessions (0 = uniform)")
+    parser.add_argument("--manifest", help="credentials from scripts/generate_dataset.py (default: seed_script demo users)")
+    parser.add_argument("--demo-tenants", type=int, default=3)
+    parser.add_argument("--host-template", help="Host header per tenant, e.g. '{tenant}.local.com'")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--echo-sql", action="store_true", help="keep SQLAlchemy echo on for in-process runs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="diff two reports instead of running")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change flagged by --compare")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import fnmatch
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+
+from benchmarks.load import git_revision
+from benchmarks.micro import benches  # noqa: F401  registers the benchmarks
+from benchmarks.micro.fixtures import close_context, open_context
+from benchmarks.micro.runner import REGISTRY, compare, run_benchmark
+
+
+async def main(args) -> dict:
+    selected = [
+        b for b in REGISTRY.values()
+        if not args.only or any(fnmatch.fnmatch(b.name, pattern) for pattern in args.only)
+    ]
+    if args.no_db:
+        selected = [b for b in selected if not b.needs_db]
+    if not selected:
+        raise SystemExit("No benchmarks selected")
+
+    ctx = await open_context(args.db_url, with_db=any(b.needs_db for b in selected))
+    results = {}
+    try:
+        for benchmark in selected:
+            result = await run_benchmark(benchmark, ctx, args.min_time, args.repeat, args.warmup, args.max_time)
+            results[benchmark.name] = result
+            stats = result["us_per_call"]
+            print(f"{benchmark.name:<36} p50 {stats['p50']:>12.2f} us  p95 {stats['p95']:>12.2f} us  "
+                  f"stdev {stats['stdev']:>10.2f}  ({stats['n']} x {result['number']})", file=sys.stderr)
+    finally:
+        await close_context(ctx)
+
+    db_url = args.db_url if any(b.needs_db for b in selected) else None
+    return {
+        "meta": {
+            "git": git_revision(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "db": db_url.split("://")[0] if db_url else None,
+            "min_time": args.min_time,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-call cost of auth, tenant and RBAC primitives")
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///:memory:",
+                        help="database for the DB-backed benchmarks (e.g. a local Postgres test database)")
+    parser.add_argument("--no-db", action="store_true", help="skip benchmarks that need a database")
+    parser.add_argument("--only", nargs="*", help="glob patterns, e.g. 'rbac.*' 'auth.decode_*'")
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per sample; sets calls per sample")
+    parser.add_argument("--repeat", type=int, default=20, help="samples per benchmark")
+    parser.add_argument("--warmup", type=int, default=2, help="unrecorded samples before measuring")
+    parser.add_argument("--max-time", type=float, default=5.0, help="time budget per benchmark (min 3 samples)")
+    parser.add_argument("--output", help="write results JSON here (use as a future --baseline)")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare p50s against")
+    parser.add_argument("--threshold", type=float, default=15.0, help="percent p50 slowdown that fails the run")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(report["results"], args.baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0f}%: {', '.join(regressions)}")
+            sys.exit(1)
@@ -0,0 +1,201 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from app.crud.user import get_user_roles, hash_password, verify_password
+from app.schemas.auth import TokenResponseSchema
+from app.responses import FastJSONResponse, dumps
+from app.schemas.audit_logs import AuditLogPage
+from app.schemas.users import MeResponse
+from app.services.api_keys import authenticate_api_key
+from app.services.auth import create_access_token, decode_access_token
+from app.services import metrics, tracing
+from app.services.rbac import user_has_permission
+from app.services.tenant import get_tenant_by_host, parse_host
+from app.services.timing import end_request, phase, start_request
+from benchmarks.micro.fixtures import BENCH_PASSWORD, BENCH_SUBDOMAIN
+from benchmarks.micro.runner import bench
+
+# --- auth ---
+
+@bench("auth.hash_password", "auth")
+def bench_hash_password(ctx):
+    hash_password(BENCH_PASSWORD)
+
+
+@bench("auth.verify_password", "auth")
+def bench_verify_password(ctx):
+    verify_password(BENCH_PASSWORD, ctx.password_hash)
+
+
+@bench("auth.create_access_token", "auth")
+def bench_create_access_token(ctx):
+    create_access_token({"sub": "6b1f7a2e-3c55-4d7c-9d8e-1f2a3b4c5d6e", "tid": "0c9d8e7f-6a5b-4c3d-2e1f-0a9b8c7d6e5f", "roles": ["admin_tenant"]})
+
+
+@bench("auth.decode_access_token", "auth")
+def bench_decode_access_token(ctx):
+    decode_access_token(ctx.access_token)
+
+
+@bench("auth.verify_api_key", "auth")
+async def bench_verify_api_key(ctx):
+    # cache hit: split, one HMAC, constant-time compare
+    await authenticate_api_key(None, ctx.api_key)
+
+
+# --- tenant ---
+
+@bench("tenant.parse_host", "tenant")
+def bench_parse_host(ctx):
+    parse_host(f"{BENCH_SUBDOMAIN}.local.com:8000")
+
+
+@bench("tenant.get_tenant_by_host", "tenant", needs_db=True)
+async def bench_get_tenant_by_host(ctx):
+    # a fresh session per call, as the tenant middleware does per request
+    async with ctx.SessionLocal() as db:
+        await get_tenant_by_host(db, BENCH_SUBDOMAIN, f"{BENCH_SUBDOMAIN}.local.com")
+
+
+# --- rbac ---
+
+@bench("rbac.get_user_roles", "rbac", needs_db=True)
+async def bench_get_user_roles(ctx):
+    await get_user_roles(ctx.db, ctx.user_id, ctx.tenant_id)
+
+
+@bench("rbac.user_has_permission.granted", "rbac", needs_db=True)
+async def bench_user_has_permission(ctx):
+    await user_has_permission(ctx.db, ctx.user_tenant_id, "read")
+
+
+@bench("rbac.user_has_permission.denied", "rbac", needs_db=True)
+async def bench_user_has_permission_denied(ctx):
+    await user_has_permission(ctx.db, ctx.user_tenant_id, "no-such-permission")
+
+
+# --- schemas ---
+
+ME_PAYLOAD = {
+    "user_name": "Micro Bench",
+    "user_email": "user@micro-bench.local",
+    "tenant_name": "Micro bench",
+    "roles": ["admin_tenant", "manager", "operator"],
+}
+
+
+@bench("schemas.MeResponse", "schemas")
+def bench_me_response(ctx):
+    MeResponse(**ME_PAYLOAD).model_dump_json()
+
+
+@bench("schemas.TokenResponseSchema", "schemas")
+def bench_token_response(ctx):
+    TokenResponseSchema(access_token=ctx.access_token, refresh_token=ctx.access_token).model_dump_json()
+
+
+# --- timing ---
+
+@bench("timing.phase.disabled", "timing")
+def bench_phase_disabled(ctx):
+    # the cost every instrumented call pays when Server-Timing is off
+    with phase("bench"):
+        pass
+
+
+@bench("timing.phase.enabled", "timing")
+def bench_phase_enabled(ctx):
+    timings, token = start_request()
+    try:
+        with phase("bench"):
+            pass
+    finally:
+        end_request(token)
+
+
+# --- metrics ---
+
+@bench("metrics.counter.inc", "metrics")
+def bench_counter_inc(ctx):
+    metrics.http_requests.inc("GET", "/api/auth/me", "200")
+
+
+@bench("metrics.histogram.observe", "metrics")
+def bench_histogram_observe(ctx):
+    metrics.http_request_seconds.observe(0.012, "GET", "/api/auth/me", "standard")
+
+
+# --- tracing ---
+
+@bench("tracing.span.unsampled", "tracing")
+def bench_span_unsampled(ctx):
+    # what every traced dependency pays on requests that are not sampled
+    with tracing.span("bench"):
+        pass
+
+
+# --- encode ---
+# Response encoding as FastAPI does it before and after the FastJSONResponse default.
+
+def _audit_rows(n: int) -> list[dict]:
+    tenant_id, user_id = uuid.uuid4(), uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": uuid.uuid4(), "tenant_id": tenant_id, "user_id": user_id, "action": "auth.login",
+            "entity": "user", "entity_id": user_id, "metadata": {"via": "login", "ip": "10.0.0.1"},
+            "created_at": now - timedelta(seconds=i),
+        }
+        for i in range(n)
+    ]
+
+
+AUDIT_PAGE = {"items": _audit_rows(500), "next_cursor": "MjAyNi0xMC0xOVQxNzowMDowMCswMDowMHw"}
+EXPORT_BATCH = _audit_rows(1000)
+LOGIN_BODY = {"access_token": "x" * 300, "refresh_token": "y" * 300, "token_type": "bearer",
+              "roles": ["admin_tenant", "manager"], "tenant": "client1"}
+
+_audit_page_field = None
+
+
+def _audit_page_response_field():
+    # the field FastAPI builds for response_model=AuditLogPage
+    global _audit_page_field
+    if _audit_page_field is None:
+        from fastapi.utils import create_model_field
+        _audit_page_field = create_model_field("Response", AuditLogPage, mode="serialization")
+    return _audit_page_field
+
+
+@bench("encode.audit_page_500.response_model", "encode")
+async def bench_audit_page_response_model(ctx):
+    # before: dict validated against AuditLogPage, then dumped by Pydantic
+    await serialize_response(field=_audit_page_response_field(), response_content=AUDIT_PAGE, dump_json=True)
+
+
+@bench("encode.audit_page_500.fast_json", "encode")
+def bench_audit_page_fast_json(ctx):
+    FastJSONResponse(AUDIT_PAGE)
+
+
+@bench("encode.export_1000.json", "encode")
+def bench_export_json(ctx):
+    "".join(json.dumps(row, default=str) + "\n" for row in EXPORT_BATCH)
+
+
+@bench("encode.export_1000.orjson", "encode")
+def bench_export_orjson(ctx):
+    b"".join(dumps(row) + b"\n" for row in EXPORT_BATCH)
+
+
+@bench("encode.login_dict.json_response", "encode")
+def bench_login_json_response(ctx):
+    JSONResponse(jsonable_encoder(LOGIN_BODY))
+
+
+@bench("encode.login_dict.fast_json", "encode")
+def bench_login_fast_json(ctx):
+    FastJSONResponse(jsonable_encoder(LOGIN_BODY))
@@ -0,0 +1,103 @@
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.crud.user import hash_password
+from app.models import ApiKey, Base, Permission, Role, RolePermission, Tenant, User, UserRole, UserTenant
+
+BENCH_SUBDOMAIN = "micro-bench"
+BENCH_EMAIL = "user@micro-bench.local"
+BENCH_PASSWORD = "micro-bench-123"
+
+
+class BenchContext:
+    """Everything a benchmark body needs, prepared once outside the timed loop."""
+
+    def __init__(self):
+        self.engine = None
+        self.SessionLocal = None
+        self.db = None
+        self.tenant_id = None
+        self.user_id = None
+        self.user_tenant_id = None
+        self.password_hash = None
+        self.access_token = None
+        self.api_key = None
+
+
+async def open_context(db_url: str, with_db: bool) -> BenchContext:
+    from app.services.auth import create_access_token
+
+    ctx = BenchContext()
+    ctx.password_hash = hash_password(BENCH_PASSWORD)
+    ctx.api_key = prime_api_key()
+    if not with_db:
+        ctx.access_token = create_access_token({"sub": str(uuid.uuid4()), "tid": str(uuid.uuid4()), "roles": ["admin_tenant"]})
+        return ctx
+
+    # an in-memory SQLite database only lives as long as its single connection
+    pool = {"poolclass": StaticPool} if ":memory:" in db_url else {}
+    ctx.engine = create_async_engine(db_url, future=True, **pool)
+    ctx.SessionLocal = sessionmaker(ctx.engine, class_=AsyncSession, expire_on_commit=False)
+    async with ctx.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with ctx.SessionLocal() as db:
+        await seed(db, ctx)
+    ctx.access_token = create_access_token({"sub": str(ctx.user_id), "tid": str(ctx.tenant_id), "roles": ["admin_tenant"]})
+
+    # request-scoped session, reused across calls like one request's dependencies would
+    ctx.db = ctx.SessionLocal()
+    return ctx
+
+
+def prime_api_key() -> str:
+    # a cached key, as after the first request that used it: the benches time the hit path
+    from app.services.api_keys import ApiKeyEntry, api_key_cache, generate_key
+
+    raw_key, prefix, key_hash = generate_key()
+    key = ApiKey(id=uuid.uuid4(), tenant_id=uuid.uuid4(), prefix=prefix, key_hash=key_hash, revoked=False, expires_at=None)
+    api_key_cache.ttl = float("inf")  # a long run must not fall through to the (absent) database
+    api_key_cache.set(prefix, ApiKeyEntry(key, ["read"]))
+    return raw_key
+
+
+async def close_context(ctx: BenchContext):
+    if ctx.db is not None:
+        await ctx.db.close()
+    if ctx.engine is not None:
+        await ctx.engine.dispose()
+
+
+async def seed(db: AsyncSession, ctx: BenchContext):
+    # idempotent, so it can share a local Postgres with the demo data
+    tenant = (await db.execute(select(Tenant).where(Tenant.subdomain == BENCH_SUBDOMAIN))).scalars().first()
+    if tenant:
+        user = (await db.execute(select(User).where(User.email == BENCH_EMAIL))).scalars().first()
+        user_tenant = (await db.execute(select(UserTenant).where(
+            (UserTenant.user_id == user.id) & (UserTenant.tenant_id == tenant.id)
+        ))).scalars().first()
+    else:
+        permission = (await db.execute(select(Permission).where(Permission.name == "read"))).scalars().first()
+        if not permission:
+            permission = Permission(id=uuid.uuid4(), name="read", description="Read access")
+            db.add(permission)
+
+        tenant = Tenant(id=uuid.uuid4(), name="Micro bench", subdomain=BENCH_SUBDOMAIN, code="MICRO-BENCH", status=True)
+        user = User(id=uuid.uuid4(), email=BENCH_EMAIL, password_hash=ctx.password_hash, full_name="Micro Bench")
+        role = Role(id=uuid.uuid4(), tenant_id=tenant.id, name="admin_tenant", is_system=True)
+        user_tenant = UserTenant(id=uuid.uuid4(), user_id=user.id, tenant_id=tenant.id, default_tenant=True)
+        db.add_all([tenant, user, role, user_tenant])
+        await db.flush()
+        db.add_all([
+            RolePermission(id=uuid.uuid4(), role_id=role.id, permission_id=permission.id),
+            UserRole(id=uuid.uuid4(), usertenant_id=user_tenant.id, role_id=role.id),
+        ])
+        await db.commit()
+
+    ctx.tenant_id = tenant.id
+    ctx.user_id = user.id
+    ctx.user_tenant_id = user_tenant.id
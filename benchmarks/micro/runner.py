@@ -0,0 +1,105 @@
+import gc
+import inspect
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from benchmarks._stats import summarize
+
+# timeit-style measurement: calibrate how many calls fit in --min-time, warm up,
+# then take --repeat samples of that many calls each. Every sample is reported
+# as seconds per call, so slow primitives (bcrypt) and fast ones (host parsing)
+# land on the same scale.
+
+REGISTRY: dict[str, "Benchmark"] = {}
+
+
+@dataclass
+class Benchmark:
+    name: str
+    group: str
+    func: Callable
+    needs_db: bool = False
+    is_async: bool = field(init=False)
+
+    def __post_init__(self):
+        self.is_async = inspect.iscoroutinefunction(self.func)
+
+
+def bench(name: str, group: str, needs_db: bool = False):
+    def register(func):
+        if name in REGISTRY:
+            raise ValueError(f"Duplicate benchmark name: {name}")
+        REGISTRY[name] = Benchmark(name, group, func, needs_db)
+        return func
+    return register
+
+
+async def time_calls(benchmark: Benchmark, ctx, number: int) -> float:
+    func = benchmark.func
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        if benchmark.is_async:
+            for _ in range(number):
+                await func(ctx)
+        else:
+            for _ in range(number):
+                func(ctx)
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+async def calibrate(benchmark: Benchmark, ctx, min_time: float) -> int:
+    # grow the batch 1, 2, 5, 10, 20, ... until one batch takes at least min_time
+    number = 1
+    while True:
+        elapsed = await time_calls(benchmark, ctx, number)
+        if elapsed >= min_time:
+            return number
+        for step in (1, 2, 5):
+            candidate = step * 10 ** (len(str(number)) - 1)
+            if candidate > number:
+                break
+        else:
+            candidate = 10 ** len(str(number))
+        number = candidate
+
+
+async def run_benchmark(benchmark: Benchmark, ctx, min_time: float, repeat: int, warmup: int, max_time: float) -> dict:
+    number = await calibrate(benchmark, ctx, min_time)
+    for _ in range(warmup):
+        await time_calls(benchmark, ctx, number)
+
+    samples = []
+    deadline = time.perf_counter() + max_time
+    # always keep a few samples, even for primitives that blow the time budget
+    while len(samples) < repeat and (len(samples) < 3 or time.perf_counter() < deadline):
+        samples.append(await time_calls(benchmark, ctx, number) / number)
+
+    return {"group": benchmark.group, "number": number, "us_per_call": summarize(samples)}
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> list[str]:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print(f"\n{'benchmark':<36} {'base p50':>12} {'p50':>12} {'change':>9}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<36} {'-':>12} {result['us_per_call']['p50']:>12.2f}")
+            continue
+        old = baseline[name]["us_per_call"]["p50"]
+        new = result["us_per_call"]["p50"]
+        change = (new - old) / old * 100 if old else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  !"
+        print(f"{name:<36} {old:>12.2f} {new:>12.2f} {change:>+8.1f}%{flag}")
+    return regressions
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks._stats import summarize
+from benchmarks.load import git_revision
+
+# Cold start of one worker: every run is a fresh interpreter that imports app.main and
+# enters/leaves the lifespan, so nothing is shared between samples (no warm sys.modules,
+# but the OS page cache is warm after the first run, like on an autoscaled node).
+#
+#   python -m benchmarks.startup --runs 20 --output startup-base.json
+#   python -m benchmarks.startup --baseline startup-base.json --threshold 15   # exits 1 on regressions
+#   python -m benchmarks.startup --max-ms 1500                                 # absolute budget
+#   python -m benchmarks.startup --profile                                     # slowest imports
+
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def lifespan():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        pass
+
+asyncio.run(lifespan())
+ready = time.perf_counter()
+print(json.dumps({"import": imported - started, "lifespan": ready - imported}))
+"""
+
+PHASES = ("process", "import", "lifespan")
+
+
+def run_once() -> dict:
+    # process: interpreter start-up to exit, as seen from here; includes the other two
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", CHILD], capture_output=True, text=True, env=_child_env())
+    elapsed = time.perf_counter() - started
+    if out.returncode != 0:
+        raise SystemExit(f"app failed to start:\n{out.stderr}")
+    sample = json.loads(out.stdout.strip().splitlines()[-1])
+    sample["process"] = elapsed
+    return sample
+
+
+def _child_env() -> dict:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1", LOG_CONFIGURE="false")
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    return env
+
+
+def import_profile(top: int) -> list[tuple[float, float, str]]:
+    """[(cumulative ms, self ms, module)] for the `top` slowest imports, from -X importtime."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, env=_child_env(),
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, module.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> list[str]:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    for phase in PHASES:
+        if phase not in baseline:
+            continue
+        base, head = baseline[phase]["p50"], results[phase]["p50"]
+        change = (head - base) / base * 100 if base else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{phase:<10} {base:>9.1f} -> {head:>9.1f} ms  {change:+6.1f}%{flag}", file=sys.stderr)
+        if flag:
+            regressions.append(phase)
+    return regressions
+
+
+def main(args) -> dict:
+    for _ in range(args.warmup):
+        run_once()
+    samples = [run_once() for _ in range(args.runs)]
+    results = {phase: summarize([s[phase] for s in samples], unit_scale=1e3) for phase in PHASES}
+    for phase, stats in results.items():
+        print(f"{phase:<10} p50 {stats['p50']:>9.1f} ms  p95 {stats['p95']:>9.1f} ms  "
+              f"min {stats['min']:>9.1f} ms  ({stats['n']} runs)", file=sys.stderr)
+    return {
+        "meta": {
+            "git": git_revision(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "runs": args.runs,
+            "unit": "ms",
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start time of the app: import and lifespan in a fresh interpreter")
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters to measure")
+    parser.add_argument("--warmup", type=int, default=1, help="unrecorded runs first (fills the page cache)")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="report to compare against")
+    parser.add_argument("--threshold", type=float, default=15.0, help="percent p50 slowdown that fails the run")
+    parser.add_argument("--max-ms", type=float, help="fail when the p50 import + lifespan time exceeds this")
+    parser.add_argument("--profile", nargs="?", type=int, const=25, metavar="N",
+                        help="print the N slowest imports (-X importtime) and exit")
+    args = parser.parse_args()
+
+    if args.profile:
+        print(f"{'cumulative':>10} {'self':>9}  module")
+        for cumulative_ms, self_ms, module in import_profile(args.profile):
+            print(f"{cumulative_ms:>8.1f}ms {self_ms:>7.1f}ms  {module}")
+        sys.exit(0)
+
+    report = main(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = []
+    if args.baseline:
+        failed += compare(report["results"], args.baseline, args.threshold)
+    if args.max_ms is not None:
+        startup_ms = report["results"]["import"]["p50"] + report["results"]["lifespan"]["p50"]
+        if startup_ms > args.max_ms:
+            print(f"startup p50 {startup_ms:.1f} ms is over the {args.max_ms:.0f} ms budget", file=sys.stderr)
+            failed.append("budget")
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,36 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+
+from app.config import settings
+from app.db import engine
+from app.services.audit_partitions import ensure_partitions, drop_expired_partitions
+
+# Run daily (cron / k8s CronJob) so next months' partitions always exist
+# before rows arrive and expired months are dropped instead of DELETEd.
+
+
+async def maintain_audit_partitions(months_ahead: int, retention_months: int, dry_run: bool, months_back: int = 0):
+    async with engine.begin() as conn:
+        if conn.dialect.name != "postgresql":
+            print("Audit partitioning is only available on PostgreSQL, nothing to do.")
+            return
+
+        created = [] if dry_run else await conn.run_sync(ensure_partitions, months_ahead, months_back)
+        dropped = await conn.run_sync(drop_expired_partitions, retention_months, None, dry_run)
+
+    print(f"Created partitions: {', '.join(created) or '-'}")
+    print(f"{'Would drop' if dry_run else 'Dropped'} partitions: {', '.join(dropped) or '-'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create upcoming and drop expired audit_logs partitions")
+    parser.add_argument("--ahead", type=int, default=settings.AUDIT_PARTITIONS_AHEAD, help="months to create ahead")
+    parser.add_argument("--retention", type=int, default=settings.AUDIT_RETENTION_MONTHS, help="months to keep")
+    parser.add_argument("--back", type=int, default=0, help="also create past months, moving their rows out of the default partition")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(maintain_audit_partitions(args.ahead, args.retention, args.dry_run, args.back))
@@ -0,0 +1,314 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import itertools
+import json
+import random
+import time
+import uuid
+from array import array
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.db import AsyncLocalSession
+from app.models.tenants import Tenant
+from app.models.users import User
+from app.models.user_tenants import UserTenant
+from app.models.roles import Role
+from app.models.permissions import Permission
+from app.models.role_permissions import RolePermission
+from app.models.user_roles import UserRole
+from app.models.refresh_tokens import RefreshToken
+from app.models.audit_logs import AuditLog
+from app.crud.user import hash_password
+from app.crud.bulk import chunked, copy_records, insert_ignore
+from app.services.onboarding import TEMPLATES
+
+# Deterministic synthetic data for capacity tests. Same --seed and shape always
+# produce the same rows and ids: ids are derived from (seed, kind, index) instead
+# of being stored, so memory stays flat even at millions of rows.
+
+PRESETS = {
+    "small": dict(tenants=100, users=5_000, roles_per_tenant=10, extra_memberships=0.2,
+                  refresh_tokens=10_000, audit_rows=100_000),
+    "medium": dict(tenants=5_000, users=200_000, roles_per_tenant=25, extra_memberships=0.2,
+                   refresh_tokens=500_000, audit_rows=5_000_000),
+    "large": dict(tenants=50_000, users=2_000_000, roles_per_tenant=20, extra_memberships=0.25,
+                  refresh_tokens=5_000_000, audit_rows=50_000_000),
+    # few tenants with very wide RBAC, for role/permission join costs
+    "rbac-heavy": dict(tenants=200, users=100_000, roles_per_tenant=2_000, extra_memberships=0.1,
+                       refresh_tokens=100_000, audit_rows=1_000_000),
+}
+
+BASE_ROLES = TEMPLATES["default"]
+SYNTHETIC_PERMISSIONS = 50
+AUDIT_ACTIONS = ["auth.login", "auth.refresh", "auth.logout", "auth.login_failed", "authz.permission_denied"]
+
+
+class IdFactory:
+    def __init__(self, seed: int):
+        self.prefix = f"{seed}:".encode()
+
+    def __call__(self, kind: str, index: int) -> uuid.UUID:
+        digest = hashlib.blake2b(self.prefix + f"{kind}:{index}".encode(), digest_size=16).digest()
+        return uuid.UUID(bytes=digest, version=4)
+
+
+class ZipfSampler:
+    # rank-based skew: with s ~ 1 a handful of tenants hold a large share of all members
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.rng = rng
+        self.cum = list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+        self.total = self.cum[-1]
+
+    def sample(self) -> int:
+        return bisect.bisect_left(self.cum, self.rng.random() * self.total)
+
+
+def tenant_subdomain(t: int) -> str:
+    return f"syn{t:06d}"
+
+
+def user_email(u: int) -> str:
+    return f"user{u:07d}@synthetic.test"
+
+
+async def write_table(model, columns, rows, batch_size: int) -> int:
+    table = model.__table__
+    written = 0
+    started = time.perf_counter()
+    for batch in chunked(rows, batch_size):
+        async with AsyncLocalSession() as db:
+            written += await copy_records(db, table, columns, batch)
+            await db.commit()
+    elapsed = time.perf_counter() - started
+    print(f"  {table.name:<17} {written:>12,} rows in {elapsed:7.2f}s ({written / elapsed if elapsed else 0:,.0f} rows/s)")
+    return written
+
+
+async def generate(args):
+    rng = random.Random(args.seed)
+    make_id = IdFactory(args.seed)
+    now = datetime.utcnow()
+    counts = {}
+    started = time.perf_counter()
+
+    async with AsyncLocalSession() as db:
+        exists = await db.execute(select(Tenant.id).where(Tenant.subdomain == tenant_subdomain(0)))
+        if exists.first():
+            raise SystemExit("Synthetic dataset already present, use an empty database")
+
+        # permissions are global and may already exist from the demo seed
+        permission_names = sorted({p for perms in BASE_ROLES.values() for p in perms}) + [
+            f"perm_{k:03d}" for k in range(SYNTHETIC_PERMISSIONS)
+        ]
+        await insert_ignore(db, Permission, [
+            {"id": make_id("permission", k), "name": name, "description": f"{name} (synthetic)"}
+            for k, name in enumerate(permission_names)
+        ], ["name"])
+        await db.commit()
+        result = await db.execute(select(Permission.name, Permission.id).where(Permission.name.in_(permission_names)))
+        permission_ids = dict(result.all())
+
+        if db.bind.dialect.name == "postgresql" and args.audit_rows:
+            from app.services.audit_partitions import ensure_partitions
+            conn = await db.connection()
+            await conn.run_sync(ensure_partitions, 3, args.audit_days // 28 + 1)
+            await db.commit()
+
+    print(f"Generating '{args.preset}' shape with seed {args.seed}")
+
+    # 1) Tenants
+    counts["tenants"] = await write_table(
+        Tenant, ("id", "name", "subdomain", "code", "status", "created_at", "updated_at"),
+        ((make_id("tenant", t), f"Synthetic {t}", tenant_subdomain(t), f"SYN{t:06d}", True, now, now)
+         for t in range(args.tenants)),
+        args.batch_size,
+    )
+
+    # 2) Users, all sharing one precomputed hash: bcrypt per row would dominate generation time
+    password_hash = hash_password(args.password)
+    counts["users"] = await write_table(
+        User, ("id", "email", "password_hash", "full_name", "is_active", "is_superuser", "created_at", "updated_at"),
+        ((make_id("user", u), user_email(u), password_hash, f"Synthetic User {u}", True, False, now, now)
+         for u in range(args.users)),
+        args.batch_size,
+    )
+
+    # 3) Memberships: one skewed primary tenant per user plus optional extra tenants.
+    # Only the tenant index per membership is kept (4 bytes each); ids are recomputed.
+    sampler = ZipfSampler(args.tenants, args.skew, rng)
+    membership_tenant = array("I")
+    membership_user = array("I")
+    tenant_admin = array("i", [-1]) * args.tenants
+    for u in range(args.users):
+        tenants = {sampler.sample()}
+        while rng.random() < args.extra_memberships and len(tenants) < args.tenants:
+            tenants.add(sampler.sample())
+        for t in sorted(tenants):
+            if tenant_admin[t] < 0:
+                tenant_admin[t] = len(membership_tenant)
+            membership_tenant.append(t)
+            membership_user.append(u)
+    memberships = len(membership_tenant)
+
+    counts["user_tenants"] = await write_table(
+        UserTenant, ("id", "user_id", "tenant_id", "is_active", "default_tenant", "created_at", "updated_at"),
+        ((make_id("user_tenant", m), make_id("user", membership_user[m]), make_id("tenant", membership_tenant[m]),
+          True, m == 0 or membership_user[m] != membership_user[m - 1], now, now)
+         for m in range(memberships)),
+        args.batch_size,
+    )
+
+    # 4) Roles: the three base roles plus synthetic ones, per tenant
+    base_roles = list(BASE_ROLES)
+    roles_per_tenant = max(args.roles_per_tenant, len(base_roles))
+
+    def role_name(k: int) -> str:
+        return base_roles[k] if k < len(base_roles) else f"role_{k:05d}"
+
+    counts["roles"] = await write_table(
+        Role, ("id", "tenant_id", "name", "description", "is_system", "created_at", "updated_at"),
+        ((make_id("role", t * roles_per_tenant + k), make_id("tenant", t), role_name(k), None, k < len(base_roles), now, now)
+         for t in range(args.tenants) for k in range(roles_per_tenant)),
+        args.batch_size,
+    )
+
+    # 5) RolePermissions
+    synthetic_permissions = [permission_ids[n] for n in permission_names if n.startswith("perm_")]
+
+    def role_permission_rows():
+        index = 0
+        for t in range(args.tenants):
+            for k in range(roles_per_tenant):
+                role_id = make_id("role", t * roles_per_tenant + k)
+                if k < len(base_roles):
+                    granted = [permission_ids[p] for p in BASE_ROLES[base_roles[k]]]
+                else:
+                    granted = rng.sample(synthetic_permissions, rng.randint(1, args.permissions_per_role))
+                for permission_id in granted:
+                    yield (make_id("role_permission", index), role_id, permission_id)
+                    index += 1
+
+    counts["role_permissions"] = await write_table(
+        RolePermission, ("id", "role_id", "permission_id"), role_permission_rows(), args.batch_size,
+    )
+
+    # 6) UserRoles: every member gets a base role (the tenant's first member is admin), some get extra roles
+    def user_role_rows():
+        index = 0
+        for m in range(memberships):
+            t = membership_tenant[m]
+            ut_id = make_id("user_tenant", m)
+            picks = {0 if tenant_admin[t] == m else rng.randint(1, len(base_roles) - 1)}
+            # extra roles never include the admin role (k = 0), so the admin share stays one per tenant
+            while rng.random() < args.extra_roles and len(picks - {0}) < roles_per_tenant - 1:
+                picks.add(rng.randrange(1, roles_per_tenant))
+            for k in picks:
+                yield (make_id("user_role", index), ut_id, make_id("role", t * roles_per_tenant + k))
+                index += 1
+
+    counts["user_roles"] = await write_table(
+        UserRole, ("id", "usertenant_id", "role_id"), user_role_rows(), args.batch_size,
+    )
+
+    # 7) Refresh tokens: mostly live, some revoked or expired
+    def refresh_token_rows():
+        for i in range(args.refresh_tokens):
+            m = rng.randrange(memberships)
+            created = now - timedelta(seconds=rng.randrange(14 * 86400))
+            expired = rng.random() < 0.1
+            yield (make_id("refresh_token", i), make_id("user_tenant", m), str(make_id("jti", i)),
+                   rng.random() < 0.2, created + timedelta(days=-1 if expired else 14), "synthetic", "127.0.0.1", created)
+
+    counts["refresh_tokens"] = await write_table(
+        RefreshToken, ("id", "user_tenant_id", "jti", "revoked", "expires_at", "user_agent", "ip", "created_at"),
+        refresh_token_rows(), args.batch_size,
+    )
+
+    # 8) Audit rows in time order over the last --audit-days, tenants skewed like memberships
+    def audit_rows():
+        step = args.audit_days * 86400 / max(args.audit_rows, 1)
+        start = now - timedelta(days=args.audit_days)
+        for i in range(args.audit_rows):
+            m = rng.randrange(memberships)
+            yield (make_id("audit_log", i), make_id("tenant", membership_tenant[m]), make_id("user", membership_user[m]),
+                   AUDIT_ACTIONS[rng.randrange(len(AUDIT_ACTIONS))], "user", None, None, start + timedelta(seconds=i * step))
+
+    counts["audit_logs"] = await write_table(
+        AuditLog, ("id", "tenant_id", "user_id", "action", "entity", "entity_id", "meta_data", "created_at"),
+        audit_rows(), args.batch_size,
+    )
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(f"Generated {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+    # the manifest is what benchmarks/ read to pick realistic tenant and user mixes
+    sample_rng = random.Random(args.seed + 1)
+    admin_logins = [
+        {"tenant": tenant_subdomain(t), "email": user_email(membership_user[tenant_admin[t]]), "role": "admin_tenant"}
+        for t in range(min(args.tenants, args.sample_size))
+        if tenant_admin[t] >= 0
+    ]
+    member_logins = []
+    for _ in range(args.sample_size):
+        m = sample_rng.randrange(memberships)
+        member_logins.append({"tenant": tenant_subdomain(membership_tenant[m]), "email": user_email(membership_user[m])})
+
+    manifest = {
+        "generator": "scripts/generate_dataset.py",
+        "preset": args.preset,
+        "seed": args.seed,
+        "shape": {key: getattr(args, key) for key in (
+            "tenants", "users", "roles_per_tenant", "extra_memberships", "extra_roles", "skew",
+            "permissions_per_role", "refresh_tokens", "audit_rows", "audit_days")},
+        "counts": counts,
+        "password": args.password,
+        "host_template": "{tenant}.local.com",
+        "admin_logins": admin_logins,
+        "member_logins": member_logins,
+        "generated_at": now.isoformat(),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.manifest)), exist_ok=True)
+    with open(args.manifest, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Manifest written to {args.manifest}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a deterministic large-scale dataset for capacity tests")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tenants", type=int)
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--roles-per-tenant", type=int)
+    parser.add_argument("--extra-memberships", type=float, help="probability of each additional tenant per user")
+    parser.add_argument("--extra-roles", type=float, default=0.3, help="probability of each additional role per member")
+    parser.add_argument("--skew", type=float, default=1.1, help="zipf exponent for tenant sizes")
+    parser.add_argument("--permissions-per-role", type=int, default=5, help=f"at most, 1-{SYNTHETIC_PERMISSIONS}")
+    parser.add_argument("--refresh-tokens", type=int)
+    parser.add_argument("--audit-rows", type=int)
+    parser.add_argument("--audit-days", type=int, default=90)
+    parser.add_argument("--password", default="synthetic123")
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    parser.add_argument("--sample-size", type=int, default=1_000, help="logins listed in the manifest")
+    parser.add_argument("--manifest", default=os.path.join("benchmarks", "data", "manifest.json"))
+    args = parser.parse_args()
+    if not 1 <= args.permissions_per_role <= SYNTHETIC_PERMISSIONS:
+        parser.error(f"--permissions-per-role must be between 1 and {SYNTHETIC_PERMISSIONS}")
+
+    for key, value in PRESETS[args.preset].items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(generate(parse_args()))
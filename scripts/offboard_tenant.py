@@ -0,0 +1,88 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from app.db import AsyncLocalSession
+from app.models.offboarding_jobs import OffboardingJob
+from app.models.tenants import Tenant
+from app.services.offboarding import count_rows, run_offboarding, start_offboarding
+
+# Disables a tenant and purges its data in small batches (app/services/offboarding.py):
+#
+#   python scripts/offboard_tenant.py acme              # row counts only, nothing changes
+#   python scripts/offboard_tenant.py acme --yes        # disable, then purge; resumes an unfinished job
+#   python scripts/offboard_tenant.py acme --status     # progress of the latest job
+#
+# Stopping it (Ctrl-C, a deploy) is safe: rerun the same command to continue.
+
+
+def print_progress(job: OffboardingJob):
+    for table, state in job.progress.items():
+        rate = state["deleted"] / state["seconds"] if state["seconds"] else 0
+        mark = "done" if state["done"] else "..."
+        print(f"  {table:<20} {state['deleted']:>10,} deleted  {state['seconds']:>8.1f}s  {rate:>9,.0f} rows/s  {mark}")
+
+
+async def latest_job(db, subdomain: str):
+    result = await db.execute(
+        select(OffboardingJob).where(OffboardingJob.subdomain == subdomain).order_by(OffboardingJob.created_at.desc())
+    )
+    return result.scalars().first()
+
+
+async def main(args) -> int:
+    async with AsyncLocalSession() as db:
+        if args.status:
+            job = await latest_job(db, args.subdomain)
+            if job is None:
+                print(f"No offboarding job for {args.subdomain}")
+                return 1
+            print(f"Job {job.id}: {job.status}" + (f" ({job.error})" if job.error else ""))
+            print_progress(job)
+            return 0
+
+        tenant = (await db.execute(select(Tenant).where(Tenant.subdomain == args.subdomain))).scalars().first()
+        if tenant is None:
+            print(f"No tenant {args.subdomain}")
+            return 1
+        if not args.yes:
+            for table, count in (await count_rows(db, tenant.id)).items():
+                print(f"  {table:<20} {count:>10,} rows")
+            print(f"Rerun with --yes to disable {args.subdomain} and delete these rows")
+            return 0
+
+        job = await start_offboarding(db, tenant)
+        print(f"{args.subdomain} disabled; job {job.id}")
+        last_report = time.monotonic()
+
+        def report(job, table):
+            nonlocal last_report
+            if time.monotonic() - last_report >= args.report_every:
+                state = job.progress[table]
+                print(f"  {table:<20} {state['deleted']:>10,} deleted so far")
+                last_report = time.monotonic()
+
+        started = time.perf_counter()
+        job = await run_offboarding(db, job, args.batch_size, args.pause_ms, report)
+        print(f"{args.subdomain} offboarded in {time.perf_counter() - started:.1f}s")
+        print_progress(job)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Disable a tenant and purge its data in throttled batches")
+    parser.add_argument("subdomain")
+    parser.add_argument("--yes", action="store_true", help="actually disable and purge (default: show row counts)")
+    parser.add_argument("--status", action="store_true", help="show the progress of the latest job and exit")
+    parser.add_argument("--batch-size", type=int, default=None, help="rows per transaction (default: OFFBOARD_BATCH_SIZE)")
+    parser.add_argument("--pause-ms", type=int, default=None, help="sleep between batches (default: OFFBOARD_PAUSE_MS)")
+    parser.add_argument("--report-every", type=float, default=5.0, metavar="SECONDS", help="progress line interval")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(args)))
@@ -2,7 +2,9 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import argparse
 import asyncio
+import time
 import uuid
 import datetime
 from datetime import timedelta
@@ -19,18 +21,55 @@ from app.models.user_roles import UserRole
 from app.models.refresh_tokens import RefreshToken
 from app.models.audit_logs import AuditLog
 from app.models.password_reset import PasswordReset
-from app.crud.user import hash_password
+from app.crud.user import hash_password, hash_passwords
+from app.crud.bulk import DEFAULT_BATCH_SIZE, insert_ignore, select_in
+
+DEMO_TENANTS = [
+    {"subdomain": "public", "name": "Public Tenant", "code": "PUBLIC", "label": "Public"},
+    {"subdomain": "client1", "name": "Client 1", "code": "CLIENT1", "label": "Client1"},
+    {"subdomain": "client2", "name": "Client 2", "code": "CLIENT2", "label": "Client2"},
+]
+DEMO_ROLES = [
+    {"name": "admin_tenant", "user": "admin", "password": "admin123"},
+    {"name": "manager", "user": "manager", "password": "manager123"},
+    {"name": "operator", "user": "operator", "password": "operator123"},
+]
+DEMO_PERMISSIONS = [
+    {"name": "read", "description": "Read access"},
+    {"name": "write", "description": "Write access"},
+]
+
+# namespace for deterministic demo refresh-token jtis, so bulk reseeding is idempotent
+SEED_NAMESPACE = uuid.UUID("6f1c0f5e-3f57-4d0c-9a52-5b1d8f0b2c11")
+
+
+def build_fixture(tenant_count: int = 3):
+    # the 3 demo tenants, then tenant4..tenantN with the same shape for larger fixtures
+    tenants_data = DEMO_TENANTS[:tenant_count] + [
+        {"subdomain": f"tenant{i}", "name": f"Tenant {i}", "code": f"TENANT{i}", "label": f"Tenant{i}"}
+        for i in range(len(DEMO_TENANTS) + 1, tenant_count + 1)
+    ]
+    users_data = [
+        {
+            "email": f"{rd['user']}@{td['subdomain']}.com",
+            "full_name": f"{td['label']} {rd['user'].capitalize()}",
+            "password": rd["password"],
+            "tenant": td["subdomain"],
+            "role": rd["name"],
+        }
+        for td in tenants_data
+        for rd in DEMO_ROLES
+    ]
+    roles_data = [{"tenant": td["subdomain"], "name": rd["name"]} for td in tenants_data for rd in DEMO_ROLES]
+    return tenants_data, users_data, roles_data, DEMO_PERMISSIONS
+
 
 async def seed_full_test_data():
+    tenants_data, users_data, roles_data, permissions_data = build_fixture()
     async with AsyncLocalSession() as db:
         # ----------------------
         # 1) Tenants
         # ----------------------
-        tenants_data = [
-            {"subdomain": "public", "name": "Public Tenant", "code": "PUBLIC"},
-            {"subdomain": "client1", "name": "Client 1", "code": "CLIENT1"},
-            {"subdomain": "client2", "name": "Client 2", "code": "CLIENT2"},
-        ]
         tenants = {}
         for td in tenants_data:
             result = await db.execute(select(Tenant).where(Tenant.subdomain == td["subdomain"]))
@@ -53,20 +92,6 @@ async def seed_full_test_data():
         # ----------------------
         # 2) Users
         # ----------------------
-        users_data = [
-            # Public Tenant
-            {"email": "admin@public.com", "full_name": "Public Admin", "password": "admin123", "tenant": "public", "role": "admin_tenant"},
-            {"email": "manager@public.com", "full_name": "Public Manager", "password": "manager123", "tenant": "public", "role": "manager"},
-            {"email": "operator@public.com", "full_name": "Public Operator", "password": "operator123", "tenant": "public", "role": "operator"},
-            # Client1
-            {"email": "admin@client1.com", "full_name": "Client1 Admin", "password": "admin123", "tenant": "client1", "role": "admin_tenant"},
-            {"email": "manager@client1.com", "full_name": "Client1 Manager", "password": "manager123", "tenant": "client1", "role": "manager"},
-            {"email": "operator@client1.com", "full_name": "Client1 Operator", "password": "operator123", "tenant": "client1", "role": "operator"},
-            # Client2
-            {"email": "admin@client2.com", "full_name": "Client2 Admin", "password": "admin123", "tenant": "client2", "role": "admin_tenant"},
-            {"email": "manager@client2.com", "full_name": "Client2 Manager", "password": "manager123", "tenant": "client2", "role": "manager"},
-            {"email": "operator@client2.com", "full_name": "Client2 Operator", "password": "operator123", "tenant": "client2", "role": "operator"},
-        ]
         users = {}
         for ud in users_data:
             result = await db.execute(select(User).where(User.email == ud["email"]))
@@ -119,17 +144,6 @@ async def seed_full_test_data():
         # ----------------------
         # 4) Roles
         # ----------------------
-        roles_data = [
-            {"tenant": "public", "name": "admin_tenant"},
-            {"tenant": "public", "name": "manager"},
-            {"tenant": "public", "name": "operator"},
-            {"tenant": "client1", "name": "admin_tenant"},
-            {"tenant": "client1", "name": "manager"},
-            {"tenant": "client1", "name": "operator"},
-            {"tenant": "client2", "name": "admin_tenant"},
-            {"tenant": "client2", "name": "manager"},
-            {"tenant": "client2", "name": "operator"},
-        ]
         roles = {}
         for rd in roles_data:
             tenant_obj = tenants[rd["tenant"]]
@@ -153,10 +167,6 @@ async def seed_full_test_data():
         # ----------------------
         # 5) Permissions
         # ----------------------
-        permissions_data = [
-            {"name": "read", "description": "Read access"},
-            {"name": "write", "description": "Write access"},
-        ]
         permissions = {}
         for pd in permissions_data:
             result = await db.execute(select(Permission).where(Permission.name == pd["name"]))
@@ -231,5 +241,114 @@ async def seed_full_test_data():
 
         print("Seed completed: 3 tenants x 3 users with roles.")
 
+async def seed_bulk(tenant_count: int = 3, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = None):
+    # Same fixture as seed_full_test_data, written set-based in one transaction.
+    # Every table is INSERT ... ON CONFLICT DO NOTHING on its natural key, so reruns only add what is missing.
+    tenants_data, users_data, roles_data, permissions_data = build_fixture(tenant_count)
+    now = datetime.datetime.utcnow()
+    counts = {}
+    started = time.perf_counter()
+
+    async with AsyncLocalSession() as db:
+        # 1) Tenants
+        counts["tenants"] = await insert_ignore(db, Tenant, [
+            {"id": uuid.uuid4(), "name": td["name"], "subdomain": td["subdomain"], "code": td["code"],
+             "status": True, "created_at": now, "updated_at": now}
+            for td in tenants_data
+        ], ["subdomain"], batch_size)
+        tenant_ids = dict(await select_in(db, [Tenant.subdomain, Tenant.id], Tenant.subdomain,
+                                           [td["subdomain"] for td in tenants_data], batch_size))
+
+        # 2) Users, hashing only the ones that do not exist yet
+        emails = [ud["email"] for ud in users_data]
+        existing = {email for email, _ in await select_in(db, [User.email, User.id], User.email, emails, batch_size)}
+        new_users = [ud for ud in users_data if ud["email"] not in existing]
+        hashes = hash_passwords([ud["password"] for ud in new_users], workers)
+        counts["users"] = await insert_ignore(db, User, [
+            {"id": uuid.uuid4(), "email": ud["email"], "password_hash": password_hash, "full_name": ud["full_name"],
+             "is_active": True, "is_superuser": "admin" in ud["email"], "created_at": now, "updated_at": now}
+            for ud, password_hash in zip(new_users, hashes)
+        ], ["email"], batch_size)
+        user_ids = dict(await select_in(db, [User.email, User.id], User.email, emails, batch_size))
+
+        # 3) UserTenants
+        counts["user_tenants"] = await insert_ignore(db, UserTenant, [
+            {"id": uuid.uuid4(), "user_id": user_ids[ud["email"]], "tenant_id": tenant_ids[ud["tenant"]],
+             "is_active": True, "default_tenant": ud["role"] == "admin_tenant", "created_at": now, "updated_at": now}
+            for ud in users_data
+        ], ["user_id", "tenant_id"], batch_size)
+        user_tenant_ids = {
+            (user_id, tenant_id): ut_id
+            for user_id, tenant_id, ut_id in await select_in(
+                db, [UserTenant.user_id, UserTenant.tenant_id, UserTenant.id], UserTenant.tenant_id,
+                list(tenant_ids.values()), batch_size)
+        }
+
+        # 4) Roles
+        counts["roles"] = await insert_ignore(db, Role, [
+            {"id": uuid.uuid4(), "tenant_id": tenant_ids[rd["tenant"]], "name": rd["name"],
+             "description": f"{rd['name']} role", "is_system": True}
+            for rd in roles_data
+        ], ["tenant_id", "name"], batch_size)
+        role_ids = {
+            (tenant_id, name): role_id
+            for tenant_id, name, role_id in await select_in(
+                db, [Role.tenant_id, Role.name, Role.id], Role.tenant_id, list(tenant_ids.values()), batch_size)
+        }
+
+        # 5) Permissions
+        counts["permissions"] = await insert_ignore(db, Permission, [
+            {"id": uuid.uuid4(), "name": pd["name"], "description": pd["description"]}
+            for pd in permissions_data
+        ], ["name"], batch_size)
+        permission_ids = dict(await select_in(db, [Permission.name, Permission.id], Permission.name,
+                                               [pd["name"] for pd in permissions_data], batch_size))
+
+        # 6) RolePermissions
+        counts["role_permissions"] = await insert_ignore(db, RolePermission, [
+            {"id": uuid.uuid4(), "role_id": role_ids[(tenant_ids[rd["tenant"]], rd["name"])], "permission_id": permission_id}
+            for rd in roles_data
+            for permission_id in permission_ids.values()
+        ], ["role_id", "permission_id"], batch_size)
+
+        # 7) UserRoles
+        memberships = [
+            (user_tenant_ids[(user_ids[ud["email"]], tenant_ids[ud["tenant"]])], ud)
+            for ud in users_data
+        ]
+        counts["user_roles"] = await insert_ignore(db, UserRole, [
+            {"id": uuid.uuid4(), "usertenant_id": ut_id, "role_id": role_ids[(tenant_ids[ud["tenant"]], ud["role"])]}
+            for ut_id, ud in memberships
+        ], ["usertenant_id", "role_id"], batch_size)
+
+        # 8) Refresh tokens (demo)
+        counts["refresh_tokens"] = await insert_ignore(db, RefreshToken, [
+            {"id": uuid.uuid4(), "user_tenant_id": ut_id, "jti": str(uuid.uuid5(SEED_NAMESPACE, f"refresh:{ut_id}")),
+             "revoked": False, "expires_at": now + timedelta(days=14), "user_agent": "Seed Script",
+             "ip": "127.0.0.1", "created_at": now}
+            for ut_id, _ in memberships
+        ], ["jti"], batch_size)
+
+        await db.commit()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    for table, count in counts.items():
+        print(f"  {table:<17} {count:>9,} inserted")
+    print(f"Bulk seed completed: {len(tenants_data)} tenants, {total:,} new rows in {elapsed:.2f}s "
+          f"({total / elapsed:,.0f} rows/s, {len(hashes):,} passwords hashed)")
+    return counts
+
+
 if __name__ == "__main__":
-    asyncio.run(seed_full_test_data())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed demo tenants, users, roles and permissions")
+    parser.add_argument("--bulk", action="store_true", help="set-based idempotent seeding in one transaction")
+    parser.add_argument("--tenants", type=int, default=3, help="tenant count for --bulk (3 demo tenants + tenant4..N)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="password hashing threads (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.bulk:
+        asyncio.run(seed_bulk(args.tenants, args.batch_size, args.workers))
+    else:
+        asyncio.run(seed_full_test_data())
\ No newline at end of file
@@ -0,0 +1,129 @@
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+# Reads the JSONL file written with TRACE_EXPORTER=jsonl (one trace per line) and prints
+# either a list of traces or one trace as a span tree with its critical path.
+# Standalone on purpose: no app imports, so it runs anywhere the file can be copied to.
+#
+#   python scripts/trace_viewer.py traces.jsonl                      # latest traces
+#   python scripts/trace_viewer.py traces.jsonl --slowest 10 --route /api/auth/me
+#   python scripts/trace_viewer.py traces.jsonl --trace 4bf92f35     # tree + critical path
+
+
+def load_traces(path: str) -> list[dict]:
+    traces = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                traces.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"skipping malformed line {line_no}", file=sys.stderr)
+    return traces
+
+
+def root_span(trace: dict) -> dict:
+    ids = {span["span_id"] for span in trace["spans"]}
+    roots = [span for span in trace["spans"] if span["parent_id"] not in ids]
+    return min(roots, key=lambda span: span["start_us"])
+
+
+def _end(span: dict) -> float:
+    return span["start_us"] + span["duration_us"]
+
+
+def critical_path(span: dict, children: dict) -> list[tuple[dict, float]]:
+    """
+    [(span, self time on the path)] walking back from the span's end: the child that finished
+    last is on the path, then whichever child finished last before that one started, and so on.
+    Children running concurrently with a path child are off the path.
+    """
+    path = []
+    cursor = _end(span)
+    on_path_us = 0.0
+    for child in sorted(children.get(span["span_id"], []), key=_end, reverse=True):
+        if _end(child) <= cursor + 1.0:  # 1us of slack for rounding
+            path.extend(critical_path(child, children))
+            on_path_us += child["duration_us"]
+            cursor = child["start_us"]
+    return [(span, max(span["duration_us"] - on_path_us, 0.0))] + path
+
+
+def _label(span: dict) -> str:
+    attributes = span.get("attributes") or {}
+    if span["name"] == "sql":
+        statement = " ".join(str(attributes.get("db.statement", "")).split())
+        return f"sql  {statement[:70]}{'...' if len(statement) > 70 else ''}"
+    extra = ", ".join(f"{k}={v}" for k, v in attributes.items() if k not in ("http.method", "http.target"))
+    return f"{span['name']}  [{extra}]" if extra else span["name"]
+
+
+def print_tree(span: dict, children: dict, on_path: set, depth: int = 0):
+    marker = "*" if span["span_id"] in on_path else " "
+    error = f"  !{span['error']}" if span.get("error") else ""
+    print(f"{marker} {span['start_us'] / 1000:8.2f} {span['duration_us'] / 1000:8.2f} ms  {'  ' * depth}{_label(span)}{error}")
+    for child in sorted(children.get(span["span_id"], []), key=lambda s: s["start_us"]):
+        print_tree(child, children, on_path, depth + 1)
+
+
+def show_trace(trace: dict):
+    children = defaultdict(list)
+    for span in trace["spans"]:
+        children[span["parent_id"]].append(span)
+    root = root_span(trace)
+    path = critical_path(root, children)
+
+    print(f"trace {trace['trace_id']}  {root['name']}  {root['duration_us'] / 1000:.2f} ms  {len(trace['spans'])} spans")
+    print(f"  {'start':>8} {'duration':>8}")
+    print_tree(root, children, {span["span_id"] for span, _ in path})
+
+    print("\ncritical path (self time):")
+    by_name = defaultdict(lambda: [0.0, 0])
+    for span, self_us in path:
+        entry = by_name[span["name"]]
+        entry[0] += self_us
+        entry[1] += 1
+    total = root["duration_us"] or 1.0
+    for name, (self_us, count) in sorted(by_name.items(), key=lambda item: -item[1][0]):
+        calls = f" x{count}" if count > 1 else ""
+        print(f"  {self_us / 1000:8.2f} ms  {self_us / total * 100:5.1f}%  {name}{calls}")
+
+
+def list_traces(traces: list[dict], limit: int, slowest: bool):
+    rows = [(trace, root_span(trace)) for trace in traces]
+    if slowest:
+        rows.sort(key=lambda row: -row[1]["duration_us"])
+    else:
+        rows = rows[::-1]  # newest first
+    for trace, root in rows[:limit]:
+        status = (root.get("attributes") or {}).get("http.status_code", "")
+        print(f"{trace['trace_id']}  {root['duration_us'] / 1000:8.2f} ms  {status!s:>3}  {len(trace['spans']):>3} spans  {root['name']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect traces exported with TRACE_EXPORTER=jsonl")
+    parser.add_argument("path", nargs="?", default="traces.jsonl")
+    parser.add_argument("--trace", help="trace id (or unique prefix) to show as a tree with its critical path")
+    parser.add_argument("--route", help="only traces whose root span name contains this")
+    parser.add_argument("--slowest", type=int, metavar="N", help="list the N slowest traces instead of the latest")
+    parser.add_argument("--limit", type=int, default=20, help="traces to list (default 20)")
+    args = parser.parse_args()
+
+    traces = load_traces(args.path)
+    if args.route:
+        traces = [trace for trace in traces if args.route in root_span(trace)["name"]]
+
+    if args.trace:
+        matches = [trace for trace in traces if trace["trace_id"].startswith(args.trace.lower())]
+        if not matches:
+            sys.exit(f"no trace matching {args.trace}")
+        if len({trace["trace_id"] for trace in matches}) > 1:
+            sys.exit(f"{args.trace} matches several traces, use a longer prefix")
+        for trace in matches:  # a continued trace can arrive in several requests
+            show_trace(trace)
+    else:
+        list_traces(traces, args.slowest or args.limit, bool(args.slowest))
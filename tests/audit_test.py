@@ -0,0 +1,86 @@
+import uuid
+import pytest
+from sqlalchemy import func, select
+from app.models import AuditLog, Tenant
+from app.services.audit import AuditWriter
+
+
+async def _tenant(SessionLocal):
+    tenant = Tenant(id=uuid.uuid4(), name="Audit", subdomain="audit", code="AUDIT", status=True)
+    async with SessionLocal() as db:
+        db.add(tenant)
+        await db.commit()
+    return tenant
+
+
+async def _count(SessionLocal):
+    async with SessionLocal() as db:
+        return (await db.execute(select(func.count()).select_from(AuditLog))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_flushes_batches_and_drains_on_stop(session_factory):
+    tenant = await _tenant(session_factory)
+
+    writer = AuditWriter(session_factory=session_factory, maxsize=100, batch_size=10, flush_interval=5)
+    await writer.start()
+    for i in range(25):
+        assert await writer.log("test.event", tenant.id, metadata={"i": i})
+    await writer.stop()
+
+    assert writer.written == 25
+    assert writer.dropped == 0
+    assert await _count(session_factory) == 25
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_loses_only_the_bad_event_of_a_batch(session_factory):
+    tenant = await _tenant(session_factory)
+
+    writer = AuditWriter(session_factory=session_factory, maxsize=100, batch_size=10, flush_interval=5)
+    await writer.start()
+    for i in range(10):
+        # action is NOT NULL: this one row fails the batch's bulk write
+        await writer.log(None if i == 6 else "test.event", tenant.id, metadata={"i": i})
+    await writer.stop()
+
+    assert (writer.written, writer.failed) == (9, 1)
+    assert await _count(session_factory) == 9
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_drop_newest_on_overflow(session_factory):
+    tenant = await _tenant(session_factory)
+
+    writer = AuditWriter(session_factory=session_factory, maxsize=5, batch_size=100, overflow_policy="drop_newest")
+    await writer.start()
+    # the flusher cannot run between these calls, so the queue overflows
+    accepted = [await writer.log("test.event", tenant.id) for _ in range(8)]
+    await writer.stop()
+
+    assert accepted.count(True) == 5
+    assert writer.dropped == 3
+    assert await _count(session_factory) == 5
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_drop_oldest_keeps_latest_events(session_factory):
+    tenant = await _tenant(session_factory)
+
+    writer = AuditWriter(session_factory=session_factory, maxsize=5, batch_size=100, overflow_policy="drop_oldest")
+    await writer.start()
+    for i in range(8):
+        await writer.log("test.event", tenant.id, metadata={"i": i})
+    await writer.stop()
+
+    async with session_factory() as db:
+        rows = (await db.execute(select(AuditLog.meta_data))).scalars().all()
+    assert sorted(row["i"] for row in rows) == [3, 4, 5, 6, 7]
+    assert writer.dropped == 3
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_rejects_events_when_not_running():
+    writer = AuditWriter(session_factory=None)
+    assert await writer.log("test.event", uuid.uuid4()) is False
+    assert writer.dropped == 1
@@ -0,0 +1,108 @@
+import pytest
+import pytest_asyncio
+from contextlib import contextmanager
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.crud.user import password_context
+from app.db import get_db
+from app.main import app
+from app.services import query_stats, tracing
+from app.services.api_keys import api_key_cache
+from app.services.branding import branding_cache
+from app.services.cache import response_cache
+import app.middleware.tenant_middleware as tenant_mw
+from tests.db_setup import create_test_engine, reset_schema
+from tests.seed import seed_test_data
+
+# Schema and seed data are created once per session. Every test then runs inside
+# one outer transaction that is rolled back afterwards; session.commit() in app
+# code only releases a savepoint, so tests cannot see each other's writes.
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--db-url",
+        default=None,
+        help="database for the test session (default: TEST_DB_URL, "
+             "e.g. sqlite+aiosqlite:///:memory: to run without Postgres)",
+    )
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hashing():
+    # bcrypt's minimum cost; production hashes are unaffected, tests just stop paying 300ms per hash
+    password_context().update(bcrypt_sha256__rounds=4)
+    yield
+
+
+@pytest.fixture(autouse=True)
+def empty_response_cache():
+    # cached bodies would outlive the rolled-back data they were rendered from
+    response_cache.clear()
+    branding_cache.clear()
+    api_key_cache.clear()
+    yield
+
+
+@pytest_asyncio.fixture(scope="session")
+async def engine(request):
+    engine = create_test_engine(request.config.getoption("--db-url"))
+    query_stats.install(engine)
+    tracing.install(engine)
+    await reset_schema(engine)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def seed_data(engine):
+    SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return await seed_test_data(SessionLocal)
+
+
+@pytest_asyncio.fixture
+async def session_factory(engine, seed_data):
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        yield sessionmaker(
+            bind=conn,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+        await transaction.rollback()
+
+
+@pytest_asyncio.fixture
+async def client(session_factory, monkeypatch):
+    async def _get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = _get_db
+    monkeypatch.setattr(tenant_mw, "AsyncLocalSession", session_factory)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://client1.local.com") as ac:
+        yield ac
+
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def query_budget():
+    """
+    with query_budget(5):
+        await client.get(...)
+
+    Fails with the statement breakdown when the block runs more than max_statements.
+    """
+    @contextmanager
+    def budget(max_statements: int):
+        with query_stats.capture_queries() as stats:
+            yield stats
+        assert stats.count <= max_statements, (
+            f"query budget exceeded: {stats.count} > {max_statements}\n{stats.report()}"
+        )
+    return budget
@@ -1,18 +1,44 @@
+from typing import Optional
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from app.models import Base
 from tests.test_config import test_settings
 
 
-async def init_test_db():
-    
-    engine = create_async_engine(test_settings.TEST_DB_URL, echo=False, future=True)
+def create_test_engine(db_url: Optional[str] = None):
+    db_url = db_url or test_settings.TEST_DB_URL
+    options = {}
+    if db_url.startswith("sqlite") and ":memory:" in db_url:
+        # one shared connection, otherwise every checkout sees a fresh empty database
+        options = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    engine = create_async_engine(db_url, echo=False, future=True, **options)
+
+    if db_url.startswith("sqlite"):
+        # the sqlite3 driver manages transactions itself and breaks SAVEPOINT;
+        # let SQLAlchemy emit BEGIN so per-test rollback works like on Postgres
+        @event.listens_for(engine.sync_engine, "connect")
+        def _disable_driver_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine.sync_engine, "begin")
+        def _begin(conn):
+            conn.exec_driver_sql("BEGIN")
+
+    return engine
 
-    
+
+async def reset_schema(engine):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
 
+
+async def init_test_db():
+    engine = create_test_engine()
+    await reset_schema(engine)
+
     async_session = sessionmaker(
         engine, class_=AsyncSession, expire_on_commit=False
     )
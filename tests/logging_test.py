@@ -0,0 +1,31 @@
+import json
+import logging
+from app.config import settings
+from app.logging_config import configure_logging, shutdown_logging
+
+
+def test_queue_logging_writes_json_off_thread_and_samples(capsys, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_FORMAT", "json")
+    monkeypatch.setattr(settings, "LOG_SAMPLE_RATES", {"noisy.event": 0.0})
+    root = logging.getLogger()
+    level = root.level
+    configure_logging(force=True)
+    try:
+        logger = logging.getLogger("tests.logging")
+        logger.info("hello %s", "world", extra={"tenant": "client1"})
+        for _ in range(100):
+            logger.info("sampled away", extra={"event": "noisy.event"})
+        logger.warning("kept despite sampling", extra={"event": "noisy.event"})
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception("boom")
+    finally:
+        shutdown_logging()  # drains the queue
+        root.setLevel(level)
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    ours = [line for line in lines if line["logger"] == "tests.logging"]
+    assert [line["msg"] for line in ours] == ["hello world", "kept despite sampling", "boom"]
+    assert ours[0]["tenant"] == "client1"
+    assert "ZeroDivisionError" in ours[2]["exc"]
@@ -1,43 +1,15 @@
 import pytest
-import pytest_asyncio
-from httpx import AsyncClient, ASGITransport
-from app.main import app
-from app.models import UserRole, UserTenant, Role
-from seed import seed_test_data
-from tests.db_setup import init_test_db
+from app.models import UserRole, UserTenant, Role, AuditLog
 from sqlalchemy.future import select
-
-
-
-@pytest_asyncio.fixture
-async def client():
-    engine, SessionLocal = await init_test_db()
-
-    # dependency override
-    from app.db import get_db
-    import app.middleware.tenant_middleware as tenant_mw
-    tenant_mw.AsyncLocalSession = SessionLocal
-
-    async def _get_db():
-        async with SessionLocal() as session:
-            yield session
-
-    app.dependency_overrides[get_db] = _get_db
-
-    
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://client1.local.com") as ac:
-        yield ac
-
-
-    await engine.dispose()
+from datetime import datetime, timedelta, timezone
+import json
+import uuid
 
 
 
 @pytest.mark.asyncio
-async def test_successful_admin_token(client):
-    _, SessionLocal = await init_test_db()
-    data = await seed_test_data(SessionLocal)
+async def test_successful_admin_token(client, seed_data):
+    data = seed_data
 
     tenant = data["tenants"]["client1"]
     user = data["users"]["admin@client1.com"]
@@ -55,9 +27,8 @@ async def test_successful_admin_token(client):
 
 
 @pytest.mark.asyncio
-async def test_successful_admin_login(client):
-    _, SessionLocal = await init_test_db()
-    data = await seed_test_data(SessionLocal)
+async def test_successful_admin_login(client, seed_data):
+    data = seed_data
 
     tenant = data["tenants"]["client1"]
     user = data["users"]["admin@client1.com"]
@@ -74,14 +45,13 @@ async def test_successful_admin_login(client):
     assert body["tenant"] == tenant.subdomain
 
 @pytest.mark.asyncio
-async def test_user_me(client):
-    _, SessionLocal = await init_test_db()
-    data = await seed_test_data(SessionLocal)
+async def test_user_me(client, seed_data, session_factory):
+    data = seed_data
 
     tenant = data["tenants"]["client1"]
     user = data["users"]["admin@client1.com"]
     
-    async with SessionLocal() as db:
+    async with session_factory() as db:
         stmt = await db.execute(
             select(Role).join(UserRole, UserRole.role_id == Role.id)
             .join(UserTenant, UserTenant.id == UserRole.usertenant_id)
@@ -120,9 +90,8 @@ async def test_user_me(client):
 
 
 @pytest.mark.asyncio
-async def test_wrong_tenant_login_try(client):
-    _, SessionLocal = await init_test_db()
-    data = await seed_test_data(SessionLocal)
+async def test_wrong_tenant_login_try(client, seed_data):
+    data = seed_data
 
     tenant = data["tenants"]["client1"]
     user = data["users"]["admin@client1.com"]
@@ -138,10 +107,8 @@ async def test_wrong_tenant_login_try(client):
     assert body["detail"] == "User does not belong to this tenant" 
     
     
-async def test_wrong_password(client):  
-    _, SessionLocal = await init_test_db() 
-
-    data = await seed_test_data(SessionLocal) 
+async def test_wrong_password(client, seed_data):  
+    data = seed_data
     tenant = data["tenants"]["client1"] 
     user = data["users"]["admin@client1.com"] 
     
@@ -155,9 +122,8 @@ async def test_wrong_password(client):
     assert body["detail"] == "Invalid credentials"
 
 @pytest.mark.asyncio
-async def test_logout_revokes_refresh_token(client):
-    _, SessionLocal = await init_test_db()
-    data = await seed_test_data(SessionLocal)
+async def test_logout_revokes_refresh_token(client, seed_data):
+    data = seed_data
     user = data["users"]["admin@client1.com"]
 
     # 1) Login
@@ -189,9 +155,37 @@ async def test_logout_revokes_refresh_token(client):
 
 
 @pytest.mark.asyncio
-async def test_admin_access(client):
-    _, SessionLocal = await init_test_db()
-    data = await seed_test_data(SessionLocal)
+async def test_refresh_rotates_token(client, seed_data):
+    data = seed_data
+    user = data["users"]["admin@client1.com"]
+
+    login_response = await client.post(
+        "/api/auth/login",
+        params={"email": user.email, "password": "admin123"},
+        headers={"Host": "client1.local.com"},
+    )
+    refresh_token = login_response.json()["refresh_token"]
+
+    response = await client.post(
+        "/api/auth/refresh",
+        json={"refresh_token": refresh_token},
+        headers={"Host": "client1.local.com"},
+    )
+    assert response.status_code == 200
+    assert response.json()["refresh_token"] != refresh_token
+
+    # the old token was revoked by the rotation
+    reused = await client.post(
+        "/api/auth/refresh",
+        json={"refresh_token": refresh_token},
+        headers={"Host": "client1.local.com"},
+    )
+    assert reused.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_admin_access(client, seed_data):
+    data = seed_data
 
     tenant = data["tenants"]["client1"]
     user = data["users"]["admin@client1.com"]
@@ -220,9 +214,8 @@ async def test_admin_access(client):
     assert body["msg"] == expected_msg
 
 @pytest.mark.asyncio
-async def test_no_admin_access_for_operator(client):
-    _, SessionLocal = await init_test_db()
-    data = await seed_test_data(SessionLocal)
+async def test_no_admin_access_for_operator(client, seed_data):
+    data = seed_data
 
     tenant = data["tenants"]["client1"]
     user = data["users"]["operator@client1.com"]
@@ -251,9 +244,8 @@ async def test_no_admin_access_for_operator(client):
 
 
 @pytest.mark.asyncio
-async def test_forgot_password_existing_user(client):
-    _, SessionLocal = await init_test_db()
-    data = await seed_test_data(SessionLocal)
+async def test_forgot_password_existing_user(client, seed_data):
+    data = seed_data
     user = data["users"]["admin@client1.com"]
 
     response = await client.post(
@@ -270,9 +262,7 @@ async def test_forgot_password_existing_user(client):
 
 
 @pytest.mark.asyncio
-async def test_forgot_password_nonexistent_user(client):
-    _, SessionLocal = await init_test_db()
-    await seed_test_data(SessionLocal)
+async def test_forgot_password_nonexistent_user(client, seed_data):
 
     response = await client.post(
         "/api/auth/forgot-password",
@@ -286,9 +276,8 @@ async def test_forgot_password_nonexistent_user(client):
 
 
 @pytest.mark.asyncio
-async def test_tenant_data(client):
-    _, SessionLocal = await init_test_db()
-    data = await seed_test_data(SessionLocal)
+async def test_tenant_data(client, seed_data):
+    data = seed_data
 
     tenant = data["tenants"]["client1"]
     user = data["users"]["operator@client1.com"]
@@ -314,4 +303,793 @@ async def test_tenant_data(client):
     assert response.status_code == 200
     body = response.json()
     assert body["tenant_name"] == f"{tenant.name}"
-    assert body["subdomain"] == f"{tenant.subdomain}"
\ No newline at end of file
+    assert body["subdomain"] == f"{tenant.subdomain}"
+
+
+async def _seed_audit_logs(SessionLocal, tenant, user, count):
+    now = datetime.now(timezone.utc)
+    async with SessionLocal() as db:
+        for i in range(count):
+            db.add(AuditLog(
+                id=uuid.uuid4(),
+                tenant_id=tenant.id,
+                user_id=user.id,
+                action="auth.login" if i % 2 else "auth.logout",
+                entity="user",
+                meta_data={"i": i},
+                created_at=now - timedelta(minutes=i),
+            ))
+        await db.commit()
+
+
+async def _admin_token(client, user):
+    login_response = await client.post(
+        "/api/auth/login",
+        params={"email": user.email, "password": "admin123"},
+        headers={"Host": "client1.local.com"},
+    )
+    assert login_response.status_code == 200
+    return login_response.json()["access_token"]
+
+
+@pytest.mark.asyncio
+async def test_audit_logs_keyset_pagination(client, seed_data, session_factory):
+    data = seed_data
+
+    tenant = data["tenants"]["client1"]
+    user = data["users"]["admin@client1.com"]
+    await _seed_audit_logs(session_factory, tenant, user, 12)
+    await _seed_audit_logs(session_factory, data["tenants"]["client2"], data["users"]["admin@client2.com"], 3)
+    token = await _admin_token(client, user)
+    headers = {"Host": "client1.local.com", "Authorization": f"Bearer {token}"}
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 5, "entity": "user"}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/audit-logs", params=params, headers=headers)
+        assert response.status_code == 200
+        body = response.json()
+        seen.extend(item["metadata"]["i"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    # newest first, every row exactly once, other tenants never visible
+    assert seen == list(range(12))
+
+    response = await client.get("/api/audit-logs", params={"action": "auth.logout"}, headers=headers)
+    assert [item["metadata"]["i"] for item in response.json()["items"]] == [0, 2, 4, 6, 8, 10]
+
+    response = await client.get("/api/audit-logs", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_audit_logs_ndjson_export(client, seed_data, session_factory):
+    data = seed_data
+
+    tenant = data["tenants"]["client1"]
+    user = data["users"]["admin@client1.com"]
+    await _seed_audit_logs(session_factory, tenant, user, 7)
+    token = await _admin_token(client, user)
+
+    response = await client.get(
+        "/api/audit-logs/export",
+        params={"entity": "user"},
+        headers={"Host": "client1.local.com", "Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["metadata"]["i"] for line in lines] == list(range(7))
+    assert all(line["tenant_id"] == str(tenant.id) for line in lines)
+
+
+@pytest.mark.asyncio
+async def test_audit_partition_adopts_rows_from_default(session_factory, seed_data):
+    from datetime import date
+    from sqlalchemy import text
+    from app.services.audit_partitions import default_partition, ensure_partitions
+
+    tenant = seed_data["tenants"]["client1"]
+    async with session_factory() as db:
+        conn = await db.connection()
+        if conn.dialect.name != "postgresql":
+            pytest.skip("audit_logs is partitioned on PostgreSQL only")
+        # maintenance fell behind: March 2020 has no partition, so its rows went to the default one
+        for day in (1, 15, 31):
+            db.add(AuditLog(id=uuid.uuid4(), tenant_id=tenant.id, action="auth.login",
+                            created_at=datetime(2020, 3, day, 12, tzinfo=timezone.utc)))
+        db.add(AuditLog(id=uuid.uuid4(), tenant_id=tenant.id, action="auth.login",
+                        created_at=datetime(2020, 4, 1, tzinfo=timezone.utc)))
+        await db.flush()
+
+        created = await conn.run_sync(ensure_partitions, 0, 0, date(2020, 3, 10))
+        assert created == ["audit_logs_2020_03"]
+        assert (await conn.execute(text("SELECT count(*) FROM audit_logs_2020_03"))).scalar() == 3
+        # the default partition is attached again, with the other months' rows
+        assert await conn.run_sync(default_partition) == "audit_logs_default"
+        stranded = "SELECT count(*) FROM audit_logs_default WHERE created_at >= '2020-03-01' AND created_at < '2020-05-01'"
+        assert (await conn.execute(text(stranded))).scalar() == 1
+        assert await conn.run_sync(ensure_partitions, 0, 0, date(2020, 3, 10)) == []
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header_is_opt_in(client, seed_data, monkeypatch):
+    from app.config import settings
+    from app.services.timing import route_stats
+
+    user = seed_data["users"]["admin@client1.com"]
+    token = await _admin_token(client, user)
+    headers = {"Host": "client1.local.com", "Authorization": f"Bearer {token}"}
+
+    response = await client.get("/api/auth/me", headers=headers)
+    assert "server-timing" not in response.headers
+
+    monkeypatch.setattr(settings, "SERVER_TIMING", "header")
+    route_stats.reset()
+    response = await client.get("/api/auth/me", headers={**headers, "X-Server-Timing": "1"})
+    assert response.status_code == 200
+    phases = {part.split(";")[0] for part in response.headers["server-timing"].split(", ")}
+    assert {"tenant", "jwt", "user", "total"} <= phases
+
+    [stats] = [row for row in route_stats.snapshot() if row["route"] == "/api/auth/me"]
+    assert stats["requests"] == 1
+    assert "tenant" in stats["phases_ms"]
+
+
+@pytest.mark.asyncio
+async def test_query_budgets(client, seed_data, query_budget):
+    user = seed_data["users"]["admin@client1.com"]
+    token = await _admin_token(client, user)
+    headers = {"Host": "client1.local.com", "Authorization": f"Bearer {token}"}
+
+    with query_budget(9) as stats:
+        response = await client.get("/api/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert stats.count > 0
+
+    with query_budget(9):
+        response = await client.get("/api/tenant/tenant-data", headers=headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_repeated_statements_are_flagged(session_factory):
+    from app.models import Tenant
+    from app.services.query_stats import capture_queries
+
+    async with session_factory() as db:
+        with capture_queries() as stats:
+            for subdomain in ["client1", "client2", "nope", "client1", "client2"]:
+                await db.execute(select(Tenant).where(Tenant.subdomain == subdomain))
+
+    [(statement, count)] = stats.repeated(threshold=5)
+    assert count == 5
+    assert "FROM tenants" in statement
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client, seed_data, monkeypatch):
+    from app.config import settings
+
+    # off unless enabled, and then only with the token when one is set
+    assert (await client.get("/metrics", headers={"Host": "10.0.0.7:8000"})).status_code == 404
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-me")
+    unauthorized = await client.get("/metrics", headers={"Host": "10.0.0.7:8000", "Authorization": "Bearer wrong"})
+    assert unauthorized.status_code == 401
+
+    user = seed_data["users"]["admin@client1.com"]
+    await _admin_token(client, user)
+    await client.post(
+        "/api/auth/login",
+        params={"email": user.email, "password": "wrong-password"},
+        headers={"Host": "client1.local.com"},
+    )
+
+    # scrapers address the pod, not a tenant host
+    response = await client.get("/metrics", headers={"Host": "10.0.0.7:8000", "Authorization": "Bearer scrape-me"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'auth_logins_total{endpoint="login",result="invalid_credentials"}' in body
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/api/auth/login",tier="standard",le="+Inf"}' in body
+    assert "# TYPE db_statement_duration_seconds histogram" in body
+    assert "bcrypt_queue_depth 0" in body
+
+
+@pytest.mark.asyncio
+async def test_tracing_continues_traceparent(client, seed_data, monkeypatch):
+    from app.config import settings
+    from app.services.tracing import memory_exporter
+
+    user = seed_data["users"]["admin@client1.com"]
+    token = await _admin_token(client, user)
+
+    monkeypatch.setattr(settings, "TRACING", True)
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATE", 0.0)
+    memory_exporter.clear()
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    response = await client.get(
+        "/api/tenant/tenant-data",
+        headers={
+            "Host": "client1.local.com",
+            "Authorization": f"Bearer {token}",
+            "traceparent": f"00-{trace_id}-00f067aa0ba902b7-01",
+        },
+    )
+    assert response.status_code == 200
+    assert response.headers["X-Trace-Id"] == trace_id
+
+    trace = memory_exporter.get(trace_id)
+    spans = {span["name"]: span for span in trace["spans"]}
+    root = spans["GET /api/tenant/tenant-data"]
+    assert root["parent_id"] == "00f067aa0ba902b7"
+    assert root["attributes"]["tenant"] == "client1"
+    for name in ["TenantMiddleware.dispatch", "get_current_tenant", "get_current_user", "check_permission", "sql"]:
+        assert name in spans
+
+    # unsampled parent and a zero rate: nothing is recorded
+    memory_exporter.clear()
+    response = await client.get(
+        "/api/auth/me",
+        headers={
+            "Host": "client1.local.com",
+            "Authorization": f"Bearer {token}",
+            "traceparent": f"00-{trace_id}-00f067aa0ba902b7-00",
+        },
+    )
+    assert response.status_code == 200
+    assert "X-Trace-Id" not in response.headers
+    assert not memory_exporter.traces
+
+
+@pytest.mark.asyncio
+async def test_unknown_tenant_is_a_404(client, seed_data):
+    response = await client.get("/api/auth/me", headers={"Host": "nope.local.com"})
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Tenant not found"}
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_me_and_tenant_data(client, seed_data, session_factory):
+    from app.services.query_stats import capture_queries
+    from app.services.rbac import bump_authz_version
+
+    user = seed_data["users"]["admin@client1.com"]
+    token = await _admin_token(client, user)
+    headers = {"Host": "client1.local.com", "Authorization": f"Bearer {token}"}
+
+    etags = {}
+    for path in ["/api/auth/me", "/api/tenant/tenant-data"]:
+        with capture_queries() as full:
+            response = await client.get(path, headers=headers)
+        assert response.status_code == 200
+        etags[path] = response.headers["ETag"]
+
+        # the membership / role / permission queries are skipped, not just the body
+        with capture_queries() as conditional:
+            response = await client.get(path, headers={**headers, "If-None-Match": f'W/{etags[path]}, "other"'})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etags[path]
+        assert conditional.count < full.count
+
+    async with session_factory() as db:
+        await bump_authz_version(db, seed_data["tenants"]["client1"].id)
+        await db.commit()
+
+    response = await client.get("/api/auth/me", headers={**headers, "If-None-Match": etags["/api/auth/me"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etags["/api/auth/me"]
+    assert "admin_tenant" in response.json()["roles"]
+
+
+@pytest.mark.asyncio
+async def test_default_response_class_keeps_pydantic_fast_path(client, seed_data, monkeypatch):
+    import app.responses
+
+    rendered = []
+    real_dumps = app.responses.dumps
+    monkeypatch.setattr(app.responses, "dumps", lambda content: rendered.append(content) or real_dumps(content))
+
+    user = seed_data["users"]["admin@client1.com"]
+    response = await client.post(
+        "/api/auth/login",
+        params={"email": user.email, "password": "admin123"},
+        headers={"Host": "client1.local.com"},
+    )
+    assert response.status_code == 200
+    assert len(rendered) == 1  # plain dict: rendered by orjson
+
+    # response_model route: must stay on Pydantic's dump_json path, not the response class
+    response = await client.post(
+        "/api/auth/refresh",
+        json={"refresh_token": response.json()["refresh_token"]},
+        headers={"Host": "client1.local.com"},
+    )
+    assert response.status_code == 200
+    assert len(rendered) == 1
+
+
+def test_cold_import_skips_heavy_modules():
+    # cold start: table names are static and passlib loads on the first hash
+    import subprocess
+    import sys
+
+    code = "import sys, app.main; print([m for m in ('inflect', 'passlib.context') if m in sys.modules])"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "[]"
+
+
+@pytest.mark.asyncio
+async def test_ready_only_after_warmup(engine, seed_data):
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+    from app.services import warmup
+
+    warmup.state.reset()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://10.0.0.7:8000") as probe:
+        response = await probe.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming_up"
+
+        await warmup.run(engine)
+
+        response = await probe.get("/ready")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["warmup"]["error"] is None
+        assert set(body["warmup"]["steps"]) == {"db", "bcrypt"}
+
+
+@pytest.mark.asyncio
+async def test_tenant_branding_is_cached_compressed_and_versioned(client, seed_data, session_factory, query_budget):
+    from sqlalchemy import inspect, update
+    from app.models import Tenant
+    from app.services.tenant import get_tenant_by_host
+
+    tenant = seed_data["tenants"]["client1"]
+    async with session_factory() as db:
+        await db.execute(update(Tenant).where(Tenant.id == tenant.id).values(branding={"color": "#0a84ff"}))
+        await db.commit()
+        # the hot-path lookup leaves the JSON column alone
+        looked_up = await get_tenant_by_host(db, "client1", "client1.local.com")
+        assert "branding" in inspect(looked_up).unloaded
+
+    headers = {"Host": "client1.local.com", "Accept-Encoding": "gzip"}
+    response = await client.get("/api/tenant/branding", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"color": "#0a84ff"}
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["etag"]
+    versioned_url = response.headers["content-location"]
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+    # served from the cache: only the middleware's tenant lookup (plus the test's savepoint pair)
+    with query_budget(3):
+        response = await client.get(versioned_url, headers=headers)
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+    response = await client.get("/api/tenant/branding", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    plain = await client.get("/api/tenant/branding", headers={"Host": "client1.local.com", "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != etag
+
+    async with session_factory() as db:
+        await db.execute(update(Tenant).where(Tenant.id == tenant.id).values(branding={"color": "#ff375f"}))
+        await db.commit()
+    response = await client.get(versioned_url, headers=headers)
+    assert response.json() == {"color": "#ff375f"}
+    assert response.headers["content-location"] != versioned_url
+    assert response.headers["cache-control"] != "public, max-age=31536000, immutable"
+
+
+@pytest.mark.asyncio
+async def test_session_bootstrap(client, seed_data, query_budget):
+    user = seed_data["users"]["admin@client1.com"]
+    headers = {"Host": "client1.local.com"}
+
+    # tenant lookup, the fused user/membership/roles/permissions query, the refresh token insert
+    with query_budget(7):
+        response = await client.post("/api/auth/session", json={"email": user.email, "password": "admin123"}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["token_type"] == "bearer"
+    assert body["me"] == {"user_name": user.full_name, "user_email": user.email, "tenant_name": "Client 1", "roles": ["admin_tenant"]}
+    assert body["tenant"]["subdomain"] == "client1"
+    assert body["permissions"] == ["read", "write"]
+
+    # the refresh token was stored like /login's
+    refreshed = await client.post("/api/auth/refresh", json={"refresh_token": body["refresh_token"]}, headers=headers)
+    assert refreshed.status_code == 200
+
+    # /me right after the session call is served from the cache it primed
+    with query_budget(7):
+        me = await client.get("/api/auth/me", headers={**headers, "Authorization": f"Bearer {body['access_token']}"})
+    assert me.json() == body["me"]
+
+    wrong = await client.post("/api/auth/session", json={"email": user.email, "password": "nope"}, headers=headers)
+    assert wrong.status_code == 401
+    other_tenant = await client.post(
+        "/api/auth/session", json={"email": "admin@client2.com", "password": "admin123"}, headers=headers,
+    )
+    assert other_tenant.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_switch_tenant_without_password(client, seed_data, session_factory, monkeypatch, query_budget):
+    import app.crud.user as crud_user
+    from app.services.auth import decode_access_token
+
+    user = seed_data["users"]["admin@client1.com"]
+    client2 = seed_data["tenants"]["client2"]
+    login = await client.post(
+        "/api/auth/login", params={"email": user.email, "password": "admin123"}, headers={"Host": "client1.local.com"},
+    )
+    tokens = login.json()
+
+    # not a member of client2 yet
+    response = await client.post(
+        "/api/auth/switch-tenant", json={"token": tokens["access_token"], "tenant": "client2"},
+        headers={"Host": "client1.local.com"},
+    )
+    assert response.status_code == 403
+
+    async with session_factory() as db:
+        db.add(UserTenant(id=uuid.uuid4(), user_id=user.id, tenant_id=client2.id, is_active=True, default_tenant=False))
+        await db.commit()
+
+    async def no_bcrypt(*args):
+        raise AssertionError("switch-tenant must not verify a password")
+    monkeypatch.setattr(crud_user, "_run_bcrypt", no_bcrypt)
+
+    # tenant lookup, membership + roles (+ the test's savepoints)
+    with query_budget(6):
+        response = await client.post(
+            "/api/auth/switch-tenant", json={"token": tokens["access_token"], "tenant": "client2"},
+            headers={"Host": "client1.local.com"},
+        )
+    assert response.status_code == 200
+    switched = response.json()
+    assert switched["tenant"] == "client2"
+    assert switched["roles"] == []
+    # an access token only buys an access token, and no longer-lived one
+    assert "refresh_token" not in switched
+    assert decode_access_token(switched["access_token"])["exp"] <= decode_access_token(tokens["access_token"])["exp"]
+
+    same = await client.post(
+        "/api/auth/switch-tenant", json={"token": tokens["access_token"]}, headers={"Host": "client1.local.com"},
+    )
+    assert same.status_code == 400
+
+    # a refresh token is rotated: it buys a refresh token for the target tenant once
+    switched = await client.post(
+        "/api/auth/switch-tenant", json={"token": tokens["refresh_token"], "tenant": "client2"},
+        headers={"Host": "client1.local.com"},
+    )
+    assert switched.status_code == 200
+    reused = await client.post(
+        "/api/auth/switch-tenant", json={"token": tokens["refresh_token"], "tenant": "client2"},
+        headers={"Host": "client1.local.com"},
+    )
+    assert reused.status_code == 401
+    refreshed = await client.post(
+        "/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}, headers={"Host": "client1.local.com"},
+    )
+    assert refreshed.status_code == 401
+
+    # the new refresh token goes back to the host's tenant
+    back = await client.post(
+        "/api/auth/switch-tenant", json={"token": switched.json()["refresh_token"]}, headers={"Host": "client1.local.com"},
+    )
+    assert back.status_code == 200
+    assert back.json()["roles"] == ["admin_tenant"]
+
+    await client.post("/api/auth/logout", json={"refresh_token": back.json()["refresh_token"]})
+    revoked = await client.post(
+        "/api/auth/switch-tenant", json={"token": back.json()["refresh_token"], "tenant": "client2"},
+        headers={"Host": "client1.local.com"},
+    )
+    assert revoked.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_api_keys(client, seed_data, query_budget):
+    user = seed_data["users"]["admin@client1.com"]
+    headers = {"Host": "client1.local.com"}
+    login = await client.post("/api/auth/login", params={"email": user.email, "password": "admin123"}, headers=headers)
+    admin = {**headers, "Authorization": f"Bearer {login.json()['access_token']}"}
+
+    unknown = await client.post("/api/api-keys", json={"name": "ci", "scopes": ["nope"]}, headers=admin)
+    assert unknown.status_code == 400
+    created = await client.post("/api/api-keys", json={"name": "ci", "scopes": ["read"]}, headers=admin)
+    assert created.status_code == 201
+    body = created.json()
+    key = body["key"]
+    assert key.startswith(f"ak_{body['prefix']}_") and body["scopes"] == ["read"]
+
+    listed = await client.get("/api/api-keys", headers=admin)
+    assert [k["prefix"] for k in listed.json()] == [body["prefix"]]
+    assert "key" not in listed.json()[0]
+
+    response = await client.get("/api/permission-check/read", headers={**headers, "X-API-Key": key})
+    assert response.status_code == 200
+    # the key is cached now: a hit costs the tenant lookups and an HMAC, no key query
+    # (+ the test's savepoints)
+    with query_budget(6):
+        response = await client.get("/api/permission-check/read", headers={**headers, "X-API-Key": key})
+    assert response.status_code == 200
+
+    # the real read endpoint takes the key too; only bearer responses are cached with an ETag
+    tenant_data = await client.get("/api/tenant/tenant-data", headers={**headers, "X-API-Key": key})
+    assert tenant_data.status_code == 200 and "etag" not in tenant_data.headers
+    assert tenant_data.json() == {"tenant_name": "Client 1", "subdomain": "client1"}
+
+    # bearer tokens still work on the same dependency
+    assert (await client.get("/api/permission-check/read", headers=admin)).status_code == 200
+    assert (await client.get("/api/permission-check/read", headers=headers)).status_code == 401
+
+    other_tenant = await client.get("/api/permission-check/read", headers={"Host": "client2.local.com", "X-API-Key": key})
+    assert other_tenant.status_code == 403
+    tampered = await client.get("/api/permission-check/read", headers={**headers, "X-API-Key": key[:-2] + "xx"})
+    assert tampered.status_code == 401
+    malformed = await client.get("/api/permission-check/read", headers={**headers, "X-API-Key": "not-a-key"})
+    assert malformed.status_code == 401
+
+    write_key = (await client.post("/api/api-keys", json={"name": "w", "scopes": ["write"]}, headers=admin)).json()["key"]
+    missing_scope = await client.get("/api/permission-check/read", headers={**headers, "X-API-Key": write_key})
+    assert missing_scope.status_code == 403
+    assert (await client.get("/api/tenant/tenant-data", headers={**headers, "X-API-Key": write_key})).status_code == 403
+
+    revoked = await client.delete(f"/api/api-keys/{body['id']}", headers=admin)
+    assert revoked.status_code == 204
+    response = await client.get("/api/permission-check/read", headers={**headers, "X-API-Key": key})
+    assert response.status_code == 401
+    assert (await client.delete(f"/api/api-keys/{uuid.uuid4()}", headers=admin)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_bulk_user_provisioning(client, seed_data, session_factory, monkeypatch):
+    from app.config import settings
+    headers = {"Host": "client1.local.com"}
+    login = await client.post("/api/auth/login", params={"email": "admin@client1.com", "password": "admin123"}, headers=headers)
+    admin = {**headers, "Authorization": f"Bearer {login.json()['access_token']}"}
+    client1 = seed_data["tenants"]["client1"]
+
+    upload = "\n".join([
+        "email,full_name,password,roles",
+        "new1@client1.com,New One,secret-1,operator",
+        "new2@client1.com,New Two,,operator;admin_tenant",  # no password: invited
+        "new1@client1.com,Again,secret-1,",                 # duplicate
+        "not-an-email,Broken,x,",
+        "new3@client1.com,New Three,secret-3,nope",         # unknown role
+        "admin@client1.com,Member,x,",                      # already a member
+        "admin@client2.com,Client2 Admin,,operator",        # another tenant's account: invited like the rest
+    ])
+    response = await client.post("/api/users/bulk", content=upload, headers={**admin, "Content-Type": "text/csv"})
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["rows"], result["invited"], result["failed"]) == (7, 3, 4)
+    assert [(e["row"], e["email"]) for e in result["errors"]] == [
+        (3, "new1@client1.com"), (4, "not-an-email"), (5, "new3@client1.com"), (6, "admin@client1.com"),
+    ]
+    assert set(result["timings"]) == {"validate", "lookup", "hash", "insert"} and result["rows_per_second"] > 0
+    # nothing in the response tells new accounts from existing ones
+    assert "created" not in result and "linked" not in result
+    tokens = {invite["email"]: invite["token"] for invite in result["invites"]}
+    assert list(tokens) == ["new1@client1.com", "new2@client1.com", "admin@client2.com"]
+
+    async def accept(email, password, host=headers):
+        return await client.post("/api/auth/accept-invite", json={"token": tokens[email], "password": password}, headers=host)
+
+    # nobody joins the tenant before accepting, with the account's own password
+    pending = await client.post("/api/auth/login", params={"email": "admin@client2.com", "password": "admin123"}, headers=headers)
+    assert pending.status_code == 403
+    assert (await accept("admin@client2.com", "guessed")).status_code == 401
+    assert (await accept("admin@client2.com", "admin123", {"Host": "client2.local.com"})).status_code == 400
+    assert (await accept("admin@client2.com", "admin123")).status_code == 200
+    joined = await client.post("/api/auth/login", params={"email": "admin@client2.com", "password": "admin123"}, headers=headers)
+    assert joined.json()["roles"] == ["operator"]
+
+    # a new account with a password accepts with it; one without sets it by accepting
+    assert (await accept("new1@client1.com", "secret-1")).status_code == 200
+    created = await client.post("/api/auth/login", params={"email": "new1@client1.com", "password": "secret-1"}, headers=headers)
+    assert created.json()["roles"] == ["operator"]
+    assert (await accept("new2@client1.com", "chosen-2")).status_code == 200
+    invited = await client.post("/api/auth/login", params={"email": "new2@client1.com", "password": "chosen-2"}, headers=headers)
+    assert sorted(invited.json()["roles"]) == ["admin_tenant", "operator"]
+    assert (await accept("new2@client1.com", "x")).status_code == 400
+
+    async with session_factory() as db:
+        tenant = await db.get(type(client1), client1.id)
+        assert tenant.authz_version > client1.authz_version
+
+    as_json = await client.post("/api/users/bulk", json={"users": [{"email": "new4@client1.com", "password": "secret-4"}]}, headers=admin)
+    assert as_json.json()["invited"] == 1
+    unsupported = await client.post("/api/users/bulk", content="x", headers={**admin, "Content-Type": "text/plain"})
+    assert unsupported.status_code == 415
+    uploaded = await client.post(
+        "/api/users/bulk", files={"file": ("users.csv", b"email\nnew5@client1.com\n", "application/octet-stream")}, headers=admin,
+    )
+    assert uploaded.json()["invited"] == 1
+    not_a_file = await client.post("/api/users/bulk", data={"file": "email\nnew6@client1.com"}, files={"other": ("x", b"")}, headers=admin)
+    assert not_a_file.status_code == 400 and "`file`" in not_a_file.json()["detail"]
+
+    # CSV is parsed as it streams in: a quoted field may span lines and chunks
+    async def streamed():
+        for piece in (b'email,full_name\nnew6@client1.com,"Six', b'\nand a half"\nnew7@', b"client1.com,Seven"):
+            yield piece
+    streaming = await client.post("/api/users/bulk", content=streamed(), headers={**admin, "Content-Type": "text/csv"})
+    assert (streaming.json()["rows"], streaming.json()["invited"]) == (2, 2)
+
+    monkeypatch.setattr(settings, "BULK_USERS_MAX_BYTES", 32)
+    declared = await client.post("/api/users/bulk", content="email\n" + "x" * 64, headers={**admin, "Content-Type": "text/csv"})
+    assert declared.status_code == 413
+    undeclared = await client.post("/api/users/bulk", content=streamed(), headers={**admin, "Content-Type": "text/csv"})
+    assert undeclared.status_code == 413
+    monkeypatch.setattr(settings, "BULK_USERS_MAX_BYTES", 1 << 20)
+    monkeypatch.setattr(settings, "BULK_USERS_MAX_ROWS", 1)
+    overlong = await client.post("/api/users/bulk", content=streamed(), headers={**admin, "Content-Type": "text/csv"})
+    assert overlong.status_code == 413
+
+    operator = await client.post("/api/auth/login", params={"email": "operator@client1.com", "password": "operator123"}, headers=headers)
+    forbidden = await client.post(
+        "/api/users/bulk", json=[], headers={**headers, "Authorization": f"Bearer {operator.json()['access_token']}"},
+    )
+    assert forbidden.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_bulk_role_and_permission_assignment(client, seed_data, session_factory, query_budget):
+    headers = {"Host": "client1.local.com"}
+    login = await client.post("/api/auth/login", params={"email": "admin@client1.com", "password": "admin123"}, headers=headers)
+    admin = {**headers, "Authorization": f"Bearer {login.json()['access_token']}"}
+    client1 = seed_data["tenants"]["client1"]
+    admin_id = str(seed_data["users"]["admin@client1.com"].id)
+    operator_id = str(seed_data["users"]["operator@client1.com"].id)
+
+    async def authz_version():
+        async with session_factory() as db:
+            return (await db.get(type(client1), client1.id)).authz_version
+
+    before = await authz_version()
+    # tenant, the admin's roles, members and roles by name, one INSERT for both users, one
+    # version bump (+ the test's savepoints)
+    with query_budget(10):
+        response = await client.post(
+            "/api/rbac/user-roles/assign", json={"user_ids": [admin_id, operator_id], "roles": ["operator"]}, headers=admin,
+        )
+    assert response.json() == {"added": 1, "removed": 0}
+    assert await authz_version() == before + 1
+    again = await client.post("/api/rbac/user-roles/assign", json={"user_ids": [operator_id], "roles": ["operator"]}, headers=admin)
+    assert again.json() == {"added": 0, "removed": 0}
+    assert await authz_version() == before + 1  # nothing changed, nothing invalidated
+
+    replaced = await client.post("/api/rbac/user-roles/replace", json={"user_ids": [admin_id], "roles": ["admin_tenant"]}, headers=admin)
+    assert replaced.json() == {"added": 0, "removed": 1}
+    revoked = await client.post("/api/rbac/user-roles/revoke", json={"user_ids": [operator_id], "roles": ["operator"]}, headers=admin)
+    assert revoked.json() == {"added": 0, "removed": 1}
+    operator = await client.post("/api/auth/login", params={"email": "operator@client1.com", "password": "operator123"}, headers=headers)
+    assert operator.json()["roles"] == []
+
+    permissions = await client.post(
+        "/api/rbac/role-permissions/replace", json={"roles": ["admin_tenant"], "permissions": ["read"]}, headers=admin,
+    )
+    assert permissions.json() == {"added": 0, "removed": 1}
+    session = await client.post("/api/auth/session", json={"email": "admin@client1.com", "password": "admin123"}, headers=headers)
+    assert session.json()["permissions"] == ["read"]
+    restored = await client.post(
+        "/api/rbac/role-permissions/assign", json={"roles": ["admin_tenant"], "permissions": ["read", "write"]}, headers=admin,
+    )
+    assert restored.json() == {"added": 1, "removed": 0}
+
+    client2_admin = str(seed_data["users"]["admin@client2.com"].id)
+    not_member = await client.post("/api/rbac/user-roles/assign", json={"user_ids": [client2_admin], "roles": ["operator"]}, headers=admin)
+    assert not_member.status_code == 400
+    unknown = await client.post("/api/rbac/role-permissions/revoke", json={"roles": ["nope"], "permissions": ["read"]}, headers=admin)
+    assert unknown.status_code == 400
+    bad_operation = await client.post("/api/rbac/user-roles/merge", json={"user_ids": [admin_id], "roles": []}, headers=admin)
+    assert bad_operation.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_onboard_tenants_from_template(client, seed_data, session_factory):
+    from app.schemas.tenants import TenantOnboard
+    from app.services.onboarding import onboard_tenants
+
+    specs = [
+        TenantOnboard(name="Acme", subdomain="acme", admins=["owner@acme.com", "admin@client1.com"]),
+        TenantOnboard(name="Beta", subdomain="beta", code="CLIENT1"),  # code of an existing tenant
+    ]
+    async with session_factory() as db:
+        result = await onboard_tenants(db, specs)
+    assert result["counts"]["tenants"] == 1 and result["counts"]["roles"] == 3
+    assert result["counts"]["role_permissions"] == 5
+    assert result["errors"] == [{"subdomain": "beta", "error": "code CLIENT1 is taken"}]
+
+    # routable right away; the existing account was added, the new one invited
+    headers = {"Host": "acme.local.com"}
+    assert (await client.get("/api/tenant/branding", headers=headers)).status_code == 200
+    existing = await client.post("/api/auth/login", params={"email": "admin@client1.com", "password": "admin123"}, headers=headers)
+    assert existing.json()["roles"] == ["admin_tenant"]
+    [invite] = result["invites"]
+    assert invite["email"] == "owner@acme.com"
+    await client.post("/api/auth/reset-password", json={"token": invite["token"], "new_password": "owner-pw"})
+    owner = await client.post("/api/auth/session", json={"email": "owner@acme.com", "password": "owner-pw"}, headers=headers)
+    assert owner.json()["me"]["roles"] == ["admin_tenant"]
+    assert owner.json()["permissions"] == ["read", "write"]
+
+    async with session_factory() as db:
+        rerun = await onboard_tenants(db, specs[:1], "minimal")
+    assert rerun["skipped"] == ["acme"] and rerun["counts"]["tenants"] == 0
+    async with session_factory() as db:
+        with pytest.raises(ValueError):
+            await onboard_tenants(db, specs, "nope")
+
+
+@pytest.mark.asyncio
+async def test_offboarding_is_chunked_and_resumable(client, seed_data, session_factory):
+    from app.services.offboarding import count_rows, run_offboarding, start_offboarding
+
+    client2 = seed_data["tenants"]["client2"]
+    admin2 = seed_data["users"]["admin@client2.com"]
+    headers = {"Host": "client2.local.com"}
+    login = await client.post("/api/auth/login", params={"email": admin2.email, "password": "admin123"}, headers=headers)
+    admin = {**headers, "Authorization": f"Bearer {login.json()['access_token']}"}
+    await client.post("/api/api-keys", json={"name": "ci", "scopes": ["read"]}, headers=admin)
+    await client.post("/api/auth/forgot-password", json={"email": "operator@client2.com"})
+    await _seed_audit_logs(session_factory, client2, admin2, 5)
+    admin1 = seed_data["users"]["admin@client1.com"]
+    async with session_factory() as db:
+        db.add(UserTenant(id=uuid.uuid4(), user_id=admin1.id, tenant_id=client2.id, is_active=True, default_tenant=False))
+        await db.commit()
+
+    async with session_factory() as db:
+        before = await count_rows(db, client2.id)
+        tenant = await db.get(type(client2), client2.id)
+        job = await start_offboarding(db, tenant)
+    assert before["audit_logs"] == 5 and before["api_keys"] == 1 and before["password_resets"] == 1
+    # disabled for every request from now on, before any row is gone
+    assert (await client.get("/api/tenant/branding", headers=headers)).status_code == 403
+    # nor can a member switch into it from another tenant's host
+    login1 = await client.post("/api/auth/login", params={"email": admin1.email, "password": "admin123"}, headers={"Host": "client1.local.com"})
+    switched = await client.post(
+        "/api/auth/switch-tenant", json={"token": login1.json()["refresh_token"], "tenant": "client2"},
+        headers={"Host": "client1.local.com"},
+    )
+    assert switched.status_code == 403
+
+    batches = []
+
+    def stop_after_three(job, table):
+        batches.append(table)
+        if len(batches) == 3:
+            raise RuntimeError("worker stopped")
+
+    async with session_factory() as db:
+        job = await db.get(type(job), job.id)
+        with pytest.raises(RuntimeError):
+            await run_offboarding(db, job, batch_size=2, pause_ms=0, on_batch=stop_after_three)
+    async with session_factory() as db:
+        job = await db.get(type(job), job.id)
+        assert job.status == "failed"
+        assert job.progress["refresh_tokens"]["deleted"] > 0  # committed batches stay done
+        await start_offboarding(db, await db.get(type(client2), client2.id))
+        job = await run_offboarding(db, job, batch_size=2, pause_ms=0)
+        assert job.status == "done"
+        assert {table: state["deleted"] for table, state in job.progress.items()} == before
+        assert all(count == 0 for count in (await count_rows(db, client2.id)).values())
+        assert await db.get(type(client2), client2.id) is None
+        assert await db.get(type(admin2), admin2.id) is not None  # accounts are global
+
+    assert (await client.get("/api/tenant/branding", headers=headers)).status_code == 404
+    other = await client.post("/api/auth/login", params={"email": "admin@client1.com", "password": "admin123"}, headers={"Host": "client1.local.com"})
+    assert other.status_code == 200
@@ -18,8 +18,6 @@ from app.models.refresh_tokens import RefreshToken
 from app.crud.user import hash_password
 
 
-SessionLocal = init_test_db()
-
 
 async def seed_test_data(SessionLocal):
     async with SessionLocal() as db:
@@ -232,12 +230,10 @@ async def seed_test_data(SessionLocal):
 
 if __name__ == "__main__":
     import asyncio
-    from db_setup import test_engine  
-    from app.models import Base
 
     async def main():
-        async with test_engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+        engine, SessionLocal = await init_test_db()
         await seed_test_data(SessionLocal)
+        await engine.dispose()
 
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -5,7 +5,7 @@ from pathlib import Path
 
 class TestSettings(BaseSettings):
     SECRET_KEY: str
-    TEST_DB_URL: str
+    TEST_DB_URL: str = "sqlite+aiosqlite:///:memory:"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 14